@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the main selection steps on synthetic ntuples.
+
+Each step is timed at several scales, reporting the throughput in events/s and
+the peak traced memory, and compared against a stored baseline:
+
+    poetry run python benchmarks/run.py --scales 1000 10000 100000
+    poetry run python benchmarks/run.py --save
+
+The exit code is non-zero if any step is slower than its baseline by more than
+the tolerance. Timings depend on the machine, so no baseline is committed:
+without one the comparison is skipped with a message, and `--save` stores one.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import awkward as ak
+from tabulate import tabulate
+
+from sigmazerosearch.alg.lamb import select_p_pi_candidates_box
+from sigmazerosearch.alg.muon import select_mu_candidate
+from sigmazerosearch.general import Config
+from sigmazerosearch.loader import _yield_array_from_ttree, load_ntuple
+from sigmazerosearch.selection import (
+    Cut,
+    ParameterSet,
+    Sample,
+    SampleSet,
+    SampleType,
+    Selection,
+    signal_def,
+)
+from sigmazerosearch.synthetic import write_ntuple
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+pset = ParameterSet(
+    pid_cut=0.6,
+    min_length=10,
+    max_separation=1,
+    proton_pid_cut=0.2,
+    pion_pid_cut=0.2,
+    separation_cut=3,
+    w_lambda_min=1.1,
+    w_lambda_max=1.20,
+)
+
+
+def make_selection(filename: str, config: Config) -> Selection:
+    return Selection(
+        params=pset,
+        cuts=[
+            Cut("fv", lambda arr: arr["reco_primary_vtx_inFV"]),
+            Cut(
+                "tracks",
+                lambda arr: ak.sum(arr["pfp_trk_shr_score"] >= 0.5, axis=1) >= 3,
+            ),
+            Cut(
+                "showers",
+                lambda arr: ak.sum(arr["pfp_trk_shr_score"] < 0.5, axis=1) >= 1,
+            ),
+            Cut(
+                "muon-id",
+                lambda arr: ak.sum(select_mu_candidate(arr, pset), axis=1) >= 1,
+            ),
+        ],
+        samples=SampleSet(
+            Sample("hyperon", filename, SampleType.Hyperon, None), target_POT=1e21
+        ),
+        config=config,
+    )
+
+
+def steps(filename: str, config: Config) -> dict[str, Callable[[], object]]:
+    tree = load_ntuple(filename + ":ana/OutputTree")
+    arr = tree.arrays()
+
+    def apply_cut():
+        sel = make_selection(filename, config)
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+
+    return {
+        "loader": lambda: list(_yield_array_from_ttree(tree, config)),
+        "signal_def": lambda: signal_def(arr),
+        "select_mu_candidate": lambda: select_mu_candidate(arr, pset),
+        "select_p_pi_candidates_box": lambda: select_p_pi_candidates_box(arr, pset),
+        "apply_cut": apply_cut,
+    }
+
+
+def measure(func: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """Best wall time of `repeat` calls and the peak traced memory in MB"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--step", default="100 MB", help="loader iterate_step")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    config = Config(iterate=True, iterate_step=args.step)
+    baseline = {}
+    if args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text())
+    elif not args.save:
+        # timings depend on the machine, so no baseline is shipped
+        print(
+            f"no baseline at {args.baseline}, skipping the comparison; "
+            "store one on this machine with --save",
+            file=sys.stderr,
+        )
+    results, rows, regressions = {}, [], []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.scales:
+            filename = str(Path(tmp) / f"synthetic_{n}.root")
+            write_ntuple(filename, n, seed=n)
+            for name, func in steps(filename, config).items():
+                key = f"{name}@{n}"
+                elapsed, peak = measure(func, args.repeat)
+                results[key] = {"time": elapsed, "peak_mb": peak}
+
+                ratio = elapsed / baseline[key]["time"] if key in baseline else None
+                if ratio is not None and ratio > 1 + args.tolerance:
+                    regressions.append(key)
+                rows.append([name, n, elapsed, n / elapsed, peak, ratio])
+
+    print(
+        tabulate(
+            rows,
+            headers=["Step", "Events", "Time [s]", "Events/s", "Peak [MB]", "vs. base"],
+            floatfmt=("", "", ".4f", ".3g", ".1f", ".2f"),
+        )
+    )
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"saved baseline to {args.baseline}")
+    elif regressions:
+        print("slower than baseline:", ", ".join(regressions))
+        return 1
+    elif baseline:
+        missing = [k for k in results if k not in baseline]
+        if missing:
+            print("not in the baseline, skipped:", ", ".join(missing), file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ import awkward as ak
 import matplotlib.pyplot as plt
 
 from sigmazerosearch.alg.muon import select_mu_candidate
+from sigmazerosearch.general import Config
 from sigmazerosearch.selection import (
     Cut,
     ParameterSet,
@@ -61,6 +62,8 @@ sel = Selection(
     ),
     params=pset,
     label="nominal",
+    # show the figures of the plot_* methods in windows, not only return them
+    config=Config(plot_show=True),
 )
 
 
@@ -8,8 +8,15 @@ values that affect the physics decisions of this framework.
 Submodules are organised by what problems they aim to solve:
 
 - `fv`: provides a fiducial volume cut and some other definitions regarding the
-  detector geometry.
+  detector geometry, including named volumes classified in one pass.
 - `muon`: provides methods of selecting a muon-like object
+- `kinematics`: vectorised four-momenta, invariant masses and opening angles
+- `lamb`: selects and reconstructs the {math}`\\Lambda \\rightarrow p + \\pi^-`
+  decay
+- `sigma`: reconstructs the {math}`\\Sigma^0 \\rightarrow \\Lambda + \\gamma`
+  decay
+- `roles`: assigns PFPs exclusively to the muon, proton, pion and photon of
+  the signal topology
 
 :::{admonition}
 `stats`: will provide statistical treatments for the analysis.
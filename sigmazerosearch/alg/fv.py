@@ -1,6 +1,31 @@
+"""
+Detector geometry: the active TPC and other named volumes.
+
+A <project:#Geometry> holds several named volumes, e.g. the active TPC,
+fiducial volumes with different margins and dead regions, and classifies
+points against all of them at once. The result is a bitmask per point, with
+bit `i` set when the point is inside the `i`-th volume:
+
+```python
+geo = Geometry(
+    active=Volume(ACTIVE_TPC),
+    fv10=Volume(ACTIVE_TPC.shrink(10.0), exclude=(dead,)),
+    fv20=Volume(ACTIVE_TPC.shrink(20.0), exclude=(dead,)),
+)
+mask = geo.classify(arr["trk_start_x"], arr["trk_start_y"], arr["trk_start_z"])
+in_fv10 = geo.contains(mask, "fv10")
+```
+
+The coordinates may be scalars, NumPy arrays or flat or jagged
+<inv:#ak.Array>s, the mask has the same structure.
+"""
+
+from dataclasses import dataclass
+
+import awkward as ak
 import numpy as np
 
-__all__ = ["in_active_tpc"]
+__all__ = ["in_active_tpc", "Box", "Volume", "Geometry", "ACTIVE_TPC", "GEOMETRY"]
 
 TPC_CENTER = (126.625, 0.97, 518.5)
 TPC_SIDE_LENGTHS = (236.35, 233.0, 1036.8)
@@ -27,3 +52,115 @@ def in_active_tpc(x, y, z):
             z <= FV_z[1],
         )
     )
+
+
+@dataclass(frozen=True)
+class Box:
+    """An axis-aligned box, including its faces"""
+
+    x: Sides
+    y: Sides
+    z: Sides
+
+    def shrink(
+        self, margin: float | Sides, y: float | Sides | None = None, z=None
+    ) -> "Box":
+        """
+        The box moved inwards by a margin from each face, given for all axes
+        or per axis, and per axis either for both faces or as `(low, high)`.
+        """
+
+        def move(sides: Sides, m) -> Sides:
+            low, high = (m, m) if np.isscalar(m) else m
+            return (sides[0] + low, sides[1] - high)
+
+        y = margin if y is None else y
+        z = margin if z is None else z
+        return Box(move(self.x, margin), move(self.y, y), move(self.z, z))
+
+
+ACTIVE_TPC = Box(FV_x, FV_y, FV_z)
+"""The active TPC, as used by <project:#in_active_tpc>."""
+
+
+@dataclass(frozen=True)
+class Volume:
+    """A box without the points inside any of the `exclude` boxes"""
+
+    box: Box
+    exclude: tuple[Box, ...] = ()
+
+
+def _flat_apply(func, x, y, z):
+    """
+    Apply `func` to the flat contents of scalar, flat or jagged coordinates,
+    broadcast against each other, e.g. jagged `x` with a scalar or per-event
+    `y`
+    """
+    if any(isinstance(c, ak.Array) for c in (x, y, z)):
+        x, y, z = ak.broadcast_arrays(x, y, z)
+        if x.ndim > 1:
+            counts = ak.num(x, axis=1)
+            inner = _flat_apply(func, *(ak.flatten(c, axis=1) for c in (x, y, z)))
+            return ak.unflatten(inner, counts)
+        return ak.Array(_flat_apply(func, *(ak.to_numpy(c) for c in (x, y, z))))
+    x, y, z = np.broadcast_arrays(x, y, z)
+    return func(x.ravel(), y.ravel(), z.ravel()).reshape(x.shape)
+
+
+class Geometry:
+    """
+    Named volumes, classified together by <project:#Geometry.classify>. The
+    bits of the mask follow the order of the keyword arguments.
+    """
+
+    def __init__(self, **volumes: Box | Volume):
+        if len(volumes) > 64:
+            raise ValueError("a geometry holds at most 64 volumes")
+        self.names: list[str] = list(volumes)
+        vols = [v if isinstance(v, Volume) else Volume(v) for v in volumes.values()]
+        self.volumes: dict[str, Volume] = dict(zip(self.names, vols))
+
+        # the bounds of all volumes, then of all distinct exclusions, per axis
+        excluded = list(dict.fromkeys(b for v in vols for b in v.exclude))
+        boxes = [v.box for v in vols] + excluded
+        self._low = np.array([[b.x[0], b.y[0], b.z[0]] for b in boxes]).T
+        self._high = np.array([[b.x[1], b.y[1], b.z[1]] for b in boxes]).T
+        self._exclusions = np.array(
+            [[b in v.exclude for b in excluded] for v in vols], dtype=bool
+        ).reshape(len(vols), len(excluded))
+        self.dtype = np.dtype(f"uint{max(8, 1 << (len(vols) - 1).bit_length())}")
+
+    def bit(self, name: str) -> int:
+        return 1 << self.names.index(name)
+
+    def _classify(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        inside = np.ones((len(x), self._low.shape[1]), dtype=bool)
+        for axis, c in enumerate((x, y, z)):
+            c = np.asarray(c)[:, None]
+            inside &= (c >= self._low[axis]) & (c <= self._high[axis])
+
+        n = len(self.names)
+        volumes, dead = inside[:, :n], inside[:, n:]
+        if dead.shape[1]:
+            volumes &= ~(
+                dead.astype(np.uint8) @ self._exclusions.T.astype(np.uint8) > 0
+            )
+        bits = np.left_shift(np.uint64(1), np.arange(n, dtype=np.uint64))
+        mask = np.bitwise_or.reduce(np.where(volumes, bits, np.uint64(0)), axis=1)
+        return mask.astype(self.dtype)
+
+    def classify(self, x, y, z):
+        """
+        The bitmask of the volumes containing each point, computed in one
+        pass over the coordinates for all volumes
+        """
+        return _flat_apply(self._classify, x, y, z)
+
+    def contains(self, mask, name: str):
+        """Whether the points of a `mask` are inside the volume `name`"""
+        return (mask & self.bit(name)) != 0
+
+
+GEOMETRY = Geometry(active_tpc=ACTIVE_TPC)
+"""The default geometry, holding the active TPC only."""
@@ -0,0 +1,84 @@
+"""
+Vectorised kinematics of reconstructed particles.
+
+The functions here work on flat NumPy arrays, e.g. the buffers of jagged PFP
+branches or one value per event, so that whole chunks are reconstructed with a
+few array operations. Momenta and energies are in GeV, angles in radians.
+Missing particles are represented by NaN, which propagates to every quantity
+derived from them.
+"""
+
+from dataclasses import dataclass
+
+import awkward as ak
+import numpy as np
+
+PROTON_MASS = 0.938272
+PION_MASS = 0.139570
+LAMBDA_MASS = 1.115683
+SIGMA0_MASS = 1.192642
+
+
+@dataclass(frozen=True)
+class KinematicBranches:
+    """
+    The branches holding the reconstructed momenta of tracks, under each mass
+    hypothesis, and the energies of showers, together with their directions.
+    """
+
+    trk_dir: tuple[str, str, str] = ("trk_dir_x", "trk_dir_y", "trk_dir_z")
+    proton_mom: str = "trk_mom_proton"
+    pion_mom: str = "trk_mom_pion"
+    shr_dir: tuple[str, str, str] = ("shr_dir_x", "shr_dir_y", "shr_dir_z")
+    shr_energy: str = "shr_energy"
+
+    def all(self) -> list[str]:
+        return [
+            *self.trk_dir,
+            self.proton_mom,
+            self.pion_mom,
+            *self.shr_dir,
+            self.shr_energy,
+        ]
+
+
+def pick(values: ak.Array, index) -> np.ndarray:
+    """
+    The value of a jagged branch at one index per event, NaN where the index
+    is negative, gathered from the flat buffer in one pass
+    """
+    counts = ak.to_numpy(ak.num(values, axis=1))
+    flat = ak.to_numpy(ak.flatten(values)).astype(float)
+    index = np.asarray(index)
+    valid = index >= 0
+    at = np.where(valid, np.cumsum(counts) - counts + index, 0)
+    return np.where(valid, np.append(flat, np.nan)[at], np.nan)
+
+
+def four_momentum(mom, direction, mass: float) -> np.ndarray:
+    """
+    The `(n, 4)` four-momenta `(E, px, py, pz)` of particles of `mass` with
+    momenta `mom` along the `(n, 3)` unit vectors `direction`
+    """
+    mom = np.asarray(mom, dtype=float)
+    p = mom[:, None] * _unit(direction)
+    return np.column_stack((np.sqrt(mom**2 + mass**2), p))
+
+
+def invariant_mass(*momenta: np.ndarray) -> np.ndarray:
+    """The invariant mass of the sum of `(n, 4)` four-momenta"""
+    total = np.sum(momenta, axis=0)
+    m2 = total[:, 0] ** 2 - np.sum(total[:, 1:] ** 2, axis=1)
+    return np.sqrt(np.maximum(m2, 0.0))
+
+
+def opening_angle(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """The angle between `(n, 3)` vectors, or the spatial parts of `(n, 4)` ones"""
+    a, b = _unit(a[:, -3:]), _unit(b[:, -3:])
+    return np.arccos(np.clip(np.sum(a * b, axis=1), -1.0, 1.0))
+
+
+def _unit(v) -> np.ndarray:
+    v = np.asarray(v, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
@@ -9,9 +9,21 @@ negative pion: {math}`\\Lambda \\rightarrow p + \\pi^-`.
 """
 
 import awkward as ak
+import numpy as np
 
 import sigmazerosearch.utils as utils
-from sigmazerosearch.selection import ParameterSet
+from sigmazerosearch.alg.kinematics import (
+    PION_MASS,
+    PROTON_MASS,
+    KinematicBranches,
+    four_momentum,
+    invariant_mass,
+    opening_angle,
+    pick,
+)
+from sigmazerosearch.alg.roles import assign_roles
+from sigmazerosearch.derived import derived
+from sigmazerosearch.general import ParameterSet
 
 
 def select_p_pi_candidates(arr: ak.Array, pset: ParameterSet) -> ak.Array:
@@ -71,6 +83,44 @@ def select_p_pi_candidates_box(arr: ak.Array, pset: ParameterSet) -> ak.Array:
     )  # type: ignore
 
 
+@derived
+def reconstruct_lambda(
+    arr: ak.Array,
+    pset: ParameterSet,
+    branches: KinematicBranches = KinematicBranches(),
+) -> ak.Array:
+    """
+    Reconstruct the {math}`\\Lambda` of each event from the proton and pion
+    chosen by <project:#assign_roles>.
+
+    :return:
+        A record <inv:#ak.Array> with, per event, the `proton` and `pion` PFP
+        indices, the four-momentum `p4` as `(E, px, py, pz)`, the invariant
+        `mass` and the proton-pion opening `angle`. Events without a pair have
+        NaN kinematics.
+    """
+    roles = assign_roles(arr, pset)
+    proton = ak.to_numpy(roles.proton)
+    pion = ak.to_numpy(roles.pion)
+
+    def track(index, mom: str, mass: float) -> np.ndarray:
+        direction = np.column_stack([pick(arr[b], index) for b in branches.trk_dir])
+        return four_momentum(pick(arr[mom], index), direction, mass)
+
+    p = track(proton, branches.proton_mom, PROTON_MASS)
+    pi = track(pion, branches.pion_mom, PION_MASS)
+    return ak.zip(
+        {
+            "proton": proton,
+            "pion": pion,
+            "p4": p + pi,
+            "mass": invariant_mass(p, pi),
+            "angle": opening_angle(p, pi),
+        },
+        depth_limit=1,
+    )
+
+
 def invariant_mass_cut(arr: ak.Array, pset: ParameterSet) -> ak.Array:
     """
     Select events that have a reconstructed {math}`p-\\pi^-` invariant mass
@@ -80,4 +130,5 @@ def invariant_mass_cut(arr: ak.Array, pset: ParameterSet) -> ak.Array:
     <project:#ParameterSet.w_lambda_min> and
     <project:#ParameterSet.w_lambda_max> in GeV, respectively.
     """
-    raise NotImplementedError
+    mass = reconstruct_lambda(arr, pset).mass
+    return (mass >= pset.w_lambda_min) & (mass <= pset.w_lambda_max)
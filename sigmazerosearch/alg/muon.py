@@ -1,6 +1,6 @@
 import awkward as ak
 
-from sigmazerosearch.selection import ParameterSet
+from sigmazerosearch.general import ParameterSet
 from sigmazerosearch.utils import displacement
 
 
@@ -0,0 +1,169 @@
+"""
+Exclusive assignment of PFPs to the particles of the signal topology.
+
+<project:#select_mu_candidate> and <project:#select_p_pi_candidates_box>
+consider every PFP independently, so the same track may be taken as both the
+muon and the proton. <project:#assign_roles> gives each PFP at most one role,
+choosing the muon, proton and pion together so that taking one track for a
+role never leaves another role without a valid candidate.
+
+Every step is a vectorised operation over the PFPs of the whole chunk. Only
+the best few candidates of each role are combined, a fixed number of
+combinations per event, so the cost scales with the number of PFPs (up to
+sorting the candidates of each event).
+"""
+
+from enum import IntEnum
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.derived import derived
+from sigmazerosearch.general import ParameterSet
+from sigmazerosearch.utils import displacement
+
+__all__ = ["Role", "assign_roles", "role_of"]
+
+BRANCHES = [
+    "pfp_trk_shr_score",
+    "trk_llrpid",
+    "trk_length",
+    "trk_start_x",
+    "trk_start_y",
+    "trk_start_z",
+    "reco_primary_vtx_x",
+    "reco_primary_vtx_y",
+    "reco_primary_vtx_z",
+]
+"""The branches <project:#assign_roles> reads."""
+
+CANDIDATES = 4
+"""
+The number of best-scoring tracks of each event considered for each of the
+muon, proton and pion roles.
+"""
+
+
+class Role(IntEnum):
+    """The roles a PFP can take"""
+
+    Muon = 0
+    Proton = 1
+    Pion = 2
+    Photon = 3
+
+
+def _best(score: ak.Array, eligible: ak.Array) -> ak.Array:
+    """The index of the highest eligible score of each event, or -1"""
+    best = ak.argmax(ak.mask(score, eligible), axis=1)
+    return ak.fill_none(best, -1)
+
+
+def _candidates(score: ak.Array, eligible: ak.Array) -> ak.Array:
+    """
+    The indices of the <project:#CANDIDATES> highest eligible scores of each
+    event, best first, followed by -1 for leaving the role empty
+    """
+    order = ak.argsort(ak.where(eligible, score, -np.inf), axis=1, ascending=False)
+    order = order[:, :CANDIDATES]
+    order = order[eligible[order]]
+    empty = ak.singletons(ak.full_like(ak.num(order, axis=1), -1))
+    return ak.concatenate([order, empty], axis=1)
+
+
+def _at(values: ak.Array, index: ak.Array) -> ak.Array:
+    """The value at `index` of each event, or None where it is -1"""
+    return values[ak.mask(index, index >= 0)]
+
+
+@derived
+def assign_roles(arr: ak.Array, pset: ParameterSet) -> ak.Array:
+    """
+    Assign the PFPs of each event to the roles of <project:#Role>, at most one
+    PFP per role and one role per PFP.
+
+    The muon, proton and pion are chosen together among the tracks:
+
+    - Muon: a track starting within <project:#ParameterSet.max_separation> of
+      the primary vertex, with a PID score below
+      <project:#ParameterSet.pid_cut> and at least
+      <project:#ParameterSet.min_length> long.
+    - Proton: a track with a PID score of at least
+      <project:#ParameterSet.proton_pid_cut>.
+    - Pion: a track with a PID score of at least
+      <project:#ParameterSet.pion_pid_cut>, starting at least
+      <project:#ParameterSet.separation_cut> from the proton.
+
+    Of the combinations of distinct tracks, the one filling the most roles is
+    taken, then the one with the longest muon, then the best proton score and
+    then the best pion score. Only the <project:#CANDIDATES> best tracks for
+    each role are considered. The photon is then the most shower-like
+    shower.
+
+    :return:
+        A record <inv:#ak.Array> with one field per role, lowercase, holding
+        the index of the PFP taking the role in each event or -1.
+    """
+    score = arr["pfp_trk_shr_score"]
+    track = score > 0.5
+    pid = arr["trk_llrpid"]
+    length = arr["trk_length"]
+    near = ak.fill_none(
+        displacement(arr, "trk_start_x", "trk_start_y", "trk_start_z"), [], axis=0
+    )
+
+    m, p, q = ak.unzip(
+        ak.cartesian(
+            [
+                _candidates(
+                    length,
+                    track
+                    & (pid < pset.pid_cut)
+                    & (length >= pset.min_length)
+                    & (near < pset.max_separation),
+                ),
+                _candidates(pid, track & (pid >= pset.proton_pid_cut)),
+                _candidates(pid, track & (pid >= pset.pion_pid_cut)),
+            ],
+            axis=1,
+        )
+    )
+    d2 = sum(
+        (_at(arr[f"trk_start_{c}"], p) - _at(arr[f"trk_start_{c}"], q)) ** 2
+        for c in "xyz"
+    )
+    valid = (
+        ((m < 0) | (p < 0) | (m != p))
+        & ((m < 0) | (q < 0) | (m != q))
+        & ((p < 0) | (q < 0) | (p != q))
+        & ak.fill_none(np.sqrt(d2) >= pset.separation_cut, True)
+    )
+
+    # keep the best combinations by each criterion in turn, then the first
+    keep = valid
+    for value in [
+        sum(ak.values_astype(i >= 0, np.int64) for i in (m, p, q)),
+        ak.fill_none(_at(length, m), -np.inf),
+        ak.fill_none(_at(pid, p), -np.inf),
+        ak.fill_none(_at(pid, q), -np.inf),
+    ]:
+        top = ak.max(ak.mask(value, keep), axis=1)
+        keep = keep & ak.fill_none(value == top, False)
+    k = ak.argmax(keep, axis=1, keepdims=True)
+
+    roles = {
+        Role.Muon.name.lower(): ak.firsts(m[k]),
+        Role.Proton.name.lower(): ak.firsts(p[k]),
+        Role.Pion.name.lower(): ak.firsts(q[k]),
+        Role.Photon.name.lower(): _best(-score, score < 0.5),
+    }
+    return ak.zip(roles)
+
+
+def role_of(arr: ak.Array, roles: ak.Array) -> ak.Array:
+    """The <project:#Role> value of every PFP of `arr`, or -1 without one"""
+    local = ak.local_index(arr["pfp_trk_shr_score"], axis=1)
+    out = ak.full_like(local, -1)
+    for role in Role:
+        out = ak.where(local == roles[role.name.lower()], role.value, out)
+    return out
@@ -0,0 +1,69 @@
+"""
+Reconstruction of the {math}`\\Sigma^0` from its decay
+{math}`\\Sigma^0 \\rightarrow \\Lambda + \\gamma`.
+
+The {math}`\\Lambda` reconstructed by <project:#reconstruct_lambda> is
+combined with every shower-like PFP of its event as the photon candidate.
+All combinations of a chunk are computed together on the flat PFP buffers.
+"""
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.alg.kinematics import (
+    KinematicBranches,
+    four_momentum,
+    invariant_mass,
+    opening_angle,
+)
+from sigmazerosearch.alg.lamb import reconstruct_lambda
+from sigmazerosearch.derived import derived
+from sigmazerosearch.general import ParameterSet
+
+__all__ = ["reconstruct_sigma0"]
+
+
+@derived
+def reconstruct_sigma0(
+    arr: ak.Array,
+    pset: ParameterSet,
+    branches: KinematicBranches = KinematicBranches(),
+) -> ak.Array:
+    """
+    Combine the {math}`\\Lambda` of each event with each of its showers
+    (`pfp_trk_shr_score < 0.5`).
+
+    :return:
+        A record <inv:#ak.Array> with the fields of
+        <project:#reconstruct_lambda> per event, and a jagged `candidates`
+        field holding, for every shower of an event with a {math}`\\Lambda`,
+        the `photon` PFP index, the {math}`\\Lambda\\gamma` invariant `mass`
+        and the {math}`\\Lambda`-photon opening `angle`.
+    """
+    lamb = reconstruct_lambda(arr, pset, branches)
+    has_lambda = ak.to_numpy(np.isfinite(lamb.mass))
+
+    score = arr["pfp_trk_shr_score"]
+    shower = (score < 0.5) & has_lambda
+    counts = ak.to_numpy(ak.sum(shower, axis=1))
+    flat = ak.to_numpy(ak.flatten(shower))
+
+    def showers(branch: str) -> np.ndarray:
+        return ak.to_numpy(ak.flatten(arr[branch]))[flat]
+
+    gamma = four_momentum(
+        showers(branches.shr_energy),
+        np.column_stack([showers(b) for b in branches.shr_dir]),
+        0.0,
+    )
+    p4 = np.repeat(ak.to_numpy(lamb.p4), counts, axis=0)
+    photon = ak.to_numpy(ak.flatten(ak.local_index(score, axis=1)))[flat]
+
+    candidates = ak.zip(
+        {
+            "photon": photon,
+            "mass": invariant_mass(p4, gamma),
+            "angle": opening_angle(p4, gamma),
+        }
+    )
+    return ak.with_field(lamb, ak.unflatten(candidates, counts), "candidates")
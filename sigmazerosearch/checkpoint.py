@@ -0,0 +1,93 @@
+"""
+Checkpointing of long selection runs.
+
+A <project:#Checkpoint> records which chunks of each sample have been applied
+together with the cut-flow state accumulated from them, and is saved to disk
+periodically. Restarting a run with the same checkpoint file restores that
+state and skips the completed chunks, so a failure only loses the work done
+since the last save.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+
+def _write_json(filename: Path, obj) -> None:
+    """Write atomically, so that a crash never leaves a partial file"""
+    tmp = filename.with_name(filename.name + ".tmp")
+    tmp.write_text(json.dumps(obj))
+    os.replace(tmp, filename)
+
+
+class Checkpoint:
+    """
+    Completed `(sample, entry_start, entry_stop)` work units and the state
+    accumulated from them, saved to `filename` at most every `interval`
+    seconds.
+
+    The `key` identifies the inputs of a run, a checkpoint written with a
+    different key (e.g. after editing a cut) is ignored.
+    """
+
+    def __init__(self, filename: Path, key: str, interval: float = 60.0):
+        self.filename: Path = filename
+        self.key: str = key
+        self.interval: float = interval
+        self.done: set[tuple[str, int, int]] = set()
+        self.last: tuple[str, int, int] | None = None
+        """The most recently completed work unit."""
+        self.state: dict | None = None
+        self._saved: float = time.monotonic()
+
+    def load(self) -> dict | None:
+        """Read a matching checkpoint, returning the state it holds"""
+        if not self.filename.is_file():
+            return None
+        saved = json.loads(self.filename.read_text())
+        if saved["key"] != self.key:
+            logging.info("ignoring checkpoint %s of another run", self.filename)
+            return None
+
+        self.done = {(s, a, b) for s, a, b in saved["done"]}
+        self.last = tuple(saved["last"]) if saved["last"] else None  # type: ignore
+        self.state = saved["state"]
+        logging.info(
+            "resuming from checkpoint %s after %d units", self.filename, len(self.done)
+        )
+        return self.state
+
+    def completed(self, sample: str, entry_start: int, entry_stop: int) -> bool:
+        return (sample, entry_start, entry_stop) in self.done
+
+    def update(
+        self,
+        sample: str,
+        entry_start: int,
+        entry_stop: int,
+        state: Callable[[], dict],
+    ) -> None:
+        """
+        Mark a work unit as completed, saving the current `state()` if the
+        last save is older than the interval.
+        """
+        self.done.add((sample, entry_start, entry_stop))
+        self.last = (sample, entry_start, entry_stop)
+        if time.monotonic() - self._saved >= self.interval:
+            self.save(state())
+
+    def save(self, state: dict) -> None:
+        self.state = state
+        _write_json(
+            self.filename,
+            {
+                "key": self.key,
+                "last": self.last,
+                "done": sorted(self.done),
+                "state": state,
+            },
+        )
+        self._saved = time.monotonic()
@@ -0,0 +1,395 @@
+"""
+Command-line entry point for running selections in batch.
+
+`sigmazerosearch run` loads a selection module (a Python file or an importable
+module defining a <project:#Selection>), applies its cut flow headless across a
+pool of worker processes with one work unit per sample file, and writes the
+results to an output directory:
+
+- `cut_summary.txt`: the cut summary table.
+- `cutflow.npz`: the weighted passing, signal and background counts and their
+  sums of w² per sample and cut, with the cut and sample names.
+- `histograms.npz`: the counts, sum of w² and bins of each of the selection's
+  <project:#Histogram>s.
+- `timing.json`: events, wall time and events/s per work unit and in total, and
+  the time spent evaluating each cut.
+- the plots of <project:#Selection.plot_eff_pur>, and of
+  <project:#Selection.plot_efficiency> and <project:#Selection.plot_stack>
+  after the last cut for each efficiency and stacked histogram, saved in the
+  background by the worker processes.
+
+Each finished unit is stored under `units/`, keyed by a fingerprint of the
+sample file and the cut functions, and unfinished units are checkpointed there
+periodically, so that `--resume` only reruns the work that did not finish.
+"""
+
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+import sigmazerosearch.plotting as plotting
+from sigmazerosearch.checkpoint import _write_json
+from sigmazerosearch.histogram import EfficiencyHistogram, StackedHistogram
+from sigmazerosearch.selection import Selection
+
+_SELECTIONS: dict[tuple[str, str | None], Selection] = {}
+_PROGRESS = None
+
+
+def load_selection(module: str, name: str | None = None) -> Selection:
+    """
+    Import `module`, either a path to a Python file or a dotted module name,
+    and return its <project:#Selection> called `name`, or its only one when
+    `name` is not given. Selections are imported once per process.
+    """
+    if (module, name) in _SELECTIONS:
+        return _SELECTIONS[(module, name)]
+
+    if module.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(Path(module).stem, module)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"cannot import selection module {module}")
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+    else:
+        mod = importlib.import_module(module)
+
+    if name is not None:
+        sel = getattr(mod, name)
+        if not isinstance(sel, Selection):
+            raise TypeError(f"{module}:{name} is not a Selection")
+    else:
+        found = [v for v in vars(mod).values() if isinstance(v, Selection)]
+        if len(found) != 1:
+            raise ValueError(
+                f"{module} defines {len(found)} selections, choose one with --selection"
+            )
+        sel = found[0]
+
+    _SELECTIONS[(module, name)] = sel
+    return sel
+
+
+def unit_key(sel: Selection, index: int) -> str | None:
+    """
+    Identify the work unit of one sample by its file and the cuts applied, or
+    `None` if the selection cannot be fingerprinted
+    """
+    return sel._run_key(sel.cuts, [sel.samples[index]])
+
+
+def _init_worker(progress) -> None:
+    global _PROGRESS
+    _PROGRESS = progress
+
+
+def _report(n: int) -> None:
+    if _PROGRESS is not None:
+        _PROGRESS.put(n)
+
+
+def run_unit(
+    module: str,
+    name: str | None,
+    index: int,
+    step: int | None,
+    checkpoint: Path | None = None,
+    overlap: Path | None = None,
+) -> dict:
+    """
+    Apply the cut flow of a selection to its sample `index`, returning the
+    accumulated state of every cut and histogram and the timing of the unit.
+    Progress is saved to and resumed from `checkpoint` if given and the
+    selection can be fingerprinted. The overlap keys are loaded from `overlap`
+    if given, rather than built by streaming every sample.
+    """
+    sel = load_selection(module, name)
+    _set_step(sel, step)
+    sample = sel.samples[index]
+
+    start = time.perf_counter()
+    if sel.overlap is not None and not sel.overlap.keys:
+        if overlap is not None:
+            sel.overlap.load(str(overlap))
+        else:
+            sel.open_files()
+            sel.find_overlaps()
+    if sample.df is None:
+        sample.load_df(sel.config)
+
+    _reset(sel)
+    ckpt = None
+    key = None if checkpoint is None else unit_key(sel, index)
+    if key is not None:
+        ckpt = sel.checkpoint(checkpoint, key, sel.cuts)
+    events = 0
+
+    def progress(n: int):
+        nonlocal events
+        events += n
+        _report(n)
+
+    sel._apply_sample(sample, sel.cuts, sel._results(), progress, ckpt)
+    elapsed = time.perf_counter() - start
+
+    return sel.state(sel.cuts) | {
+        "sample": sample.name,
+        "file": sample.file_name,
+        "events": events,
+        "seconds": elapsed,
+        "pid": os.getpid(),
+        "cut_seconds": [c.seconds for c in sel.cuts],
+    }
+
+
+def _set_step(sel: Selection, step: int | None) -> None:
+    if step is not None:
+        sel.config.iterate, sel.config.iterate_step = True, step
+
+
+def _reset(sel: Selection) -> None:
+    for cut in sel.cuts:
+        cut.reset()
+    for h in sel.histograms.values():
+        h.reset()
+
+
+def _show_progress(units: tuple[int, int], events: int, start: float) -> None:
+    rate = events / max(time.perf_counter() - start, 1e-9)
+    print(
+        f"\r[{units[0]}/{units[1]} units] {events} events, {rate:.0f} events/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    sel = load_selection(args.module, args.selection)
+    _set_step(sel, args.step)
+    output: Path = args.output
+    units_dir = output / "units"
+    units_dir.mkdir(parents=True, exist_ok=True)
+
+    keys = [unit_key(sel, i) for i in range(len(sel.samples))]
+    if None in keys:
+        logging.warning(
+            "the selection cannot be fingerprinted, its units are neither "
+            "checkpointed nor resumed"
+        )
+    results: dict[int, dict] = {}
+    if args.resume:
+        for i, key in enumerate(keys):
+            if key is not None and (units_dir / f"{key}.json").is_file():
+                results[i] = json.loads((units_dir / f"{key}.json").read_text())
+        logging.info("resuming, %d of %d units already done", len(results), len(keys))
+    else:
+        for partial in units_dir.glob("*.partial.json"):
+            partial.unlink()
+    todo = [i for i in range(len(keys)) if i not in results]
+
+    # build the overlap keys once, rather than in every worker
+    overlap = None
+    if todo and sel.overlap is not None:
+        if not sel.overlap.keys:
+            sel.open_files()
+            sel.find_overlaps()
+        overlap = units_dir / "overlap.npz"
+        sel.overlap.save(str(overlap))
+
+    ctx = get_context()
+    progress = ctx.Queue()
+    start = time.perf_counter()
+    events = 0
+    with ProcessPoolExecutor(
+        args.workers, mp_context=ctx, initializer=_init_worker, initargs=(progress,)
+    ) as pool:
+        pending = {
+            pool.submit(
+                run_unit,
+                args.module,
+                args.selection,
+                i,
+                args.step,
+                None if keys[i] is None else units_dir / f"{keys[i]}.partial.json",
+                overlap,
+            ): i
+            for i in todo
+        }
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    events += progress.get_nowait()
+            for future in done:
+                i = pending.pop(future)
+                results[i] = future.result()
+                if keys[i] is not None:
+                    _write_json(units_dir / f"{keys[i]}.json", results[i])
+                    (units_dir / f"{keys[i]}.partial.json").unlink(missing_ok=True)
+            if not args.quiet:
+                _show_progress((len(results), len(keys)), events, start)
+    wall = time.perf_counter() - start
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    _reset(sel)
+    for i in range(len(keys)):
+        for cut, state in zip(sel.cuts, results[i]["cuts"]):
+            cut.merge(state)
+        for k, h in sel.histograms.items():
+            h.merge(results[i]["histograms"][k])
+
+    write_outputs(
+        sel,
+        output,
+        [results[i] for i in range(len(keys))],
+        wall,
+        min(args.workers, len(sel.histograms)),
+    )
+    return 0
+
+
+def write_outputs(
+    sel: Selection,
+    output: Path,
+    results: list[dict],
+    wall: float,
+    plot_workers: int = 0,
+) -> None:
+    """
+    Write the summary, cut flow, timing report and plots of a finished run,
+    saving the plots in `plot_workers` background processes
+    """
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        sel.cut_summary(header=True)
+    (output / "cut_summary.txt").write_text(buf.getvalue())
+
+    counts = np.array(
+        [
+            [
+                [c["n_passing"][0], c["n_signal"][0], c["n_background"][0]]
+                for c in r["cuts"]
+            ]
+            for r in results
+        ]
+    ).reshape(len(results), len(sel.cuts), 3)
+    np.savez(
+        output / "cutflow.npz",
+        cuts=np.array([c.name for c in sel.cuts]),
+        samples=np.array([r["sample"] for r in results]),
+        n_passing=counts[..., 0],
+        n_signal=counts[..., 1],
+        n_background=counts[..., 2],
+        sumw2=np.array([[c["sumw2"] for c in r["cuts"]] for r in results]).reshape(
+            len(results), len(sel.cuts), 3
+        ),
+    )
+
+    np.savez(
+        output / "histograms.npz",
+        **{
+            f"{k}_{field}": getattr(h, field)
+            for k, h in sel.histograms.items()
+            for field in ["bins", "counts", "sumw2"]
+        },
+    )
+
+    events = sum(r["events"] for r in results)
+    _write_json(
+        output / "timing.json",
+        {
+            "units": [
+                {
+                    k: r[k]
+                    for k in [
+                        "sample",
+                        "file",
+                        "events",
+                        "seconds",
+                        "pid",
+                        "cut_seconds",
+                    ]
+                }
+                | {"events_per_second": r["events"] / max(r["seconds"], 1e-9)}
+                for r in results
+            ],
+            "events": events,
+            "wall_seconds": wall,
+            "events_per_second": events / max(wall, 1e-9),
+            "cut_seconds": {
+                c.name: sum(r["cut_seconds"][i] for r in results)
+                for i, c in enumerate(sel.cuts)
+            },
+        },
+    )
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    sel.config.plot_save, sel.config.plot_dir = True, output
+    sel.config.plot_show, sel.config.plot_workers = False, plot_workers
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sel.plot_eff_pur()
+        for k, h in sel.histograms.items():
+            if isinstance(h, EfficiencyHistogram):
+                sel.plot_efficiency(k)
+            elif isinstance(h, StackedHistogram):
+                sel.plot_stack(k)
+    plotting.wait()
+
+
+def _positive_int(value: str) -> int:
+    """An argparse type accepting integers of at least one"""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer {value!r}") from None
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {n}")
+    return n
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="sigmazerosearch", description=__doc__.split("\n\n")[1]
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("run", help="apply the cut flow of a selection module")
+    p.add_argument("module", help="Python file or module defining a Selection")
+    p.add_argument("-s", "--selection", help="name of the Selection in the module")
+    p.add_argument("-o", "--output", type=Path, default=Path("output"))
+    p.add_argument("-j", "--workers", type=_positive_int, default=os.cpu_count() or 1)
+    p.add_argument("--step", type=_positive_int, help="entries read per chunk")
+    p.add_argument(
+        "--resume", action="store_true", help="skip units finished by an earlier run"
+    )
+    p.add_argument("-q", "--quiet", action="store_true", help="hide the progress")
+    p.set_defaults(func=run)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        format="%(asctime)s %(message)s",
+        level=logging.INFO if args.verbose else logging.WARNING,
+    )
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
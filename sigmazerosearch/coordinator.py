@@ -0,0 +1,137 @@
+"""
+Running several selections over one read of their samples.
+
+Comparing a nominal <project:#Selection> with alternative cut lists or
+<project:#ParameterSet>s would otherwise read every sample once per
+selection. A <project:#Coordinator> reads each chunk of the shared samples
+once, with the union of the branches the selections need, and hands it to
+every selection in turn. Each selection keeps its own cuts, histograms and
+checkpoint.
+"""
+
+import dataclasses
+import logging
+
+from sigmazerosearch.checkpoint import Checkpoint
+from sigmazerosearch.derived import chunk_scope
+from sigmazerosearch.general import Config
+from sigmazerosearch.loader import Chunk
+from sigmazerosearch.selection import Selection
+
+_SHARED_OPTIONS = ("iterate", "iterate_step", "dtypes", "cache_dir")
+"""Config options deciding how the samples are read, which must agree."""
+
+
+def _shared_read(chunk: Chunk) -> Chunk:
+    """A copy of `chunk` that reads its entries once, however often it is read"""
+    arr = None
+
+    def read():
+        nonlocal arr
+        if arr is None:
+            arr = chunk.read()
+        return arr
+
+    return Chunk(chunk.entry_start, chunk.entry_stop, read)
+
+
+class Coordinator:
+    """
+    Selections over the same samples, applied together by
+    <project:#Coordinator.apply_cut>.
+
+    The selections must agree on how the samples are read and chunked, i.e.
+    on `iterate`, `iterate_step`, `dtypes` and `cache_dir`. Samples are matched
+    by their file names, so the selections may hold separate but equivalent
+    <project:#SampleSet>s.
+    """
+
+    def __init__(self, *selections: Selection):
+        if not selections:
+            raise ValueError("a coordinator needs at least one selection")
+        files = [s.file_name for s in selections[0].samples]
+        cuts: set[int] = set()
+        for sel in selections:
+            if [s.file_name for s in sel.samples] != files:
+                raise ValueError("all selections must use the same samples")
+            if cuts & {id(c) for c in sel.cuts}:
+                raise ValueError("selections must not share Cut objects")
+            cuts |= {id(c) for c in sel.cuts}
+        # the samples are chunked once for all, while every checkpoint is
+        # keyed on its own selection's chunking
+        first = selections[0].config
+        for sel in selections[1:]:
+            for option in _SHARED_OPTIONS:
+                if getattr(sel.config, option) != getattr(first, option):
+                    raise ValueError(f"all selections must use the same {option}")
+
+        self.selections: tuple[Selection, ...] = selections
+        self.config: Config = self._union_config()
+
+    def _union_config(self) -> Config:
+        """The first selection's config, reading the branches all need"""
+        branch_lists = [sel.config.branch_list for sel in self.selections]
+        if any(b is None for b in branch_lists):
+            branches = None
+        else:
+            branches = sorted(set().union(*branch_lists))  # type: ignore
+        return dataclasses.replace(self.selections[0].config, branch_list=branches)
+
+    def open_files(self) -> None:
+        """Open the samples once, sharing them between the selections"""
+        first = self.selections[0]
+        for sample in first.samples:
+            sample.load_df(self.config)
+        for sel in self.selections[1:]:
+            for sample, opened in zip(sel.samples, first.samples):
+                sample.df, sample.cache = opened.df, opened.cache
+
+    def close_files(self) -> None:
+        for sel in self.selections:
+            sel.close_files()
+
+    def apply_cut(self) -> None:
+        """
+        Apply the cuts of every selection, reading each chunk of each sample
+        once. Chunks already completed according to a selection's checkpoint
+        are only read for the other selections.
+        """
+        checkpoints: list[Checkpoint | None] = []
+        for sel in self.selections:
+            if sel.overlap is not None and not sel.overlap.keys:
+                sel.find_overlaps()
+            checkpoints.append(
+                None
+                if sel.config.checkpoint is None
+                else sel.checkpoint(
+                    sel.config.checkpoint, sel._run_key(sel.cuts, sel.samples), sel.cuts
+                )
+            )
+        results = [sel._results() for sel in self.selections]
+
+        first = self.selections[0]
+        for i, sample in enumerate(first.samples):
+            for chunk in first._chunks(sample, [], self.config):
+                chunk = _shared_read(chunk)
+                # derived quantities of the chunk are shared by all selections
+                with chunk_scope():
+                    self._apply_chunk(i, chunk, checkpoints, results)
+            logging.info(
+                "applied %d selections to sample %s", len(self.selections), sample.name
+            )
+
+        for sel, checkpoint in zip(self.selections, checkpoints):
+            if checkpoint is not None:
+                checkpoint.save(sel.state(sel.cuts))
+
+    def _apply_chunk(self, i: int, chunk: Chunk, checkpoints, results) -> None:
+        """Apply every selection to one chunk of the `i`-th sample"""
+        for sel, checkpoint, cache in zip(self.selections, checkpoints, results):
+            s = sel.samples[i]
+            unit = (s.name, chunk.entry_start, chunk.entry_stop)
+            if checkpoint is not None and checkpoint.completed(*unit):
+                continue
+            scale = sel.samples.target_POT / s.POT
+            sel._apply_chunk(s, chunk, sel.cuts, scale, cache)
+            if checkpoint is not None:
+                checkpoint.update(*unit, lambda: sel.state(sel.cuts))
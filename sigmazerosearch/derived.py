@@ -0,0 +1,83 @@
+"""
+Per-chunk memoisation of derived quantities.
+
+Cuts, categories and algorithms compute the same derived columns of a chunk
+again and again, e.g. the number of tracks per event, the displacement of
+tracks from the primary vertex or <project:#signal_def>. Functions decorated
+with <project:#derived> are computed once per chunk and argument values while
+a <project:#chunk_scope> is active, and the results are evicted when the scope
+ends. Outside of a scope they are simply called.
+
+<project:#Selection.apply_cut> opens a scope around every chunk, so any
+derived quantity used by several cuts, histograms or weights of a chunk is
+computed only once:
+
+```python
+@derived
+def n_tracks(arr):
+    return ak.sum(arr["pfp_trk_shr_score"] > 0.5, axis=1)
+```
+"""
+
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import awkward as ak
+
+_CACHE: dict[tuple, tuple[ak.Array, Any]] | None = None
+"""Derived quantities of the current chunk, `None` outside of a scope."""
+
+
+@contextmanager
+def chunk_scope() -> Iterator[None]:
+    """
+    Memoise derived quantities until the end of the block. Nested scopes share
+    the outermost one, so that e.g. several selections applied to the same
+    chunk share its quantities.
+    """
+    global _CACHE
+    if _CACHE is not None:
+        yield
+        return
+
+    _CACHE = {}
+    try:
+        yield
+    finally:
+        _CACHE = None
+
+
+def derived(func: Callable | None = None, *, name: str | None = None):
+    """
+    Memoise `func(arr, *args)` per array and hashable argument values within a
+    <project:#chunk_scope>, under `name` (by default the function's qualified
+    name). Calls with unhashable arguments are passed through unmemoised.
+    """
+    if func is None:
+        return functools.partial(derived, name=name)
+    key_name = name if name is not None else f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(arr, *args, **kwargs):
+        if _CACHE is None:
+            return func(arr, *args, **kwargs)
+        key = (key_name, id(arr), args, tuple(sorted(kwargs.items())))
+        try:
+            hit = _CACHE.get(key)
+        except TypeError:
+            # unhashable arguments, e.g. a list of parameters: not memoised
+            return func(arr, *args, **kwargs)
+        # the array is kept alive by the cache, so its id cannot be reused
+        if hit is not None and hit[0] is arr:
+            return hit[1]
+        value = func(arr, *args, **kwargs)
+        _CACHE[key] = (arr, value)
+        return value
+
+    return wrapper
+
+
+def cached() -> int:
+    """Number of derived quantities held by the current scope"""
+    return 0 if _CACHE is None else len(_CACHE)
@@ -0,0 +1,228 @@
+"""
+Export of per-PFP and per-pair features, e.g. for training the BDT of
+<project:#select_p_pi_candidates>.
+
+<project:#export_features> reads a sample chunk by chunk and turns the jagged
+PFP variables of every chunk into rows of a flat float32 matrix, one row per
+PFP or per ordered pair of PFPs of an event, together with their
+`pfp_true_pdg` labels and the packed run/subrun/event key of their event (see
+<project:#pack_rse>). The rows are appended to the output as they are built,
+so the output may be far larger than memory:
+
+- `.npy`: the features, readable as a memory map with
+  `np.load(filename, mmap_mode="r")`, next to `<stem>.labels.npy` and
+  `<stem>.event.npy`.
+- `.parquet`: one table with a float32 column per feature, the labels and the
+  event keys, with one row group per chunk.
+"""
+
+import logging
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.index import pack_rse
+from sigmazerosearch.loader import _ttree_chunks
+from sigmazerosearch.utils import displacement
+
+if TYPE_CHECKING:
+    from uproot.behaviors.TBranch import HasBranches
+
+Feature = Callable[[ak.Array], ak.Array]
+
+
+def _branch(name: str) -> Feature:
+    return lambda arr: arr[name]
+
+
+def _displacement(arr: ak.Array) -> ak.Array:
+    d = displacement(arr, "trk_start_x", "trk_start_y", "trk_start_z")
+    return ak.fill_none(d, [], axis=0)
+
+
+PFP_FEATURES: dict[str, Feature] = {
+    "pfp_trk_shr_score": _branch("pfp_trk_shr_score"),
+    "trk_llrpid": _branch("trk_llrpid"),
+    "trk_length": _branch("trk_length"),
+    "trk_start_x": _branch("trk_start_x"),
+    "trk_start_y": _branch("trk_start_y"),
+    "trk_start_z": _branch("trk_start_z"),
+    "trk_three_plane_mean_dedx": _branch("trk_three_plane_mean_dedx"),
+    "trk_displacement": _displacement,
+}
+"""The default per-PFP features, computed from a chunk as jagged arrays."""
+
+_NPY_HEADER = 256
+"""Bytes reserved for the header of a `.npy` file, which holds any shape."""
+
+
+class _NpyAppender:
+    """
+    A `.npy` file of `width` columns of `dtype` written block by block, whose
+    header is rewritten with the final number of rows on closing.
+    """
+
+    def __init__(self, filename: Path, dtype, width: int | None):
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.rows = 0
+        self.fp = open(filename, "wb")
+        self._header()
+
+    def _header(self) -> None:
+        shape = (self.rows,) if self.width is None else (self.rows, self.width)
+        text = (
+            f"{{'descr': {self.dtype.str!r}, 'fortran_order': False, "
+            f"'shape': {shape!r}, }}"
+        )
+        text = text.ljust(_NPY_HEADER - 10 - 1) + "\n"
+        self.fp.seek(0)
+        self.fp.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)))
+        self.fp.write(text.encode("latin1"))
+        self.fp.seek(0, 2)
+
+    def append(self, block: np.ndarray) -> None:
+        self.fp.write(np.ascontiguousarray(block, dtype=self.dtype).tobytes())
+        self.rows += len(block)
+
+    def close(self) -> None:
+        self._header()
+        self.fp.close()
+
+
+class FeatureWriter:
+    """
+    Appends blocks of feature rows, labels and event keys to a `.npy` or
+    `.parquet` file, see the module documentation.
+    """
+
+    def __init__(self, filename: str | Path, columns: list[str], labels: list[str]):
+        self.filename = Path(filename)
+        self.columns = columns
+        self.labels = labels
+        self.rows = 0
+        self._writer = None
+        self._files: list[_NpyAppender] = []
+        if self.filename.suffix == ".npy":
+            stem = self.filename.with_suffix("")
+            self._files = [
+                _NpyAppender(self.filename, np.float32, len(columns)),
+                _NpyAppender(Path(f"{stem}.labels.npy"), np.int32, len(labels)),
+                _NpyAppender(Path(f"{stem}.event.npy"), np.uint64, None),
+            ]
+        elif self.filename.suffix != ".parquet":
+            raise ValueError(f"cannot write features to {self.filename}")
+
+    def append(self, X: np.ndarray, labels: np.ndarray, event: np.ndarray) -> None:
+        self.rows += len(X)
+        if self._files:
+            for f, block in zip(self._files, (X, labels, event)):
+                f.append(block)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            {c: X[:, i].astype(np.float32) for i, c in enumerate(self.columns)}
+            | {c: labels[:, i].astype(np.int32) for i, c in enumerate(self.labels)}
+            | {"event": event.astype(np.uint64)}
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.filename, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        for f in self._files:
+            f.close()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self) -> "FeatureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def pfp_rows(
+    arr: ak.Array, features: dict[str, Feature]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The float32 feature matrix of every PFP of a chunk, with its
+    `pfp_true_pdg` label and the key of its event
+    """
+    counts = ak.to_numpy(ak.num(arr["pfp_true_pdg"], axis=1))
+    X = np.empty((int(counts.sum()), len(features)), dtype=np.float32)
+    for i, f in enumerate(features.values()):
+        X[:, i] = ak.to_numpy(ak.flatten(f(arr)))
+    labels = ak.to_numpy(ak.flatten(arr["pfp_true_pdg"]))[:, None]
+    event = np.repeat(pack_rse(arr["run"], arr["subrun"], arr["event"]), counts)
+    return X, labels, event
+
+
+def pair_rows(
+    arr: ak.Array, features: dict[str, Feature]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The features of both PFPs of every ordered pair of distinct PFPs of an
+    event, followed by the separation of their track starts, with the labels
+    of both PFPs and the key of their event
+    """
+    X, labels, event = pfp_rows(arr, features)
+    counts = ak.to_numpy(ak.num(arr["pfp_true_pdg"], axis=1))
+
+    # indices of both PFPs of each pair into the flat PFP rows
+    local = ak.local_index(arr["pfp_true_pdg"], axis=1)
+    i, j = ak.unzip(ak.argcartesian([local, local], axis=1))
+    distinct = i != j
+    n_pairs = ak.to_numpy(ak.sum(distinct, axis=1))
+    offset = np.repeat(np.cumsum(counts) - counts, n_pairs)
+    i = ak.to_numpy(ak.flatten(i[distinct])) + offset
+    j = ak.to_numpy(ak.flatten(j[distinct])) + offset
+
+    start = np.column_stack(
+        [ak.to_numpy(ak.flatten(arr[f"trk_start_{c}"])) for c in "xyz"]
+    )
+    separation = np.linalg.norm(start[i] - start[j], axis=1).astype(np.float32)
+    return (
+        np.column_stack((X[i], X[j], separation)),
+        np.column_stack((labels[i, 0], labels[j, 0])),
+        event[i],
+    )
+
+
+def export_features(
+    tree: "HasBranches",
+    filename: str | Path,
+    config: Config,
+    pairs: bool = False,
+    features: dict[str, Feature] | None = None,
+    select: Callable[[ak.Array], ak.Array] | None = None,
+) -> int:
+    """
+    Stream the per-PFP (or with `pairs`, per-pair) features of the events of
+    `tree` passing `select` to `filename`, chunked following `config`.
+    Returns the number of rows written.
+    """
+    features = PFP_FEATURES if features is None else features
+    if pairs:
+        columns = [f"{c}_{k}" for k in (1, 2) for c in features] + ["separation"]
+        labels = ["pfp_true_pdg_1", "pfp_true_pdg_2"]
+    else:
+        columns, labels = list(features), ["pfp_true_pdg"]
+
+    branches = list(config.branch_list) if config.branch_list else None
+    with FeatureWriter(filename, columns, labels) as writer:
+        for chunk in _ttree_chunks(tree, config, branches):
+            arr = chunk.read()
+            if select is not None:
+                arr = arr[ak.to_numpy(ak.fill_none(select(arr), False))]
+            writer.append(*(pair_rows if pairs else pfp_rows)(arr, features))
+    logging.info("exported %d rows of features to %s", writer.rows, filename)
+    return writer.rows
@@ -0,0 +1,220 @@
+"""
+Fingerprinting of cut functions and caching of their per-event results.
+
+A fingerprint digests the bytecode of a function together with everything it
+captures: closure cells, default arguments and the module globals it refers to
+(e.g. a <project:#ParameterSet>), recursing into other functions it calls.
+Editing a cut lambda or changing one parameter therefore changes only the
+fingerprints of the affected cuts, so the results of the others can be reused.
+
+Functions reached through a module attribute (e.g. `utils.npfp`) are only
+identified by name, edits to them are not detected.
+
+Values whose content cannot be digested reliably, such as instances of
+arbitrary classes, raise <project:#Unfingerprintable> rather than being
+identified by their `repr`, which may be truncated or differ between runs.
+Classes can opt in by defining a `__fingerprint__` method returning a value
+that identifies the instance.
+"""
+
+import dataclasses
+import enum
+import functools
+import hashlib
+import operator
+import os
+import types
+from collections import OrderedDict
+from pathlib import Path
+
+import awkward as ak
+import numpy as np
+
+_MAX_DEPTH = 8
+
+_PLAIN = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    range,
+    type(Ellipsis),
+    operator.itemgetter,
+    operator.attrgetter,
+    operator.methodcaller,
+)
+"""Types identified by their `repr`, which shows their whole value."""
+
+
+class Unfingerprintable(TypeError):
+    """A value whose changes a fingerprint cannot reliably detect"""
+
+
+def _code_names(code: types.CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _update(h, obj, depth: int, seen: set[int]) -> None:
+    if isinstance(obj, types.FunctionType):
+        h.update(f"function:{obj.__module__}.{obj.__qualname__}".encode())
+        if depth > _MAX_DEPTH or id(obj) in seen:
+            return
+        seen.add(id(obj))
+        _update(h, obj.__code__, depth, seen)
+        _update(h, obj.__defaults__, depth, seen)
+        _update(h, obj.__kwdefaults__, depth, seen)
+        for cell in obj.__closure__ or ():
+            try:
+                _update(h, cell.cell_contents, depth + 1, seen)
+            except ValueError:  # empty cell
+                h.update(b"<empty>")
+        for name in sorted(_code_names(obj.__code__)):
+            if name in obj.__globals__:
+                h.update(name.encode())
+                _update(h, obj.__globals__[name], depth + 1, seen)
+    elif isinstance(obj, types.CodeType):
+        h.update(obj.co_code)
+        h.update(repr(obj.co_names).encode())
+        for const in obj.co_consts:
+            _update(h, const, depth, seen)
+    elif isinstance(obj, types.MethodType):
+        _update(h, obj.__func__, depth, seen)
+        _update(h, obj.__self__, depth + 1, seen)
+    elif isinstance(obj, functools.partial):
+        _update(h, obj.func, depth, seen)
+        _update(h, obj.args, depth, seen)
+        _update(h, obj.keywords, depth, seen)
+    elif isinstance(obj, types.ModuleType):
+        h.update(f"module:{obj.__name__}".encode())
+    elif isinstance(obj, (type, types.BuiltinFunctionType, types.MethodDescriptorType)):
+        h.update(f"{getattr(obj, '__module__', '')}.{obj.__qualname__}".encode())
+    elif isinstance(obj, enum.Enum):
+        h.update(f"enum:{type(obj).__qualname__}.{obj.name}".encode())
+    elif isinstance(obj, _PLAIN + (np.generic, np.dtype, np.ufunc)):
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    elif isinstance(obj, Path):
+        h.update(f"path:{obj}".encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"ndarray:{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, ak.Array):
+        form, length, container = ak.to_buffers(obj)
+        h.update(f"ak.Array:{length}:{form.to_json()}".encode())
+        for key, buf in container.items():
+            h.update(key.encode())
+            h.update(np.ascontiguousarray(buf).tobytes())
+    elif isinstance(obj, (set, frozenset)):
+        # element order depends on hashing, which may change between runs
+        h.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for digest in sorted(fingerprint(x) for x in obj):
+            h.update(digest.encode())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for x in obj:
+            _update(h, x, depth, seen)
+    elif isinstance(obj, dict):
+        h.update(f"dict:{len(obj)}".encode())
+        for k, v in obj.items():
+            h.update(repr(k).encode())
+            _update(h, v, depth, seen)
+    elif dataclasses.is_dataclass(obj):
+        _update(h, type(obj), depth, seen)
+        _update(h, dataclasses.asdict(obj), depth, seen)
+    elif hasattr(obj, "cutfunc"):
+        # a Cut used within another cut function
+        _update(h, obj.cutfunc, depth + 1, seen)
+    elif hasattr(obj, "__fingerprint__"):
+        h.update(f"{type(obj).__module__}.{type(obj).__qualname__}".encode())
+        _update(h, obj.__fingerprint__(), depth + 1, seen)
+    else:
+        raise Unfingerprintable(f"cannot fingerprint {type(obj).__qualname__} objects")
+
+
+def fingerprint(*objs) -> str:
+    """
+    Digest functions and values into a hex string that changes whenever the
+    code or any captured value changes.
+    """
+    h = hashlib.sha256()
+    for obj in objs:
+        _update(h, obj, 0, set())
+    return h.hexdigest()[:32]
+
+
+def cache_name(*objs) -> str | None:
+    """The <project:#fingerprint> of `objs`, or `None` if they have none"""
+    try:
+        return fingerprint(*objs)
+    except Unfingerprintable:
+        return None
+
+
+def file_identity(filename: str) -> str:
+    """Identify a file by its absolute path, size and modification time"""
+    st = os.stat(filename)
+    return fingerprint(os.path.abspath(filename), st.st_size, st.st_mtime_ns)
+
+
+class ResultCache:
+    """
+    Per-event results of fingerprinted functions over chunks of sample files,
+    kept in memory and, when a directory is given, as `.npy` files on disk.
+
+    At most `max_bytes` of results are kept in memory, evicting the least
+    recently used ones; larger results are only kept on disk.
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = 1 << 30):
+        self.directory: Path | None = directory
+        self.max_bytes: int = max_bytes
+        self._memory: OrderedDict[tuple[str, int, int, str], np.ndarray] = OrderedDict()
+        self._bytes: int = 0
+
+    def _path(self, file_id: str, start: int, stop: int, name: str) -> Path:
+        return self.directory / file_id / f"{start}-{stop}" / f"{name}.npy"  # type: ignore
+
+    def get(self, file_id: str, start: int, stop: int, name: str) -> np.ndarray | None:
+        key = (file_id, start, stop, name)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.directory is not None and self._path(*key).is_file():
+            value = np.load(self._path(*key))
+            self._remember(key, value)
+            return value
+
+        return None
+
+    def put(self, file_id: str, start: int, stop: int, name: str, value: np.ndarray):
+        key = (file_id, start, stop, name)
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(*key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(path, value)
+
+    def _remember(self, key: tuple[str, int, int, str], value: np.ndarray) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        if value.nbytes > self.max_bytes:
+            return
+        self._memory[key] = value
+        self._bytes += value.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+_MEMORY = ResultCache(max_bytes=256 << 20)
+"""Process-wide cache used when no cache directory is configured."""
@@ -19,10 +19,42 @@ class Config:
     plot_save: bool = False
     plot_dir: Path | None = None
     plot_format: str | Iterable[str] = "png"
+    plot_show: bool = False
+    """
+    Also show every figure, blocking until it is closed, rather than only
+    returning it.
+    """
+    plot_workers: int = 0
+    """
+    Number of processes saving figures in the background, 0 to save them
+    before the plotting method returns, see `plotting.wait`.
+    """
     perf_percent: bool = False
     branch_list: Iterable[str] | None = None
     iterate: bool = False
     iterate_step: int | str | None = None
+    cache_dir: Path | None = None
+    """Directory to keep Parquet caches of the sample ntuples in."""
+    incremental: bool = False
+    """Reuse the cached per-event results of cuts that have not changed."""
+    checkpoint: Path | None = None
+    """File the partial cut flow is periodically saved to and resumed from."""
+    checkpoint_interval: float = 60.0
+    """Minimum number of seconds between checkpoints."""
+    plan_chunks: int = 0
+    """
+    Number of chunks on which the cost and rejection of every cut are measured
+    before planning which cuts to evaluate only on the events passing the
+    ones before them, 0 to evaluate every cut on every event. Not used
+    together with `incremental`.
+    """
+    dtypes: dict[str, str] | None = None
+    """
+    Types the branches of every chunk are converted to when read, as a mapping
+    of branch name patterns to NumPy type names, e.g.
+    <project:#COMPACT_DTYPES>. Check a policy with
+    <project:#Selection.check_dtypes> before using it.
+    """
 
     def __post_init__(self):
         self.validate()
@@ -44,6 +76,12 @@ class Config:
         if self.plot_dir is not None and not self.plot_dir.is_dir():
             raise ValueError("plot_dir should be a path to a directory")
 
+        if self.plot_workers < 0:
+            raise ValueError("plot_workers should not be negative")
+
+        if self.cache_dir is not None and not self.cache_dir.is_dir():
+            raise ValueError("cache_dir should be a path to a directory")
+
         if self.iterate and self.iterate_step is None:
             raise ValueError("iterate should be set with iterate_step")
 
@@ -51,6 +89,34 @@ class Config:
             raise ValueError("iterate should be set with iterate_step")
 
 
+@dataclass(frozen=True)
+class ParameterSet:
+    """
+    Wraps all selection parameter values.
+
+    All parameters are required even if only a subset of selection cuts are
+    chosen.
+    """
+
+    max_separation: float
+    """Units: cm"""
+    min_length: float
+    """Units: cm"""
+    pid_cut: float
+    proton_pid_cut: float
+    pion_pid_cut: float
+    separation_cut: float
+    """Units: cm"""
+    w_lambda_min: float
+    """Units: GeV"""
+    w_lambda_max: float
+    """Units: GeV"""
+
+    @staticmethod
+    def from_dict(kwargs):
+        return ParameterSet(**kwargs)
+
+
 class PDG(IntEnum):
     """
     Enum representing the PDG codes relevant to the analysis.
@@ -74,10 +140,7 @@ class PDG(IntEnum):
     @property
     def anti(self) -> int:
         """Gets the anti-particle pdg code value excluding neutral particles"""
-        neutrals = [PDG.Lambda, PDG.Neutron, PDG.Photon] + [
-            x for x in PDG if x.name.endswith("0")
-        ]
-        if self in neutrals:
+        if self in _SELF_CONJUGATE:
             return self.value
         return self.value.__neg__()
 
@@ -86,3 +149,9 @@ class PDG(IntEnum):
 
     def __neg__(self):
         return self.anti
+
+
+_SELF_CONJUGATE = frozenset(
+    [PDG.Lambda, PDG.Neutron, PDG.Photon] + [x for x in PDG if x.name.endswith("0")]
+)
+"""The particles <project:#PDG.anti> treats as their own antiparticle."""
@@ -0,0 +1,155 @@
+"""
+Histograms accumulated during the cut-flow pass.
+
+Histograms are filled chunk by chunk alongside the cut counters in
+<project:#Selection.apply_cut>, so that distributions at every cut level are
+available without reading the samples again. An
+<project:#EfficiencyHistogram> counts only the signal events, giving the
+efficiency of every cut as a function of a truth variable, and a
+<project:#StackedHistogram> splits the events by sample type and event
+category for the stacked data/MC comparison.
+"""
+
+from typing import Callable
+
+import awkward as ak
+import numpy as np
+
+
+class Histogram:
+    """
+    Weighted counts of a per-event variable in fixed bins at every cut level
+    of a selection.
+
+    Row `i` of `counts` holds the events passing the first `i` cuts, so row 0
+    holds every event before any cut. As with `np.histogram` the last bin
+    includes its upper edge; values outside the bins, or missing, are dropped.
+    """
+
+    signal_only: bool = False
+    """Whether only the signal events of hyperon samples are counted."""
+
+    by_group: bool = False
+    """Whether the events are split into groups, see <project:#StackedHistogram>."""
+
+    def __init__(
+        self, func: Callable[[ak.Array], ak.Array], bins, label: str | None = None
+    ):
+        self.func: Callable[[ak.Array], ak.Array] = func
+        self.bins: np.ndarray = np.asarray(bins, dtype=float)
+        self.label: str | None = label
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the accumulated counts"""
+        self.counts: np.ndarray = np.zeros((0, len(self.bins) - 1))
+        self.sumw2: np.ndarray = np.zeros((0, len(self.bins) - 1))
+
+    def fill(self, values, level, w, n_levels: int) -> None:
+        """
+        Add a chunk of events with `values` of the variable, each passing the
+        first `level` cuts and weighted by `w` (a single value or one per
+        event), out of `n_levels` cut levels including the one before any cut.
+        """
+        level = np.asarray(level, dtype=np.intp)
+        b, ok = self._bin(values)
+        nb = len(self.bins) - 1
+        self._accumulate(level[ok] * nb + b[ok], w, ok, (n_levels, nb))
+
+    def _bin(self, values) -> tuple[np.ndarray, np.ndarray]:
+        """The bin of each value, and whether it falls in one"""
+        values = np.asarray(values, dtype=float)
+        nb = len(self.bins) - 1
+        b = np.searchsorted(self.bins, values, side="right") - 1
+        b[values == self.bins[-1]] = nb - 1
+        return b, (b >= 0) & (b < nb)
+
+    def _accumulate(self, flat, w, ok: np.ndarray, shape: tuple[int, ...]) -> None:
+        """
+        Add the weights `w` of the events selected by `ok` to the flat indices
+        `flat` of a `shape` array whose first axis is the cut level
+        """
+        w = np.broadcast_to(np.asarray(w, dtype=float), ok.shape)[ok]
+        size = int(np.prod(shape))
+        counts = np.bincount(flat, weights=w, minlength=size).reshape(shape)
+        sumw2 = np.bincount(flat, weights=w**2, minlength=size).reshape(shape)
+        # an event passing `level` cuts counts at every level up to its own
+        self._add(
+            np.cumsum(counts[::-1], axis=0)[::-1],
+            np.cumsum(sumw2[::-1], axis=0)[::-1],
+        )
+
+    def _add(self, counts: np.ndarray, sumw2: np.ndarray) -> None:
+        if len(self.counts) == 0:
+            self.counts = np.zeros_like(counts)
+            self.sumw2 = np.zeros_like(sumw2)
+        self.counts += counts
+        self.sumw2 += sumw2
+
+    def state(self) -> dict[str, list]:
+        """The accumulated counts, in a form that can be stored as JSON"""
+        return {"counts": self.counts.tolist(), "sumw2": self.sumw2.tolist()}
+
+    def merge(self, state: dict[str, list]) -> None:
+        """Add counts accumulated elsewhere, e.g. by another process"""
+        if len(state["counts"]):
+            self._add(np.asarray(state["counts"]), np.asarray(state["sumw2"]))
+
+    def errors(self) -> np.ndarray:
+        """Statistical error on each bin, the square root of the sum of w²"""
+        return np.sqrt(self.sumw2)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} label={self.label} bins={len(self.bins) - 1} levels={len(self.counts)}>"
+
+
+class EfficiencyHistogram(Histogram):
+    """
+    A <project:#Histogram> of the signal events only, as defined by
+    <project:#signal_def>, so that row 0 holds the denominator of the
+    efficiency and row `i` its numerator after the first `i` cuts, matching
+    <project:#Cut.eff> when summed over the bins.
+    """
+
+    signal_only = True
+
+    def efficiency(self) -> np.ndarray:
+        """The `(cuts, bins)` efficiency after each cut, NaN in empty bins"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.counts[1:] / self.counts[0]
+
+    def efficiency_errors(self) -> np.ndarray:
+        """
+        Statistical error on each efficiency, treating the passing and failing
+        events as independent weighted sums
+        """
+        eff = self.efficiency()
+        passed, failed = self.sumw2[1:], self.sumw2[0] - self.sumw2[1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(passed * (1 - eff) ** 2 + failed * eff**2) / self.counts[0]
+
+
+class StackedHistogram(Histogram):
+    """
+    A <project:#Histogram> split into groups of events, so that `counts` has
+    the shape `(levels, groups, bins)`.
+
+    <project:#Selection.apply_cut> groups the events by the type of their
+    sample and, for simulated neutrino samples, by their
+    <project:#EventCategory>; <project:#Selection.stack> sums the groups into
+    the components of a stacked data/MC plot.
+    """
+
+    by_group = True
+
+    def fill(self, values, level, w, n_levels: int, group=0, n_groups: int = 1) -> None:
+        """
+        Add a chunk of events as <project:#Histogram.fill> does, each in the
+        `group` out of `n_groups` given per event or for the whole chunk
+        """
+        level = np.asarray(level, dtype=np.intp)
+        b, ok = self._bin(values)
+        group = np.broadcast_to(np.asarray(group, dtype=np.intp), ok.shape)
+        nb = len(self.bins) - 1
+        flat = (level[ok] * n_groups + group[ok]) * nb + b[ok]
+        self._accumulate(flat, w, ok, (n_levels, n_groups, nb))
@@ -0,0 +1,159 @@
+"""
+Run/subrun/event (RSE) indexing of samples.
+
+Each event is identified by its `run`, `subrun` and `event` numbers which are
+packed into a single 64-bit key. Keeping the keys of a sample sorted alongside
+their entry numbers allows single events to be found by binary search and long
+lists of events to be matched against a sample in one vectorised pass.
+"""
+
+from typing import TYPE_CHECKING
+
+import awkward as ak
+import numpy as np
+
+if TYPE_CHECKING:
+    from uproot.behaviors.TBranch import HasBranches
+
+RUN_BITS = 18
+SUBRUN_BITS = 18
+EVENT_BITS = 28
+
+
+def _check_bits(values: np.ndarray, bits: int, name: str) -> None:
+    if np.any(values < 0) or np.any(values >= 1 << bits):
+        raise ValueError(f"{name} numbers must fit in {bits} unsigned bits")
+
+
+def pack_rse(run, subrun, event) -> np.ndarray:
+    """
+    Pack scalar or array-like run, subrun and event numbers into unsigned
+    64-bit keys that sort in the same order as the `(run, subrun, event)`
+    tuples.
+    """
+    run, subrun, event = (np.asarray(x, dtype=np.int64) for x in (run, subrun, event))
+    _check_bits(run, RUN_BITS, "run")
+    _check_bits(subrun, SUBRUN_BITS, "subrun")
+    _check_bits(event, EVENT_BITS, "event")
+
+    return (
+        (run.astype(np.uint64) << np.uint64(SUBRUN_BITS + EVENT_BITS))
+        | (subrun.astype(np.uint64) << np.uint64(EVENT_BITS))
+        | event.astype(np.uint64)
+    )
+
+
+def unpack_rse(keys) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Invert <project:#pack_rse>, returning the run, subrun and event arrays"""
+    keys = np.asarray(keys, dtype=np.uint64)
+    run = keys >> np.uint64(SUBRUN_BITS + EVENT_BITS)
+    subrun = (keys >> np.uint64(EVENT_BITS)) & np.uint64((1 << SUBRUN_BITS) - 1)
+    event = keys & np.uint64((1 << EVENT_BITS) - 1)
+
+    return run.astype(np.int64), subrun.astype(np.int64), event.astype(np.int64)
+
+
+def entry_ranges(entries: np.ndarray, gap: int = 0) -> list[tuple[int, int]]:
+    """
+    Merge sorted entry numbers into `(entry_start, entry_stop)` ranges, joining
+    neighbouring entries that are at most `gap` entries apart.
+    """
+    if len(entries) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(entries) > gap + 1)
+    starts = np.concatenate(([entries[0]], entries[breaks + 1]))
+    stops = np.concatenate((entries[breaks], [entries[-1]])) + 1
+
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+class RSEIndex:
+    """Sorted packed RSE keys mapped to the entry numbers of a TTree."""
+
+    def __init__(self, keys: np.ndarray, entries: np.ndarray):
+        self.keys: np.ndarray = keys
+        self.entries: np.ndarray = entries
+
+    @classmethod
+    def from_tree(cls, tree: "HasBranches") -> "RSEIndex":
+        """Build an index by reading only the `run`, `subrun`, `event` branches"""
+        rse = tree.arrays(["run", "subrun", "event"], library="np")  # type: ignore
+        keys = pack_rse(rse["run"], rse["subrun"], rse["event"])
+        order = np.argsort(keys, kind="stable")
+
+        return cls(keys[order], order.astype(np.int64))
+
+    @classmethod
+    def load(cls, filename: str) -> "RSEIndex":
+        with np.load(filename) as fd:
+            return cls(fd["keys"], fd["entries"])
+
+    def save(self, filename: str) -> None:
+        with open(filename, "wb") as fd:
+            np.savez(fd, keys=self.keys, entries=self.entries)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, run: int, subrun: int, event: int) -> int | None:
+        """Return the (first) entry number of a single event, if present"""
+        key = pack_rse(run, subrun, event)
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.entries[i])
+
+        return None
+
+    def find(self, run, subrun, event) -> np.ndarray:
+        """
+        Return the sorted entry numbers of every indexed event matching the
+        given arrays of run, subrun and event numbers. Events absent from the
+        index are ignored.
+        """
+        keys = np.unique(pack_rse(run, subrun, event))
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+
+        # expand each [lo, hi) slice, covering events duplicated in the sample
+        counts = hi - lo
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+
+        return np.sort(self.entries[np.repeat(lo, counts) + offsets])
+
+    def contains(self, run, subrun, event) -> np.ndarray:
+        """Return a boolean array marking which of the given events are indexed"""
+        keys = np.atleast_1d(pack_rse(run, subrun, event))
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        i = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+
+        return self.keys[i] == keys
+
+    def read(
+        self,
+        tree: "HasBranches",
+        run,
+        subrun,
+        event,
+        branches: list[str] | None = None,
+        gap: int = 1000,
+    ) -> ak.Array:
+        """
+        Read only the given events from `tree`, in entry order.
+
+        Requested entries closer than `gap` entries are read as one range and
+        filtered afterwards, trading some over-reading for fewer requests.
+        """
+        entries = self.find(run, subrun, event)
+        if len(entries) == 0:
+            return tree.arrays(branches, entry_start=0, entry_stop=0)  # type: ignore
+
+        chunks = []
+        for start, stop in entry_ranges(entries, gap):
+            arr = tree.arrays(branches, entry_start=start, entry_stop=stop)  # type: ignore
+            wanted = entries[(entries >= start) & (entries < stop)]
+            chunks.append(arr[wanted - start])
+
+        return ak.concatenate(chunks)
@@ -5,28 +5,262 @@ Currently ROOT NTuple files are accepted (as per the output of
 HyperonProduction). However other data files may be added in the future.
 """
 
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
 from os.path import isabs
+from typing import TYPE_CHECKING, Any, Callable, Iterator
 
 import awkward as ak
-import uproot as up
-from uproot.behaviors.TBranch import HasBranches
 
 from sigmazerosearch.general import Config
 
+if TYPE_CHECKING:
+    import pyarrow.parquet as pq
+    from uproot.behaviors.TBranch import HasBranches
 
-def _yield_array_from_ttree(tree: HasBranches, config: Config):
-    # if config.iterate:
-    for arr in tree.iterate(step_size=config.iterate_step, report=None):  # type: ignore
+Predicate = tuple[str, str, Any]
+"""
+Predicate represents a scalar condition `(branch, op, value)` that an event
+must satisfy, e.g. `("reco_primary_vtx_inFV", "==", 1)`.
+"""
+
+_MAY_PASS: dict[str, Callable[[Any, Any, Any], bool]] = {
+    "==": lambda lo, hi, v: lo <= v <= hi,
+    "!=": lambda lo, hi, v: not (lo == hi == v),
+    "<": lambda lo, hi, v: lo < v,
+    "<=": lambda lo, hi, v: lo <= v,
+    ">": lambda lo, hi, v: hi > v,
+    ">=": lambda lo, hi, v: hi >= v,
+}
+
+
+COMPACT_DTYPES: dict[str, str] = {
+    "*_pdg": "int32",
+    "*_ID": "int32",
+    "n_slices": "int32",
+    "reco_primary_vtx_inFV": "bool",
+    "reco_primary_vtx_[xyz]": "float32",
+    "pfp_*": "float32",
+    "trk_*": "float32",
+    "shr_*": "float32",
+}
+"""
+A compact dtype policy: 32-bit reconstructed positions, scores and PDG codes
+and boolean flags. Truth quantities other than PDG codes keep their types, so
+that e.g. the fiducial volume of <project:#signal_def> is unaffected.
+"""
+
+
+def _dtype(branch: str, dtypes: dict[str, str]) -> str | None:
+    """The type of the first pattern matching `branch`"""
+    for pattern, dtype in dtypes.items():
+        if fnmatchcase(branch, pattern):
+            return dtype
+    return None
+
+
+def compact(arr: ak.Array, dtypes: dict[str, str] | None) -> ak.Array:
+    """Convert the fields of a chunk to the types of a dtype policy"""
+    if not dtypes:
+        return arr
+    fields = {}
+    for field in arr.fields:
+        dtype = _dtype(field, dtypes)
+        fields[field] = (
+            arr[field] if dtype is None else ak.values_astype(arr[field], dtype)
+        )
+    return ak.zip(fields, depth_limit=1)
+
+
+@dataclass
+class Chunk:
+    """A contiguous range of entries of a sample that is read as one array."""
+
+    entry_start: int
+    entry_stop: int
+    read: Callable[[], ak.Array]
+
+    def __len__(self) -> int:
+        return self.entry_stop - self.entry_start
+
+
+def _entry_step(
+    tree: "HasBranches", config: Config, branches: list[str] | None = None
+) -> int:
+    """Number of entries per chunk, reading the whole tree when not iterating"""
+    if config.iterate_step is None:
+        return max(tree.num_entries, 1)  # type: ignore
+    if isinstance(config.iterate_step, str):
+        return max(tree.num_entries_for(config.iterate_step, branches), 1)  # type: ignore
+    return config.iterate_step
+
+
+def _yield_array_from_ttree(
+    tree: "HasBranches", config: Config, branches: list[str] | None = None
+):
+    step = _entry_step(tree, config, branches)
+    for arr in tree.iterate(branches, step_size=step, report=None):  # type: ignore
         yield arr
-    # else:
-    #     return tree.arrays(config.branch_list)
 
 
-def load_ntuple(filename: str) -> HasBranches:
+def _ttree_chunks(
+    tree: "HasBranches", config: Config, branches: list[str] | None = None
+) -> Iterator[Chunk]:
+    """
+    Split a TTree into the same chunks as `_yield_array_from_ttree`, without
+    reading them.
+    """
+    step = _entry_step(tree, config, branches)
+    for start in range(0, tree.num_entries, step):  # type: ignore
+        stop = min(start + step, tree.num_entries)  # type: ignore
+        yield Chunk(
+            start,
+            stop,
+            lambda start=start, stop=stop: compact(
+                tree.arrays(branches, entry_start=start, entry_stop=stop),  # type: ignore
+                config.dtypes,
+            ),
+        )
+
+
+def _aligned_chunks(
+    tree: "HasBranches", config: Config, branches: list[str] | None, step: int
+) -> Iterator[Chunk]:
+    """
+    Split a TTree into chunks of at least `step` entries that start and end on
+    basket boundaries of all `branches`, so that each chunk can be read
+    without decompressing baskets of its neighbours.
+    """
+    offsets = tree.common_entry_offsets(filter_name=branches or (lambda _: True))
+    start = 0
+    for stop in offsets[1:]:
+        if stop - start < step and stop != offsets[-1]:
+            continue
+        yield Chunk(
+            start,
+            stop,
+            lambda start=start, stop=stop: compact(
+                tree.arrays(branches, entry_start=start, entry_stop=stop),  # type: ignore
+                config.dtypes,
+            ),
+        )
+        start = stop
+
+
+def _parquet_chunks(
+    pf: "pq.ParquetFile",
+    config: Config,
+    skip: "Callable[[pq.RowGroupMetaData], bool] | None" = None,
+) -> Iterator[Chunk]:
+    """
+    Split a Parquet cache into one chunk per row group, omitting those for
+    which `skip` returns `True`.
+    """
+    columns = list(config.branch_list) if config.branch_list else None
+    start = 0
+    for i in range(pf.metadata.num_row_groups):
+        rg = pf.metadata.row_group(i)
+        stop = start + rg.num_rows
+        if skip is None or not skip(rg):
+            yield Chunk(
+                start,
+                stop,
+                lambda i=i: compact(
+                    ak.from_arrow(pf.read_row_group(i, columns=columns)),
+                    config.dtypes,
+                ),
+            )
+        start = stop
+
+
+def _yield_array_from_parquet(
+    pf: "pq.ParquetFile",
+    config: Config,
+    skip: "Callable[[pq.RowGroupMetaData], bool] | None" = None,
+) -> Iterator[ak.Array]:
+    """
+    Yield each row group of a Parquet cache as an <inv:#ak.Array>, omitting
+    those for which `skip` returns `True` without reading them.
+    """
+    for chunk in _parquet_chunks(pf, config, skip):
+        yield chunk.read()
+
+
+def row_group_may_pass(rg: "pq.RowGroupMetaData", predicates: list[Predicate]) -> bool:
+    """
+    Use the min/max statistics of a Parquet row group to check if any of its
+    rows could satisfy all of `predicates`.
+
+    Only scalar columns are considered, predicates on columns without
+    statistics are assumed to pass.
+    """
+    stats = {
+        rg.column(j).path_in_schema: rg.column(j).statistics
+        for j in range(rg.num_columns)
+    }
+    for name, op, value in predicates:
+        st = stats.get(name)
+        if st is None or not st.has_min_max:
+            continue
+        if not _MAY_PASS[op](st.min, st.max, value):
+            return False
+
+    return True
+
+
+def to_parquet_cache(
+    tree: "HasBranches",
+    filename: str,
+    config: Config,
+    branches: list[str] | None = None,
+) -> None:
+    """
+    Write `branches` (by default all) of a TTree, converted to the types of
+    `config.dtypes`, to a columnar Parquet cache with one row group per chunk
+    yielded by the loader, so that row groups can later be skipped using their
+    column statistics.
+
+    The cache is written under a temporary name and renamed once complete, so
+    that it is never read half-written.
+    """
+    import pyarrow.parquet as pq
+
+    if not isabs(filename):
+        raise OSError("Please provide an absolute file path")
+    partial = f"{filename}.{os.getpid()}.partial"
+    writer = None
+    try:
+        for arr in _yield_array_from_ttree(tree, config, branches):
+            table = ak.to_arrow_table(compact(arr, config.dtypes))
+            if writer is None:
+                writer = pq.ParquetWriter(partial, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+            os.replace(partial, filename)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def load_parquet(filename: str) -> "pq.ParquetFile":
+    """Open a Parquet cache previously written by `to_parquet_cache`"""
+    import pyarrow.parquet as pq
+
+    if not isabs(filename):
+        raise OSError("Please provide an absolute file path")
+    return pq.ParquetFile(filename)
+
+
+def load_ntuple(filename: str) -> "HasBranches":
     """
     Wraps the uproot.open method, taking a filename and outputting some ROOT
     object that has branches
     """
+    import uproot as up
+    from uproot.behaviors.TBranch import HasBranches
+
     data = up.open(filename)
     if not isabs(filename):
         raise OSError("Please provide an absolute file path")
@@ -38,6 +272,8 @@ def load_ntuple(filename: str) -> HasBranches:
 
 def get_POT(filename: str) -> float:
     """Sums the POT value of each subrun from a given ROOT file"""
+    import uproot as up
+
     if not isabs(filename):
         raise OSError("Please provide an absolute file path")
     data = up.open(filename)
@@ -0,0 +1,175 @@
+"""
+Detection of events shared between the samples of a selection.
+
+Enriched samples (e.g. <project:#SampleType.Hyperon>) overlap with inclusive
+ones (e.g. <project:#SampleType.Background>). While streaming each sample once
+only a compact sorted set of 64-bit keys is kept per sample, which is then used
+to find the events of a chunk that also appear in other samples.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.index import pack_rse
+from sigmazerosearch.loader import _yield_array_from_ttree
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+@dataclass(frozen=True)
+class EventKey:
+    """A function mapping events to 64-bit keys and the branches it reads."""
+
+    branches: tuple[str, ...]
+    func: Callable[[ak.Array], np.ndarray]
+
+    def __call__(self, arr: ak.Array) -> np.ndarray:
+        return self.func(arr)
+
+
+def _finalise(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser, spreading the bits of each key"""
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    i = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[i] == keys
+
+
+def hash_columns(*columns) -> np.ndarray:
+    """
+    Combine flat numeric columns into one 64-bit hash per row. Floating point
+    values are hashed by their float64 bit pattern.
+    """
+    h = np.zeros(len(columns[0]), dtype=np.uint64)
+    for col in columns:
+        col = np.asarray(col)
+        if col.dtype.kind == "f":
+            bits = col.astype(np.float64).view(np.uint64)
+        else:
+            bits = col.astype(np.int64).view(np.uint64)
+        h = _finalise(h * _MIX + bits)
+    return h
+
+
+RSE = EventKey(
+    ("run", "subrun", "event"),
+    lambda arr: pack_rse(arr["run"], arr["subrun"], arr["event"]),
+)
+"""Identify events by their run, subrun and event numbers."""
+
+_TRUTH_BRANCHES = ("mc_nu_pdg", "mc_nu_q2", "mc_nu_pos_x", "mc_nu_pos_y", "mc_nu_pos_z")
+
+TRUTH = EventKey(
+    _TRUTH_BRANCHES,
+    lambda arr: hash_columns(*(arr[k] for k in _TRUTH_BRANCHES)),
+)
+"""Identify events by a hash of their generated neutrino interaction."""
+
+
+class Overlap:
+    """
+    Per-sample key sets used to report and handle events found in more than
+    one sample.
+
+    The `policy` decides how <project:#Selection.apply_cut> treats duplicates:
+
+    - `"exclude"`: an event is only counted in the first sample (in
+      <project:#SampleSet> order) containing it.
+    - `"reweight"`: each copy of an event is weighted by one over the number of
+      samples containing it.
+    """
+
+    def __init__(self, key: EventKey = RSE, policy: str = "exclude"):
+        if policy not in ["exclude", "reweight"]:
+            raise ValueError('policy must be one of "exclude" or "reweight"')
+        self.key: EventKey = key
+        self.policy: str = policy
+        self.keys: dict[str, np.ndarray] = {}
+        """Sorted unique keys per sample name, in sample order."""
+        self.n_events: dict[str, int] = {}
+
+    def add(self, name: str, chunks) -> None:
+        """Accumulate the keys of an iterable of chunks belonging to a sample"""
+        parts, n = [], 0
+        for arr in chunks:
+            parts.append(np.unique(self.key(arr)))
+            n += len(arr)
+        self.keys[name] = (
+            np.unique(np.concatenate(parts)) if parts else np.array([], np.uint64)
+        )
+        self.n_events[name] = n
+
+    def build(self, samples, config: Config) -> None:
+        """Stream the key branches of every loaded sample"""
+        for s in samples:
+            if s.df is None:
+                raise TypeError(f"sample {s.file_name} has not been loaded")
+            self.add(
+                s.name, _yield_array_from_ttree(s.df, config, list(self.key.branches))
+            )
+            logging.info("built %d keys for sample %s", len(self.keys[s.name]), s.name)
+
+    def save(self, filename: str) -> None:
+        """Save the key sets, to be restored by <project:#Overlap.load>"""
+        names = list(self.keys)
+        with open(filename, "wb") as fd:
+            np.savez(
+                fd,
+                names=np.array(names, dtype=str),
+                n_events=np.array([self.n_events[k] for k in names], dtype=np.int64),
+                **{f"keys_{i}": self.keys[k] for i, k in enumerate(names)},
+            )
+
+    def load(self, filename: str) -> None:
+        """Restore the key sets saved by <project:#Overlap.save>"""
+        with np.load(filename) as fd:
+            names = fd["names"].tolist()
+            self.keys = {k: fd[f"keys_{i}"] for i, k in enumerate(names)}
+            self.n_events = dict(zip(names, fd["n_events"].tolist()))
+
+    def overlaps(self) -> dict[tuple[str, str], int]:
+        """Count the keys shared by each pair of samples"""
+        names = list(self.keys)
+        return {
+            (a, b): len(np.intersect1d(self.keys[a], self.keys[b], assume_unique=True))
+            for i, a in enumerate(names)
+            for b in names[i + 1 :]
+        }
+
+    def weights(self, name: str, arr: ak.Array) -> np.ndarray:
+        """Per-event weight factors for a chunk of the named sample"""
+        keys = self.key(arr)
+        names = list(self.keys)
+        others = names[: names.index(name)] if self.policy == "exclude" else names
+        n = np.ones(len(keys))
+        for other in others:
+            if other != name:
+                n += _contains(self.keys[other], keys)
+
+        if self.policy == "exclude":
+            return (n == 1).astype(float)
+        return 1.0 / n
+
+    def summary(self, format: str = "simple") -> None:
+        """Print the within-sample duplicates and the pairwise overlaps"""
+        from tabulate import tabulate
+
+        rows = [
+            [name, "", self.n_events[name] - len(keys)]
+            for name, keys in self.keys.items()
+        ]
+        rows += [[a, b, n] for (a, b), n in self.overlaps().items()]
+        print(tabulate(rows, headers=["Sample", "Other", "Shared"], tablefmt=format))
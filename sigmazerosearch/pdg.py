@@ -0,0 +1,125 @@
+"""
+Vectorised lookups of PDG codes.
+
+Truth conditions compare arrays of PDG codes such as `mc_decay_pdg` or
+`pfp_true_pdg` against several species. Rather than one comparison per
+species, <project:#lookup> gathers every property of the codes from a dense
+table in one pass over the flat buffer of an array:
+
+- `particle`: the index of the species in <project:#PDG>, or -1 for codes
+  not listed there,
+- `charge`: the electric charge in units of the elementary charge,
+- `anti`: the code of the antiparticle, following <project:#PDG.anti>,
+- `bits`: one bit per particle and antiparticle of <project:#PDG>, see
+  <project:#bit>.
+
+```python
+decays = lookup(arr["mc_decay_pdg"])
+n_charged = ak.sum(decays.charge != 0, axis=1)
+has_p_pi = has_all(arr["mc_decay_pdg"], PDG.Proton.value, PDG.Pi.anti)
+```
+"""
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.general import PDG
+
+__all__ = ["lookup", "bit", "event_bits", "has_all", "CODES", "CHARGE"]
+
+CHARGE: dict[PDG, int] = {
+    PDG.E: -1,
+    PDG.NuE: 0,
+    PDG.Muon: -1,
+    PDG.NuMu: 0,
+    PDG.Photon: 0,
+    PDG.Pi0: 0,
+    PDG.Pi: 1,
+    PDG.Kaon0: 0,
+    PDG.Kaon: 1,
+    PDG.Neutron: 0,
+    PDG.Proton: 1,
+    PDG.Lambda: 0,
+    PDG.Sigma0: 0,
+}
+"""Charge of the particle of each (positive) code."""
+
+CODES: list[int] = list(dict.fromkeys(code for p in PDG for code in (p.value, p.anti)))
+"""The codes with a membership bit, in the order of their bits."""
+
+_DTYPE = np.dtype(
+    [
+        ("particle", np.int8),
+        ("charge", np.int8),
+        ("anti", np.int32),
+        ("bits", np.uint32),
+    ]
+)
+_OFFSET = max(PDG)
+
+
+def _table() -> np.ndarray:
+    """The properties of the codes `-_OFFSET..._OFFSET`, then of unknown codes"""
+    table = np.zeros(2 * _OFFSET + 2, dtype=_DTYPE)
+    table["particle"] = -1
+    table["anti"][:-1] = -np.arange(-_OFFSET, _OFFSET + 1)
+    for i, p in enumerate(PDG):
+        for code, sign in ((p.value, 1), (p.anti, -1)):
+            row = table[code + _OFFSET]
+            row["particle"] = i
+            row["charge"] = sign * CHARGE[p]
+            row["anti"] = p.value if code == p.anti else p.anti
+            row["bits"] = 1 << CODES.index(code)
+    return table
+
+
+_TABLE = _table()
+
+
+def _gather(codes: np.ndarray) -> np.ndarray:
+    idx = np.asarray(codes, dtype=np.int64) + _OFFSET
+    idx = np.where((idx >= 0) & (idx < len(_TABLE) - 1), idx, len(_TABLE) - 1)
+    rows = _TABLE[idx]
+    unknown = rows["particle"] < 0
+    rows["anti"] = np.where(unknown, -np.asarray(codes), rows["anti"])
+    return rows
+
+
+def lookup(codes):
+    """
+    The `particle`, `charge`, `anti` and `bits` of each code, as a record
+    array of the same structure for an <inv:#ak.Array> and as a structured
+    array otherwise. Unknown codes have `particle` -1, no charge and no bits.
+    """
+    if not isinstance(codes, ak.Array):
+        return _gather(codes)
+
+    def transform(layout, **kwargs):
+        if isinstance(layout, ak.contents.NumpyArray):
+            rows = _gather(layout.data)
+            return ak.contents.RecordArray(
+                [ak.contents.NumpyArray(rows[f]) for f in _DTYPE.names],
+                list(_DTYPE.names),
+            )
+
+    return ak.transform(transform, codes)
+
+
+def bit(*codes: int) -> int:
+    """The membership bits of `codes`"""
+    return int(np.bitwise_or.reduce(_gather(np.asarray(codes))["bits"]))
+
+
+def event_bits(codes: ak.Array) -> np.ndarray:
+    """The union of the membership bits of the codes of each event"""
+    counts = ak.to_numpy(ak.num(codes, axis=1))
+    bits = _gather(ak.to_numpy(ak.flatten(codes)))["bits"]
+    starts = np.cumsum(counts) - counts
+    union = np.bitwise_or.reduceat(np.append(bits, np.uint32(0)), starts)
+    return np.where(counts > 0, union, np.uint32(0))
+
+
+def has_all(codes: ak.Array, *required: int) -> np.ndarray:
+    """Whether the codes of each event include every one of `required`"""
+    need = bit(*required)
+    return (event_bits(codes) & need) == need
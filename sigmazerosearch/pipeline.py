@@ -0,0 +1,265 @@
+"""
+Applying a selection with separate reader and compute processes.
+
+Splitting a large sample between workers by entry range makes every worker
+open the file and parse its metadata, and each worker alternates between
+decompressing and computing. A <project:#Pipeline> instead has a few reader
+processes open the samples and read their chunks, and a pool of compute
+workers applying the cut flow.
+
+Readers decompress each chunk into a block of shared memory, laid out as the
+buffers of <inv:#ak.to_buffers>, and pass only its name and form to the
+workers. Workers rebuild the array on top of the shared buffers without
+copying them, apply the cuts and histograms to it and release the block. At
+most `max_chunks` chunks are held in shared memory at any time: readers wait
+for a block to be released before reading another chunk. Missing Parquet
+caches are built before the processes start, so that readers only open them.
+
+Workers are forked, so that they inherit the selection and its cut functions,
+which cannot generally be pickled. The cut flow is evaluated without cached
+results, planning or checkpoints.
+"""
+
+import gc
+import logging
+import os
+import queue
+import traceback
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.derived import chunk_scope
+from sigmazerosearch.loader import Chunk
+from sigmazerosearch.selection import Selection
+
+_ALIGN = 64
+"""Alignment in bytes of every buffer within a shared block."""
+
+
+def to_shared(arr: ak.Array) -> tuple[SharedMemory, dict]:
+    """
+    Copy the buffers of `arr` into a new block of shared memory, returning it
+    and the description from which <project:#from_shared> rebuilds the array
+    """
+    form, length, container = ak.to_buffers(arr)
+    buffers = {}
+    size = 0
+    for key, buf in container.items():
+        buf = np.asarray(buf)
+        buffers[key] = (size, buf.dtype.str, buf.size)
+        size += -(-buf.nbytes // _ALIGN) * _ALIGN
+
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for key, buf in container.items():
+        offset, dtype, count = buffers[key]
+        np.frombuffer(shm.buf, dtype, count, offset)[:] = np.asarray(buf).ravel()
+    return shm, {
+        "name": shm.name,
+        "form": form.to_json(),
+        "length": length,
+        "buffers": buffers,
+    }
+
+
+def from_shared(desc: dict) -> tuple[SharedMemory, ak.Array]:
+    """
+    Attach to the block of shared memory described by `desc` and view its
+    buffers as an <inv:#ak.Array>. The array must be dropped before the block
+    is closed.
+    """
+    shm = SharedMemory(name=desc["name"])
+    container = {
+        key: np.frombuffer(shm.buf, dtype, count, offset)
+        for key, (offset, dtype, count) in desc["buffers"].items()
+    }
+    arr = ak.from_buffers(ak.forms.from_json(desc["form"]), desc["length"], container)
+    return shm, arr
+
+
+def _release(shm: SharedMemory) -> None:
+    """Free a block once its array is no longer used"""
+    shm.unlink()
+    gc.collect()
+    try:
+        shm.close()
+    except BufferError:
+        # a view outlived the chunk, the mapping goes when it does
+        logging.debug("shared block %s still in use after its chunk", shm.name)
+
+
+def _read(sel: Selection, reader: int, readers: int, work, slots, stop, done) -> None:
+    """
+    Read every `readers`-th chunk of the samples into shared memory, until
+    `stop` is set. The Parquet caches, built before the readers start, are
+    only opened.
+    """
+    try:
+        k = 0
+        for i, sample in enumerate(sel.samples):
+            sample.load_df(sel.config)
+            for chunk in sel._chunks(sample, sel._skipping(sel.cuts)):
+                k += 1
+                if (k - 1) % readers != reader:
+                    continue
+                slots.acquire()
+                if stop.is_set():
+                    return
+                shm, desc = to_shared(chunk.read())
+                shm.close()
+                work.put((i, chunk.entry_start, chunk.entry_stop, desc))
+        # flush the chunks before reporting, so that they reach the workers
+        # ahead of the signal to stop
+        work.close()
+        work.join_thread()
+        done.put(("read", reader))
+    except BaseException:
+        done.put(("error", traceback.format_exc()))
+
+
+def _compute(sel: Selection, work, slots, done) -> None:
+    """Apply the cut flow to the chunks handed over, until told to stop"""
+    try:
+        for cut in sel.cuts:
+            cut.reset()
+        for h in sel.histograms.values():
+            h.reset()
+        sel._planner = None
+        while (item := work.get()) is not None:
+            i, start, stop, desc = item
+            sample = sel.samples[i]
+            scale = sel.samples.target_POT / sample.POT
+            shm, arr = from_shared(desc)
+            try:
+                with chunk_scope():
+                    sel._apply_chunk(
+                        sample, Chunk(start, stop, lambda: arr), sel.cuts, scale
+                    )
+            finally:
+                del arr
+                _release(shm)
+                slots.release()
+        done.put(("state", sel.state(sel.cuts)))
+    except BaseException:
+        done.put(("error", traceback.format_exc()))
+
+
+class Pipeline:
+    """
+    A <project:#Selection> applied by `readers` reader processes and `workers`
+    compute processes (by default one per CPU), with at most `max_chunks`
+    chunks (by default two per worker) in shared memory at a time.
+    """
+
+    def __init__(
+        self,
+        selection: Selection,
+        readers: int = 1,
+        workers: int | None = None,
+        max_chunks: int | None = None,
+    ):
+        if readers < 1:
+            raise ValueError("a pipeline needs at least one reader")
+        self.selection: Selection = selection
+        self.readers: int = readers
+        self.workers: int = workers or os.cpu_count() or 1
+        self.max_chunks: int = max_chunks or 2 * self.workers
+
+    def apply_cut(self) -> None:
+        """
+        Apply the cuts and histograms of the selection to every chunk of its
+        samples, adding the counts of all workers to its own
+        """
+        sel = self.selection
+        # build any missing Parquet cache once, rather than in every reader
+        sel.open_files()
+        if sel.overlap is not None and not sel.overlap.keys:
+            sel.find_overlaps()
+
+        # shared by all processes, so that blocks created by a reader and
+        # unlinked by a worker are tracked once
+        resource_tracker.ensure_running()
+        ctx = get_context("fork")
+        work, done = ctx.Queue(), ctx.Queue()
+        slots, stop = ctx.Semaphore(self.max_chunks), ctx.Event()
+        readers = [
+            ctx.Process(
+                target=_read, args=(sel, r, self.readers, work, slots, stop, done)
+            )
+            for r in range(self.readers)
+        ]
+        workers = [
+            ctx.Process(target=_compute, args=(sel, work, slots, done))
+            for _ in range(self.workers)
+        ]
+        for p in readers + workers:
+            p.start()
+
+        try:
+            states = self._collect(readers, workers, work, done)
+        except BaseException:
+            # let the readers finish their current chunk and the workers drain
+            # the queue, then free whatever is left
+            stop.set()
+            for _ in range(self.max_chunks):
+                slots.release()
+            for p in readers:
+                p.join()
+            for _ in workers:
+                work.put(None)
+            for p in workers:
+                p.join()
+            self._discard(work)
+            raise
+        for p in readers + workers:
+            p.join()
+
+        for state in states:
+            for cut, cut_state in zip(sel.cuts, state["cuts"]):
+                cut.merge(cut_state)
+            for k, h in sel.histograms.items():
+                h.merge(state["histograms"][k])
+        logging.info(
+            "applied the selection with %d readers and %d workers",
+            self.readers,
+            self.workers,
+        )
+
+    def _collect(self, readers, workers, work, done) -> list[dict]:
+        """
+        Wait for the readers to finish, then stop the workers and gather
+        their states, raising if any process fails
+        """
+        reading, states = len(readers), []
+        while len(states) < len(workers):
+            try:
+                kind, value = done.get(timeout=1.0)
+            except queue.Empty:
+                if any(p.exitcode not in (None, 0) for p in readers + workers):
+                    raise RuntimeError("a pipeline process died") from None
+                continue
+            if kind == "error":
+                raise RuntimeError(f"pipeline process failed:\n{value}")
+            if kind == "read":
+                reading -= 1
+                if reading == 0:
+                    for _ in workers:
+                        work.put(None)
+            else:
+                states.append(value)
+        return states
+
+    @staticmethod
+    def _discard(work) -> None:
+        """Free the blocks of the chunks left in the queue after a failure"""
+        while True:
+            try:
+                item = work.get(timeout=0.1)
+            except queue.Empty:
+                return
+            if item is not None:
+                shm = SharedMemory(name=item[3]["name"])
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,101 @@
+"""
+Planning of how cuts are evaluated.
+
+The cut flow reports, for every cut, the events passing it and all the cuts
+before it, so only the first failing cut of each event is needed. Evaluating
+the cuts in their defined order and each only on the events that passed the
+ones before it finds these with the fewest evaluations: whichever order is
+used, an event first failing cut `k` must be evaluated by cuts `0` to `k`.
+
+Evaluating a cut on a subset of a chunk is not free, though: selecting the
+surviving events of a jagged array costs time of its own, which outweighs the
+saving for cheap cuts reached by most events. The <project:#Planner> measures
+the cost per event of every cut on the whole chunk and on the surviving
+events, together with the fraction of events reaching it, and picks the
+cheaper way for each cut.
+"""
+
+import time
+
+import awkward as ak
+import numpy as np
+
+
+def expected_cost(
+    passed: np.ndarray,
+    full_costs: np.ndarray,
+    subset_costs: np.ndarray,
+    short: np.ndarray,
+) -> float:
+    """
+    The mean cost per event of evaluating the cuts in their defined order,
+    given the `(events, cuts)` results of every cut in `passed` and their cost
+    per event when evaluated on whole chunks and on subsets. Cuts marked in
+    `short` are evaluated only on the events passing all cuts before them.
+    """
+    return float(np.sum(np.where(short, subset_costs * _reach(passed), full_costs)))
+
+
+def _reach(passed: np.ndarray) -> np.ndarray:
+    """Fraction of the events passing every cut before each cut"""
+    if len(passed) == 0:
+        return np.ones(passed.shape[1])
+    before = np.cumprod(passed, axis=1)[:, :-1].mean(axis=0)
+    return np.concatenate(([1.0], before))
+
+
+def plan(
+    passed: np.ndarray, full_costs: np.ndarray, subset_costs: np.ndarray
+) -> list[bool]:
+    """
+    Mark the cuts cheaper to evaluate only on the events passing the cuts
+    before them, minimising <project:#expected_cost>
+    """
+    with np.errstate(invalid="ignore"):
+        return (subset_costs * _reach(passed) < full_costs).tolist()
+
+
+class Planner:
+    """
+    Measures the cuts on the first `n_chunks` chunks of a run, from which
+    <project:#Planner.plan> decides how to evaluate them on the others.
+    """
+
+    def __init__(self, n_cuts: int, n_chunks: int):
+        self.n_chunks: int = n_chunks
+        self.passed: list[np.ndarray] = []
+        self.full_seconds: np.ndarray = np.zeros(n_cuts)
+        self.subset_seconds: np.ndarray = np.zeros(n_cuts)
+        self.subset_events: np.ndarray = np.zeros(n_cuts)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.passed) >= self.n_chunks
+
+    def measure(self, cuts, arr: ak.Array, passed: np.ndarray, seconds) -> None:
+        """
+        Record the `(events, cuts)` results of `cuts` on a chunk `arr` and the
+        `seconds` spent evaluating each on all of it, then time each cut on
+        the events passing the cuts before it.
+        """
+        self.passed.append(passed)
+        self.full_seconds += seconds
+        reached = np.cumprod(passed, axis=1, dtype=bool)
+        for i, cut in enumerate(cuts):
+            idx = np.flatnonzero(reached[:, i - 1]) if i else np.arange(len(arr))
+            if 0 < len(idx) < len(arr):
+                start = time.perf_counter()
+                cut.cutfunc(arr[idx])
+                self.subset_seconds[i] += time.perf_counter() - start
+                self.subset_events[i] += len(idx)
+
+    def plan(self) -> list[bool]:
+        passed = np.concatenate(self.passed)
+        full_costs = self.full_seconds / max(len(passed), 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            subset_costs = np.where(
+                self.subset_events > 0,
+                self.subset_seconds / self.subset_events,
+                np.inf,
+            )
+        return plan(passed, full_costs, subset_costs)
@@ -0,0 +1,148 @@
+"""
+Rendering and saving of figures.
+
+Every `plot_*` method of a <project:#Selection> returns its figure and hands
+it to <project:#finish>, which saves it in each of the configured formats and
+only shows it, blocking until it is closed, when `config.plot_show` is set.
+Saving computes the layout of a
+figure once, as its tight bounding box, and reuses it for every format rather
+than recomputing it in each `savefig`.
+
+With `config.plot_workers` set, figures are instead pickled and queued to a
+pool of worker processes rendering them with the Agg backend, so that a batch
+producing many plots in several formats does not wait for each of them.
+<project:#wait> blocks until every queued figure is written.
+"""
+
+import logging
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from sigmazerosearch.general import Config
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+DPI = 300
+"""Resolution of the saved raster figures."""
+
+
+def _paths(config: Config, title: str) -> list[Path]:
+    formats = (
+        [config.plot_format]
+        if isinstance(config.plot_format, str)
+        else list(config.plot_format)
+    )
+    return [Path(config.plot_dir) / f"{title}.{f}" for f in formats]  # type: ignore
+
+
+def save_figure(fig: "Figure", paths: Iterable[Path], dpi: int = DPI) -> None:
+    """
+    Save `fig` to each of `paths`, in the format given by its suffix, cropped
+    to its tight bounding box computed only once
+    """
+    import matplotlib as mpl
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if not hasattr(fig.canvas, "get_renderer"):
+        FigureCanvasAgg(fig)
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    bbox = bbox.padded(mpl.rcParams["savefig.pad_inches"])
+    for path in paths:
+        fig.savefig(path, dpi=dpi, bbox_inches=bbox)
+        logging.info("saved plot to %s", path)
+
+
+def _render(data: bytes, paths: list[Path], dpi: int) -> list[Path]:
+    """Unpickle a figure in a worker and save it to `paths`"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = pickle.loads(data)
+    save_figure(fig, paths, dpi)
+    plt.close(fig)
+    return paths
+
+
+class FigureQueue:
+    """
+    A pool of `workers` processes rendering and saving figures in the
+    background, in the order they are submitted.
+    """
+
+    def __init__(self, workers: int):
+        self.workers: int = workers
+        self._pool = ProcessPoolExecutor(workers, mp_context=get_context())
+        self._pending: list[Future] = []
+
+    def submit(self, fig: "Figure", paths: list[Path], dpi: int = DPI) -> Future:
+        """
+        Queue `fig` to be saved to `paths`. The figure is pickled at once, so
+        it may be changed or closed as soon as this returns.
+        """
+        future = self._pool.submit(_render, pickle.dumps(fig), paths, dpi)
+        self._pending.append(future)
+        return future
+
+    def wait(self) -> list[Path]:
+        """Block until every queued figure is saved, returning their paths"""
+        pending, self._pending = self._pending, []
+        return [path for future in pending for path in future.result()]
+
+    def close(self) -> None:
+        self.wait()
+        self._pool.shutdown()
+
+    def __enter__(self) -> "FigureQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_QUEUE: FigureQueue | None = None
+"""The queue of the figures saved in the background, started on first use."""
+
+
+def _queue(workers: int) -> FigureQueue:
+    global _QUEUE
+    if _QUEUE is not None and _QUEUE.workers != workers:
+        _QUEUE.close()
+        _QUEUE = None
+    if _QUEUE is None:
+        _QUEUE = FigureQueue(workers)
+    return _QUEUE
+
+
+def wait() -> list[Path]:
+    """
+    Block until every figure queued by <project:#finish> is saved, returning
+    their paths
+    """
+    return [] if _QUEUE is None else _QUEUE.wait()
+
+
+def finish(config: Config, fig: "Figure", title: str) -> "Figure":
+    """
+    Save `fig` as `title` in the formats of `config` when `config.plot_save`
+    is set, in the background when `config.plot_workers` is, and show it if
+    `config.plot_show` is set. Figures that are not shown are closed, so that
+    batch runs do not accumulate them, but remain usable.
+    """
+    import matplotlib.pyplot as plt
+
+    if config.plot_save:
+        if config.plot_workers > 0:
+            _queue(config.plot_workers).submit(fig, _paths(config, title))
+        else:
+            save_figure(fig, _paths(config, title))
+    if config.plot_show:
+        plt.show()
+    else:
+        plt.close(fig)
+    return fig
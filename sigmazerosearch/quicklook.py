@@ -0,0 +1,88 @@
+"""
+Approximate cut flows from a random subset of the samples.
+
+<project:#Selection.quick_look> applies the cuts to randomly chosen chunks of
+every sample, in random order, and scales the counts of each sample by the
+fraction of its chunks processed. Since events within a chunk are correlated
+(they share a run and subrun), the uncertainty of the estimates comes from
+bootstrapping the processed chunks of each sample, with a finite population
+correction so that it vanishes once every chunk is processed. Processing
+stops as soon as the efficiency and purity after every cut are known to the
+requested relative precision.
+"""
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class QuickLook:
+    """Estimated efficiencies and purities after each cut"""
+
+    names: list[str]
+    eff: np.ndarray
+    eff_interval: np.ndarray
+    """The `(cuts, 2)` lower and upper ends of the confidence intervals."""
+    pur: np.ndarray
+    pur_interval: np.ndarray
+    precision: float
+    """The largest half-width of any interval, relative to its estimate."""
+    fraction: float
+    """Fraction of all entries processed."""
+    converged: bool
+    """Whether the requested precision was reached."""
+
+
+def estimate(
+    rows: list[np.ndarray],
+    populations: list[int],
+    confidence: float,
+    n_boot: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Efficiencies and purities, with their confidence intervals, from the
+    per-chunk counts of every sample.
+
+    Each row of `rows[s]` holds the signal counts after each of `n` cuts, then
+    the counts of all passing events, then the total signal of one processed
+    chunk of sample `s`, which has `populations[s]` chunks in all.
+    """
+    n = (rows[0].shape[1] - 1) // 2
+    total = np.zeros(rows[0].shape[1])
+    boot = np.zeros((n_boot, rows[0].shape[1]))
+    for r, population in zip(rows, populations):
+        k = len(r)
+        scale = population / k
+        total += scale * r.sum(axis=0)
+        picks = rng.multinomial(k, np.full(k, 1.0 / k), size=n_boot)
+        fpc = np.sqrt(1.0 - k / population)
+        mean = r.sum(axis=0)
+        boot += scale * (mean + fpc * (picks @ r - mean))
+
+    def ratios(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        s, p, t = x[..., :n], x[..., n : 2 * n], x[..., -1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return s / t, s / p
+
+    eff, pur = ratios(total)
+    eff_boot, pur_boot = ratios(boot)
+    alpha = (1.0 - confidence) / 2.0
+
+    def interval(replicas: np.ndarray) -> np.ndarray:
+        finite = np.where(np.isfinite(replicas), replicas, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN cuts
+            return np.nanquantile(finite, [alpha, 1.0 - alpha], axis=0).T
+
+    return eff, interval(eff_boot), pur, interval(pur_boot)
+
+
+def relative_precision(value: np.ndarray, interval: np.ndarray) -> float:
+    """The largest half-width of the intervals relative to their values"""
+    width = (interval[:, 1] - interval[:, 0]) / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.where(width == 0.0, 0.0, width / np.abs(value))
+    return float(np.max(np.nan_to_num(rel, nan=np.inf), initial=0.0))
@@ -2,22 +2,68 @@
 Selection contains the main objects for handling the physics selection.
 """
 
-from dataclasses import dataclass
+import dataclasses
+import logging
+import time
 from enum import Enum, IntEnum
-from os.path import isabs
-from typing import Callable
+from os.path import isabs, isfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
 
 import awkward as ak
-import matplotlib.pyplot as plt
 import numpy as np
-from tabulate import tabulate
-from uproot.behaviors.TBranch import HasBranches
 
 import sigmazerosearch.alg.fv as fv
+import sigmazerosearch.pdg as pdg
+import sigmazerosearch.plotting as plotting
 import sigmazerosearch.utils as utils
-from sigmazerosearch.general import PDG, Config
-from sigmazerosearch.loader import _yield_array_from_ttree, get_POT, load_ntuple
+from sigmazerosearch.checkpoint import Checkpoint
+from sigmazerosearch.derived import chunk_scope, derived
+from sigmazerosearch.fingerprint import (
+    _MEMORY,
+    ResultCache,
+    cache_name,
+    file_identity,
+    fingerprint,
+)
+from sigmazerosearch.general import PDG, Config, ParameterSet
+from sigmazerosearch.histogram import EfficiencyHistogram, Histogram, StackedHistogram
+from sigmazerosearch.index import RSEIndex
+from sigmazerosearch.loader import (
+    COMPACT_DTYPES,
+    Chunk,
+    Predicate,
+    _aligned_chunks,
+    _parquet_chunks,
+    _ttree_chunks,
+    compact,
+    get_POT,
+    load_ntuple,
+    load_parquet,
+    row_group_may_pass,
+    to_parquet_cache,
+)
+from sigmazerosearch.overlap import Overlap
+from sigmazerosearch.planner import Planner
+from sigmazerosearch.quicklook import QuickLook, estimate, relative_precision
 from sigmazerosearch.truth import GenType
+from sigmazerosearch.weights import BOOTSTRAP, Bootstrap, Universes, covariance
+
+if TYPE_CHECKING:
+    import pyarrow.parquet as pq
+    from matplotlib.figure import Figure
+    from uproot.behaviors.TBranch import HasBranches
+
+__all__ = [
+    "Cut",
+    "EventCategory",
+    "ParameterSet",
+    "Sample",
+    "SampleSet",
+    "SampleType",
+    "Selection",
+    "signal_def",
+]
 
 # ValueUnc = tuple[float, float] | tuple[float, float, float]
 ValueUnc = list[float]
@@ -34,43 +80,47 @@ class EventCategory(IntEnum):
     NC = 3
     Other = 4
 
-    @staticmethod
-    def _signal(arr):
-        return signal_def(arr) * EventCategory.Signal.value
-
     @staticmethod
     def _lambda(arr):
-        return (arr["mc_hyperon_pdg"] == PDG.Lambda.value) * EventCategory.Lambda.value
+        return arr["mc_hyperon_pdg"] == PDG.Lambda.value
 
     @staticmethod
     def _numucc(arr):
-        return (
-            np.logical_and.reduce(
-                [
-                    np.abs(arr["mc_nu_pdg"]) == PDG.NuMu.value,
-                    np.abs(arr["mc_lepton_pdg"]) == PDG.Muon.value,
-                ]
-            )
-            * EventCategory.NuMuCC.value
+        return np.logical_and.reduce(
+            [
+                np.abs(arr["mc_nu_pdg"]) == PDG.NuMu.value,
+                np.abs(arr["mc_lepton_pdg"]) == PDG.Muon.value,
+            ]
         )
 
     @staticmethod
     def _nc(arr):
-        return (
-            np.logical_and.reduce(
-                [
-                    np.abs(arr["mc_nu_pdg"]) == PDG.NuMu.value,
-                    np.abs(arr["mc_lepton_pdg"]) == PDG.NuMu.value,
-                ]
-            )
-            * EventCategory.NC.value
+        return np.logical_and.reduce(
+            [
+                np.abs(arr["mc_nu_pdg"]) == PDG.NuMu.value,
+                np.abs(arr["mc_lepton_pdg"]) == PDG.NuMu.value,
+            ]
         )
 
     @classmethod
-    def from_arr(cls, arr):
-        return cls._signal(arr) | cls._lambda(arr) | cls._numucc(arr) | cls._nc(arr)
+    def from_arr(cls, arr) -> np.ndarray:
+        """
+        The category of each event: the first one it matches in the order of
+        the enum, or `Other` when it matches none
+        """
+        return np.select(
+            [
+                ak.to_numpy(signal_def(arr)),
+                ak.to_numpy(cls._lambda(arr)),
+                ak.to_numpy(cls._numucc(arr)),
+                ak.to_numpy(cls._nc(arr)),
+            ],
+            [cls.Signal, cls.Lambda, cls.NuMuCC, cls.NC],
+            default=cls.Other,
+        )
 
 
+@derived
 def signal_def(arr: ak.Array) -> ak.Array:
     """Takes an <inv:#ak.Array> with fields corresponding to ntuple branches,
     applies a mask and returns a boolean array"""
@@ -78,26 +128,109 @@ def signal_def(arr: ak.Array) -> ak.Array:
         (
             arr["mc_nu_pdg"] == PDG.NuMu.anti,
             arr["mc_hyperon_pdg"] == PDG.Sigma0.value,
-            fv.in_active_tpc(
-                arr["mc_nu_pos_x"], arr["mc_nu_pos_y"], arr["mc_nu_pos_z"]
+            fv.GEOMETRY.contains(
+                fv.GEOMETRY.classify(
+                    arr["mc_nu_pos_x"], arr["mc_nu_pos_y"], arr["mc_nu_pos_z"]
+                ),
+                "active_tpc",
             ),
-            ak.sum(arr["mc_decay_pdg"] == PDG.Proton.value, axis=1) >= 1,
-            ak.sum(arr["mc_decay_pdg"] == PDG.Pi.anti, axis=1) >= 1,
+            pdg.has_all(arr["mc_decay_pdg"], PDG.Proton.value, PDG.Pi.anti),
         )
     )  # type: ignore
 
 
+SIGNAL_REQUIRES: list[Predicate] = [
+    ("mc_nu_pdg", "==", PDG.NuMu.anti),
+    ("mc_hyperon_pdg", "==", PDG.Sigma0.value),
+    ("mc_nu_pos_x", ">=", fv.FV_x[0]),
+    ("mc_nu_pos_x", "<=", fv.FV_x[1]),
+    ("mc_nu_pos_y", ">=", fv.FV_y[0]),
+    ("mc_nu_pos_y", "<=", fv.FV_y[1]),
+    ("mc_nu_pos_z", ">=", fv.FV_z[0]),
+    ("mc_nu_pos_z", "<=", fv.FV_z[1]),
+]
+"""The scalar conditions every event passing <project:#signal_def> satisfies."""
+
+
 class Cut:
     """Cut represents a single selection cut and the selection state for it."""
 
-    def __init__(self, name: str, cutfunc: Callable):
+    _COUNTERS = ("n_passing", "n_signal", "n_background", "total_signal", "sumw2")
+    _UNIVERSE_ROWS = ("n_passing", "n_signal", "n_background", "total_signal")
+
+    def __init__(
+        self, name: str, cutfunc: Callable, requires: list[Predicate] | None = None
+    ):
         self.name: str = name
         self.cutfunc: Callable[[ak.Array], ak.Array] = cutfunc
+        self.requires: list[Predicate] = requires if requires else []
+        """
+        Scalar conditions any event passing `cutfunc` satisfies, used to skip
+        cached row groups that cannot pass this cut.
+        """
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the accumulated selection state"""
         self.n_passing: ValueUnc = [0.0, 0.0, 0.0]
         self.n_signal: ValueUnc = [0.0, 0.0, 0.0]
         self.n_background: ValueUnc = [0.0, 0.0, 0.0]
         self.applied: bool = False
         self.total_signal: float = 0.0
+        self.sumw2: list[float] = [0.0, 0.0, 0.0]
+        """Sums of weights squared of the passing, signal and background events."""
+        self.seconds: float = 0.0
+        """Time spent evaluating `cutfunc`."""
+        self.n_evaluated: int = 0
+        """Number of events `cutfunc` was evaluated on."""
+        self.universes: dict[str, np.ndarray] = {}
+        """
+        Sums of weights (index 0) and of weights squared (index 1) of the
+        passing, signal, background and total signal events in each universe,
+        as a `(2, 4, n)` array per set of universes.
+        """
+
+    def state(self) -> dict:
+        """The accumulated counters, in a form that can be stored as JSON"""
+        return {
+            k: np.asarray(getattr(self, k), dtype=float).tolist()
+            for k in self._COUNTERS
+        } | {"universes": {k: v.tolist() for k, v in self.universes.items()}}
+
+    def merge(self, state: dict) -> None:
+        """Add counters accumulated elsewhere, e.g. by another process"""
+        for k in self._COUNTERS:
+            total = np.add(getattr(self, k), state[k])
+            setattr(self, k, total.tolist() if total.ndim else np.float64(total))
+        for k, v in state.get("universes", {}).items():
+            self.universes[k] = self.universes.get(k, 0) + np.asarray(v)
+        self._fill_errors()
+
+    def _fill_errors(self) -> None:
+        """Set the symmetric errors of the counts from their sums of w²"""
+        for count, sumw2 in zip(
+            [self.n_passing, self.n_signal, self.n_background], self.sumw2
+        ):
+            count[1] = count[2] = float(np.sqrt(sumw2))
+
+    def universe_counts(self, name: str, which: str = "n_signal") -> np.ndarray:
+        """
+        The weighted `n_passing`, `n_signal`, `n_background` or
+        `total_signal` in each universe of the named set
+        """
+        return self.universes[name][0, self._UNIVERSE_ROWS.index(which)]
+
+    def cost(self) -> float:
+        """Measured time per event spent evaluating `cutfunc`"""
+        return self.seconds / self.n_evaluated if self.n_evaluated else 0.0
+
+    def _evaluate(self, arr: ak.Array) -> np.ndarray:
+        """Evaluate `cutfunc` as a boolean array, timing it"""
+        start = time.perf_counter()
+        value = ak.to_numpy(ak.fill_none(self.cutfunc(arr), False)).astype(bool)
+        self.seconds += time.perf_counter() - start
+        self.n_evaluated += len(arr)
+        return value
 
     def eff(self) -> float:
         """Calculate the selection efficiency at the current Cut"""
@@ -107,11 +240,73 @@ class Cut:
         """Calculate the selection purity at the current Cut"""
         return self.n_signal[0] / self.n_passing[0]
 
-    def update(self, arr, cond, scale: float = 1.0, sample=None):
-        if sample and sample.type == SampleType.Hyperon:
-            self.n_signal[0] += scale * ak.sum(signal_def(arr[cond]))
-        self.n_background[0] += scale * ak.sum(~signal_def(arr[cond]), axis=None)
-        self.n_passing[0] += scale * ak.sum(cond, axis=None)
+    def eff_unc(self) -> float:
+        """
+        Statistical error on the efficiency, the spread of its values over the
+        bootstrap replicas (NaN when no replicas were accumulated)
+        """
+        return self._replica_std("n_signal", "total_signal")
+
+    def pur_unc(self) -> float:
+        """
+        Statistical error on the purity, the spread of its values over the
+        bootstrap replicas (NaN when no replicas were accumulated)
+        """
+        return self._replica_std("n_signal", "n_passing")
+
+    def _replica_std(self, num: str, den: str) -> float:
+        if BOOTSTRAP not in self.universes:
+            return np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = self.universe_counts(BOOTSTRAP, num) / self.universe_counts(
+                BOOTSTRAP, den
+            )
+        # replicas without any events in the denominator are left out
+        ratio = ratio[np.isfinite(ratio)]
+        return float(np.std(ratio, ddof=1)) if len(ratio) > 1 else np.nan
+
+    def update(
+        self,
+        arr,
+        cond,
+        scale: float | np.ndarray = 1.0,
+        sample=None,
+        signal=None,
+        universes: dict[str, tuple[np.ndarray, np.ndarray]] | None = None,
+    ):
+        """
+        Accumulate the events passing `cond`, each weighted by `scale` which is
+        either a single value or an array with one weight per event.
+
+        A precomputed `signal_def(arr)` mask may be given as `signal`, in which
+        case `arr` is not used.
+
+        `universes` maps the name of each set of universes to the `(events,
+        n)` arrays of the per-event weights in every universe (including
+        `scale`) and of their squares. The sums for all universes, and the
+        total signal in each, are accumulated with one product per set.
+        """
+        cond = np.asarray(cond, dtype=bool)
+        w = np.broadcast_to(scale, len(cond))[cond]
+        sig = np.asarray(signal_def(arr) if signal is None else signal, dtype=bool)
+        hyperon = bool(sample) and sample.type == SampleType.Hyperon
+        if hyperon:
+            self.n_signal[0] += np.sum(w * sig[cond])
+            self.sumw2[1] += np.sum(w**2 * sig[cond])
+        self.n_background[0] += np.sum(w * ~sig[cond])
+        self.sumw2[2] += np.sum(w**2 * ~sig[cond])
+        self.n_passing[0] += np.sum(w)
+        self.sumw2[0] += np.sum(w**2)
+        self._fill_errors()
+
+        if not universes:
+            return
+        rows = np.stack(
+            [cond, cond & sig & hyperon, cond & ~sig, sig & hyperon]
+        ).astype(float)
+        for name, (wu, wu2) in universes.items():
+            sums = np.stack([rows @ wu, rows @ wu2])
+            self.universes[name] = self.universes.get(name, 0) + sums
 
     def __call__(self, *args):
         """Allow an instance of Cut to be used like its cutfunc"""
@@ -128,32 +323,38 @@ class Cut:
         return f"<Cut name={self.name} passing={self.n_passing} signal={self.n_signal} background={self.n_background}>"
 
 
-@dataclass(frozen=True)
-class ParameterSet:
-    """
-    Wraps all selection parameter values.
+def _flow_counts(cuts: list[Cut]) -> np.ndarray:
+    """The signal and passing counts after each cut, then the total signal"""
+    return np.array(
+        [c.n_signal[0] for c in cuts]
+        + [c.n_passing[0] for c in cuts]
+        + [cuts[0].total_signal if cuts else 0.0]
+    )
 
-    All parameters are required even if only a subset of selection cuts are
-    chosen.
-    """
 
-    max_separation: float
-    """Units: cm"""
-    min_length: float
-    """Units: cm"""
-    pid_cut: float
-    proton_pid_cut: float
-    pion_pid_cut: float
-    separation_cut: float
-    """Units: cm"""
-    w_lambda_min: float
-    """Units: GeV"""
-    w_lambda_max: float
-    """Units: GeV"""
+def _first_failures(
+    arr: ak.Array, cuts: list[Cut], short_circuit: list[bool]
+) -> np.ndarray:
+    """
+    Find the index of the first cut each event fails, or `len(cuts)` for
+    events passing all of them, evaluating the cuts marked in `short_circuit`
+    only on the events passing the cuts before them.
+    """
+    n = len(arr)
+    level = np.full(n, len(cuts), dtype=np.intp)
+    alive = np.ones(n, dtype=bool)
+    for i, (cut, short) in enumerate(zip(cuts, short_circuit)):
+        if short and not alive.all():
+            idx = np.flatnonzero(alive)
+            failed = idx[~cut._evaluate(arr[idx])]
+        else:
+            failed = np.flatnonzero(alive & ~cut._evaluate(arr))
+        level[failed] = i
+        alive[failed] = False
+        if not alive.any():
+            break
 
-    @staticmethod
-    def from_dict(kwargs):
-        return ParameterSet(**kwargs)
+    return level
 
 
 class SampleType(Enum):
@@ -174,6 +375,12 @@ class SampleType(Enum):
     """Interactions originating from cosmic origins."""
 
 
+_CATEGORISED = (SampleType.Background, SampleType.Hyperon, SampleType.Dirt)
+"""Sample types whose events are split by <project:#EventCategory> in stacks."""
+
+_N_GROUPS = len(SampleType) * len(EventCategory)
+
+
 class Sample:
     """Represents samples and their associated data types"""
 
@@ -193,17 +400,63 @@ class Sample:
         self.POT: float = POT if POT else get_POT(file_name)  # type: ignore
         self.is_data: bool = is_data
         self.df: HasBranches | None = None
+        self.cache: pq.ParquetFile | None = None
 
     @classmethod
     def from_dict(cls, kv: dict):
         return cls(kv["name"], kv["file_name"], kv["type"], kv["POT"])
 
-    def load_df(self):
-        """Read file_name into an awkward.Array"""
+    def load_df(self, config: Config | None = None):
+        """
+        Read file_name into an awkward.Array, and open a Parquet cache of it
+        when `config.cache_dir` is set.
+
+        The cache is keyed on the identity of file_name, the branch list, the
+        types and the chunk size, and rebuilt whenever any of them changes.
+        """
         if not isabs(self.file_name):
             raise OSError
         self.df = load_ntuple(self.file_name + ":ana/OutputTree")
 
+        if config is None or config.cache_dir is None:
+            return
+        branches = sorted(config.branch_list) if config.branch_list else None
+        cache = self._cache_file(
+            config, ".parquet", branches, config.dtypes, config.iterate_step
+        )
+        if self._cache_stale(cache):
+            to_parquet_cache(self.df, cache, config, branches)
+        self.cache = load_parquet(cache)
+
+    def rse_index(self, config: Config | None = None) -> RSEIndex:
+        """
+        Build the run/subrun/event index of this sample, keeping it next to
+        the Parquet cache when `config.cache_dir` is set.
+        """
+        if self.df is None:
+            raise TypeError(f"sample {self.file_name} has not been loaded")
+
+        if config is None or config.cache_dir is None:
+            return RSEIndex.from_tree(self.df)
+        filename = self._cache_file(config, ".rse.npz")
+        if self._cache_stale(filename):
+            RSEIndex.from_tree(self.df).save(filename)
+        return RSEIndex.load(filename)
+
+    def _cache_file(self, config: Config, suffix: str, *options) -> str:
+        """
+        The cache of this sample's file in `config.cache_dir`, named after the
+        identity of the file and the `options` the cache depends on, so that
+        samples with the same file name in different directories, or a
+        rewritten file, never share a cache
+        """
+        key = fingerprint(file_identity(self.file_name), *options)[:16]
+        name = f"{Path(self.file_name).stem}-{key}{suffix}"
+        return str(config.cache_dir.absolute() / name)  # type: ignore
+
+    def _cache_stale(self, filename: str) -> bool:
+        return not isfile(filename)
+
     def _validate_(self) -> bool:
         if self.POT < 0:
             return False
@@ -234,38 +487,504 @@ class Selection:
         self.label: str = "_" + kwargs["label"] if kwargs.get("label") else ""
         self.config: Config = kwargs.get("config", Config.default())
         self.config.validate()
+        self.overlap: Overlap | None = kwargs.get("overlap")
+        self.histograms: dict[str, Histogram] = kwargs.get("histograms", {})
+        self.weights: list[str] = kwargs.get("weights", [])
+        """Branches of central-value weights applied to every event."""
+        self.universes: dict[str, Universes] = kwargs.get("universes", {})
+        """Sets of systematic universes accumulated alongside the cut flow."""
+        self.bootstrap: Bootstrap | None = kwargs.get("bootstrap")
+        """Replicas giving the statistical errors of efficiencies and purities."""
+        self.short_circuit: list[bool] | None = None
+        """
+        Which of the applied cuts are evaluated only on the events passing the
+        cuts before them, as planned when `config.plan_chunks` is set.
+        """
+        self._planner: Planner | None = None
 
     def apply_cut(self, cuts: list[Cut]):
         """
         Apply a given selection cut's cut function to the sample arrays and
         accumulates the resulting number of signal, background and total
         passing particles per cut.
+
+        When `config.checkpoint` is set the accumulated state is saved
+        periodically, and a run restarted after a failure resumes from it.
         """
+        if self.overlap is not None and not self.overlap.keys:
+            self.find_overlaps()
+
+        results = self._results()
+        self.short_circuit = None
+        self._planner = None
+        # cached results need every cut evaluated on every event
+        if self.config.plan_chunks and results is None:
+            self._planner = Planner(len(cuts), self.config.plan_chunks)
+        checkpoint = None
+        if self.config.checkpoint is not None:
+            key = self._run_key(cuts, self.samples)
+            if key is None:
+                logging.warning(
+                    "the selection cannot be fingerprinted, running without "
+                    "the checkpoint %s",
+                    self.config.checkpoint,
+                )
+            else:
+                checkpoint = self.checkpoint(self.config.checkpoint, key, cuts)
         for s in self.samples:
-            scale = self.samples.target_POT / s.POT
-            if isinstance(s.df, HasBranches):
-                for i, cut in enumerate(cuts):
-                    for arr in _yield_array_from_ttree(s.df, self.config):
-                        if s.type == SampleType.Hyperon:
-                            cut.total_signal += scale * ak.sum(
-                                signal_def(arr), axis=None
-                            )
-                        cond = np.logical_and.reduce([c(arr) for c in cuts[: i + 1]])
-                        cut.update(arr, cond, scale=scale, sample=s)
+            self._apply_sample(s, cuts, results, checkpoint=checkpoint)
+        if checkpoint is not None:
+            checkpoint.save(self.state(cuts))
+
+    def quick_look(
+        self,
+        cuts: list[Cut],
+        precision: float = 0.05,
+        confidence: float = 0.95,
+        step: int | None = None,
+        seed: int = 0,
+        min_chunks: int = 3,
+        n_boot: int = 200,
+    ) -> QuickLook:
+        """
+        Estimate the efficiency and purity after each of `cuts` from randomly
+        chosen chunks of every sample, stopping once every `confidence`
+        interval is within `precision` of its estimate, relative to it. Each
+        sample contributes at least `min_chunks` chunks before stopping.
+
+        The chunks of a TTree hold at least `step` entries (by default
+        `config.iterate_step`) and are aligned to its baskets, so that reading
+        one decompresses no baskets of others. The chunks of a Parquet cache
+        are its row groups.
+
+        The state of `cuts` and of the histograms is left untouched.
+        """
+        if self.overlap is not None and not self.overlap.keys:
+            self.find_overlaps()
+        if step is None:
+            step = self.config.iterate_step
+        branches = list(self.config.branch_list) if self.config.branch_list else None
+
+        def sample_chunks(sample: Sample) -> list[Chunk]:
+            if sample.cache is not None or sample.df is None:
+                return list(self._chunks(sample, []))
+            return list(
+                _aligned_chunks(
+                    sample.df,
+                    self.config,
+                    branches,
+                    step if isinstance(step, int) else 1,
+                )
+            )
+
+        rng = np.random.default_rng(seed)
+        chunks = [sample_chunks(s) for s in self.samples]
+        order = [(i, c) for i, sample in enumerate(chunks) for c in sample]
+        order = [order[k] for k in rng.permutation(len(order))]
+        total = sum(len(c) for _, c in order)
+        if not total:
+            raise ValueError("the samples have no entries to look at")
+
+        work = [Cut(c.name, c.cutfunc) for c in cuts]
+        rows: list[list[np.ndarray]] = [[] for _ in self.samples]
+        saved = self.histograms, self.universes, self.bootstrap
+        self.histograms, self.universes, self.bootstrap = {}, {}, None
+        done = 0
+        try:
+            for i, chunk in order:
+                sample = self.samples[i]
+                before = _flow_counts(work)
+                with chunk_scope():
+                    self._apply_chunk(
+                        sample,
+                        chunk,
+                        work,
+                        self.samples.target_POT / sample.POT,
+                        short_circuit=self.short_circuit,
+                    )
+                rows[i].append(_flow_counts(work) - before)
+                done += len(chunk)
+
+                ready = all(
+                    len(r) >= min(min_chunks, len(c)) for r, c in zip(rows, chunks)
+                )
+                if not ready:
+                    continue
+                result = self._quick_look(
+                    work, rows, chunks, confidence, n_boot, rng, done / total
+                )
+                if result.precision <= precision:
+                    result.converged = True
+                    break
+        finally:
+            self.histograms, self.universes, self.bootstrap = saved
+
+        logging.info(
+            "estimated the cut flow to %.3g from %.3g of the entries",
+            result.precision,
+            result.fraction,
+        )
+        return result
+
+    @staticmethod
+    def _quick_look(work, rows, chunks, confidence, n_boot, rng, fraction):
+        sampled = [(np.array(r), len(c)) for r, c in zip(rows, chunks) if r]
+        eff, eff_interval, pur, pur_interval = estimate(
+            [r for r, _ in sampled], [n for _, n in sampled], confidence, n_boot, rng
+        )
+        return QuickLook(
+            names=[c.name for c in work],
+            eff=eff,
+            eff_interval=eff_interval,
+            pur=pur,
+            pur_interval=pur_interval,
+            precision=max(
+                relative_precision(eff, eff_interval),
+                relative_precision(pur, pur_interval),
+            ),
+            fraction=fraction,
+            converged=False,
+        )
+
+    def _apply_sample(
+        self,
+        sample: Sample,
+        cuts: list[Cut],
+        results: ResultCache | None = None,
+        progress: Callable[[int], None] | None = None,
+        checkpoint: Checkpoint | None = None,
+    ):
+        """
+        Apply `cuts` to every chunk of one loaded sample, calling `progress`
+        with the number of events of each chunk once it is done. Chunks
+        completed according to `checkpoint` are skipped.
+        """
+        scale = self.samples.target_POT / sample.POT
+        for chunk in self._chunks(sample, self._skipping(cuts)):
+            unit = (sample.name, chunk.entry_start, chunk.entry_stop)
+            if checkpoint is not None and checkpoint.completed(*unit):
+                continue
+            with chunk_scope():
+                self._apply_chunk(
+                    sample, chunk, cuts, scale, results, self.short_circuit
+                )
+            self._plan(cuts)
+            if checkpoint is not None:
+                checkpoint.update(*unit, lambda: self.state(cuts))
+            if progress is not None:
+                progress(len(chunk))
+
+    def _plan(self, cuts: list[Cut]) -> None:
+        """Plan the evaluation of the cuts once enough chunks are measured"""
+        if self._planner is None or not self._planner.ready:
+            return
+        self.short_circuit = self._planner.plan()
+        self._planner = None
+        logging.info(
+            "evaluating %s only on the events passing the cuts before them",
+            [c.name for c, short in zip(cuts, self.short_circuit) if short],
+        )
+
+    def state(self, cuts: list[Cut]) -> dict:
+        """The accumulated state of `cuts` and of the histograms"""
+        return {
+            "cuts": [c.state() for c in cuts],
+            "histograms": {k: h.state() for k, h in self.histograms.items()},
+        }
+
+    def restore(self, state: dict, cuts: list[Cut]) -> None:
+        """Replace the state of `cuts` and of the histograms by a saved one"""
+        for cut, s in zip(cuts, state["cuts"], strict=True):
+            cut.reset()
+            cut.merge(s)
+        for k, h in self.histograms.items():
+            h.reset()
+            h.merge(state["histograms"][k])
+
+    def checkpoint(self, filename: Path, key: str, cuts: list[Cut]) -> Checkpoint:
+        """
+        Open the checkpoint kept in `filename`, restoring the state of `cuts`
+        and of the histograms if it belongs to the run identified by `key`.
+        """
+        checkpoint = Checkpoint(filename, key, self.config.checkpoint_interval)
+        state = checkpoint.load()
+        if state is not None:
+            self.restore(state, cuts)
+        return checkpoint
+
+    def _run_key(self, cuts: list[Cut], samples: list[Sample]) -> str | None:
+        """
+        Fingerprint everything deciding the state accumulated over `samples`:
+        the input files, their scaling, the chunking and the functions
+        applied, or `None` if any of them cannot be fingerprinted.
+        """
+        return cache_name(
+            [(s.name, file_identity(s.file_name), s.POT) for s in samples],
+            self.samples.target_POT,
+            self.config.iterate_step,
+            self.config.cache_dir is not None,
+            self.config.dtypes,
+            [(c.name, c.cutfunc) for c in cuts],
+            [(k, type(h).__name__, h.func, h.bins) for k, h in self.histograms.items()],
+            self.weights,
+            self.universes,
+            self.bootstrap,
+            None
+            if self.overlap is None
+            else (self.overlap.policy, self.overlap.key.func),
+        )
+
+    def _apply_chunk(
+        self,
+        sample: Sample,
+        chunk: Chunk,
+        cuts: list[Cut],
+        scale,
+        results: ResultCache | None = None,
+        short_circuit: list[bool] | None = None,
+    ):
+        """
+        Evaluate every cut on one chunk of a sample in a single pass.
+
+        When `results` is given the per-event results of `signal_def`, the
+        overlap weights and each cut are cached under their fingerprints, and
+        the chunk is only read when at least one of them is missing.
+
+        Without `results`, the cuts marked in `short_circuit` are evaluated
+        only on the events passing the cuts before them.
+        """
+        file_id = ""
+        if results is not None:
+            file_id = file_identity(sample.file_name)
+            if self.config.dtypes:
+                file_id = fingerprint(file_id, self.config.dtypes)
+        arr = None
+
+        def read() -> ak.Array:
+            nonlocal arr
+            if arr is None:
+                arr = chunk.read()
+            return arr
+
+        def evaluate(key: tuple, func: Callable[[ak.Array], ak.Array]) -> np.ndarray:
+            # results of functions capturing values that cannot be
+            # fingerprinted are never cached
+            name = None if results is None else cache_name(*key)
+            if name is not None:
+                cached = results.get(file_id, chunk.entry_start, chunk.entry_stop, name)  # type: ignore
+                if cached is not None:
+                    return cached
+            value = ak.to_numpy(ak.fill_none(func(read()), False))
+            if name is not None:
+                results.put(file_id, chunk.entry_start, chunk.entry_stop, name, value)  # type: ignore
+            return value
+
+        w = scale
+        if self.overlap is not None:
+            ov = self.overlap
+            key = (
+                ov.policy,
+                ov.key.func,
+                sample.name,
+                [file_identity(x.file_name) for x in self.samples],
+            )
+            w = scale * evaluate(key, lambda arr: ov.weights(sample.name, arr))
+
+        for branch in self.weights:
+            w = w * evaluate(("weight", branch), lambda arr: arr[branch])
+        w = np.broadcast_to(w, len(chunk))
+
+        universes = {}
+        for name, u in self.universes.items():
+            wu = w[:, None] * evaluate((u,), u)
+            universes[name] = (wu, wu**2)
+        if self.bootstrap is not None:
+            wu = w[:, None] * self.bootstrap.weights(
+                sample.name, chunk.entry_start, chunk.entry_stop
+            )
+            universes[BOOTSTRAP] = (wu, wu**2)
+
+        signal = evaluate((signal_def,), signal_def)
+        total_signal = np.sum(w * signal) if sample.type == SampleType.Hyperon else 0.0
+
+        # the number of leading cuts each event passes, in the defined order
+        if short_circuit is not None and results is None:
+            level = _first_failures(read(), cuts, short_circuit)
+        else:
+            passed = np.ones((len(chunk), len(cuts)), dtype=bool)
+            seconds = np.zeros(len(cuts))
+            for i, cut in enumerate(cuts):
+                start = time.perf_counter()
+                passed[:, i] = evaluate((cut.cutfunc,), cut)
+                seconds[i] = time.perf_counter() - start
+                cut.seconds += seconds[i]
+                cut.n_evaluated += len(chunk)
+            if self._planner is not None:
+                self._planner.measure(cuts, read(), passed, seconds)
+            level = np.sum(np.cumprod(passed, axis=1), axis=1)
+
+        for i, cut in enumerate(cuts):
+            cut.total_signal += total_signal
+            cut.update(
+                arr,
+                level > i,
+                scale=w,
+                sample=sample,
+                signal=signal,
+                universes=universes,
+            )
+
+        signal_events = signal & (sample.type == SampleType.Hyperon)
+        group = None
+        for h in self.histograms.values():
+            values = evaluate((h.func,), lambda arr: ak.fill_none(h.func(arr), np.nan))
+            if h.signal_only:
+                keep = signal_events
+                h.fill(values[keep], level[keep], w[keep], len(cuts) + 1)
+            elif h.by_group:
+                if group is None:
+                    group = self._group(sample, evaluate)
+                h.fill(values, level, w, len(cuts) + 1, group, _N_GROUPS)
             else:
-                raise TypeError(f"sample {s.file_name} has not been loaded")
+                h.fill(values, level, w, len(cuts) + 1)
+
+    @staticmethod
+    def _group(sample: Sample, evaluate) -> np.ndarray | int:
+        """
+        The <project:#StackedHistogram> group of the events of a chunk: its
+        sample type and, for simulated neutrino interactions, the category of
+        each event. Data and EXT events have no truth information and all fall
+        into <project:#EventCategory.Other>.
+        """
+        offset = sample.type.value * len(EventCategory)
+        if sample.type not in _CATEGORISED:
+            return offset + EventCategory.Other
+        return offset + evaluate((EventCategory.from_arr,), EventCategory.from_arr)
+
+    def _results(self) -> ResultCache | None:
+        """The cut result cache in use when `config.incremental` is set"""
+        if not self.config.incremental:
+            return None
+        if self.config.cache_dir is None:
+            return _MEMORY
+        return ResultCache(self.config.cache_dir.absolute() / "results")
+
+    def covariance(self, name: str, which: str = "n_signal") -> np.ndarray:
+        """
+        Covariance between the cuts of the weighted `n_passing`, `n_signal`,
+        `n_background` or `total_signal`, over the named set of universes.
+        """
+        central = np.array(
+            [np.ravel(getattr(c, which))[0] for c in self.cuts], dtype=float
+        )
+        return covariance(
+            np.stack([c.universe_counts(name, which) for c in self.cuts]), central
+        )
+
+    def check_dtypes(
+        self, dtypes: dict[str, str] = COMPACT_DTYPES, n_chunks: int | None = 1
+    ) -> dict:
+        """
+        Compare the first `n_chunks` chunks of every loaded sample as stored
+        and converted following the dtype policy `dtypes`, see
+        <project:#Config.dtypes>.
+
+        :return:
+            The `bytes` the chunks take as stored and `compact_bytes` once
+            converted, and for `signal_def` and every cut the number of events
+            whose result `changed`, which should all be zero.
+        """
+        config = dataclasses.replace(self.config, dtypes=None)
+        funcs = [("signal_def", signal_def)] + [(c.name, c.cutfunc) for c in self.cuts]
+        report = {
+            "bytes": 0,
+            "compact_bytes": 0,
+            "changed": dict.fromkeys(dict(funcs), 0),
+        }
+        for sample in self.samples:
+            for k, chunk in enumerate(self._chunks(sample, [], config)):
+                if n_chunks is not None and k >= n_chunks:
+                    break
+                arr = chunk.read()
+                small = compact(arr, dtypes)
+                report["bytes"] += arr.nbytes
+                report["compact_bytes"] += small.nbytes
+                for name, func in funcs:
+                    a, b = (
+                        ak.to_numpy(ak.fill_none(func(x), False)) for x in (arr, small)
+                    )
+                    report["changed"][name] += int(np.sum(a != b))
+
+        logging.info(
+            "compact dtypes use %d of %d bytes, changing %d cut results",
+            report["compact_bytes"],
+            report["bytes"],
+            sum(report["changed"].values()),
+        )
+        return report
+
+    def find_overlaps(self) -> None:
+        """
+        Stream the key branches of all samples to find the events shared
+        between them, which <project:#Selection.apply_cut> then excludes or
+        reweights following the <project:#Overlap> policy.
+        """
+        if self.overlap is None:
+            raise TypeError("selection has no overlap detector")
+        self.overlap.build(self.samples, self.config)
+
+    def _skipping(self, cuts: list[Cut]) -> list[Cut]:
+        """
+        The cuts whose `requires` may skip cached row groups when applying
+        `cuts`: the first of them, unless a histogram fills its first row with
+        every event rather than only signal events
+        """
+        if any(not h.signal_only for h in self.histograms.values()):
+            return []
+        return cuts[:1]
+
+    def _chunks(
+        self, sample: Sample, cuts: list[Cut], config: Config | None = None
+    ) -> Iterator[Chunk]:
+        """
+        Split a loaded sample into chunks of the branches in
+        `config.branch_list` (by default of this selection's config),
+        preferring its Parquet cache. Cached chunks are skipped when their
+        statistics show that no event can pass all of `cuts` and, for hyperon
+        samples, that no event can be signal.
+        """
+        config = self.config if config is None else config
+        if sample.cache is not None:
+            requires = [p for c in cuts for p in c.requires]
+
+            def skip(rg: "pq.RowGroupMetaData") -> bool:
+                if row_group_may_pass(rg, requires):
+                    return False
+                return sample.type != SampleType.Hyperon or not row_group_may_pass(
+                    rg, SIGNAL_REQUIRES
+                )
+
+            yield from _parquet_chunks(sample.cache, config, skip)
+        elif sample.df is not None:
+            branches = list(config.branch_list) if config.branch_list else None
+            yield from _ttree_chunks(sample.df, config, branches)
+        else:
+            raise TypeError(f"sample {sample.file_name} has not been loaded")
+
+    def plot_reco_effs(self, signal=True) -> "Figure":
+        import matplotlib.pyplot as plt
 
-    def plot_reco_effs(self, signal=True) -> None:
         pdgs = [PDG.Photon.value, PDG.Proton.value, PDG.Pi.anti, PDG.Muon.anti]
         lost = []
         counted = []
         # TODO: fix for multiple samples
 
         for s in self.samples:
-            if isinstance(s.df, HasBranches):
+            if s.df is not None:
                 arr = s.df.arrays(self.config.branch_list)
-                for pdg in pdgs:
-                    cond = ak.sum(arr["pfp_true_pdg"] == pdg, axis=1) >= 1  # type: ignore
+                found = pdg.event_bits(arr["pfp_true_pdg"])
+                for code in pdgs:
+                    cond = (found & pdg.bit(code)) != 0
                     if signal:
                         counted.append(len(arr[signal_def(arr[cond])]))
                         lost.append(len(arr[signal_def(arr[~cond])]))
@@ -282,15 +1001,17 @@ class Selection:
         ax.bar(labels, lost, label="lost", bottom=counted)
         ax.legend()
         fig.tight_layout()
-        if self.config.plot_save:
-            utils._save_plot(self.config, fig, f"particle_reco_efficiency{self.label}")
-        plt.show()
+        return plotting.finish(
+            self.config, fig, f"particle_reco_efficiency{self.label}"
+        )
 
-    def plot_eff_pur(self, exp: bool = False) -> None:
+    def plot_eff_pur(self, exp: bool = False) -> "Figure":
         """
         Plot progressive change in selection purity and efficiency as a
         function of `Cut`
         """
+        import matplotlib.pyplot as plt
+
         names: list[str] = [c.name for c in self.cuts]
         effs: list[float] = [c.eff() for c in self.cuts]
         purs: list[float] = [c.pur() for c in self.cuts]
@@ -328,11 +1049,132 @@ class Selection:
             ax.legend([e, p], ["Efficiency", "Purity"], loc="right")
 
         fig.tight_layout()
-        if self.config.plot_save:
-            utils._save_plot(self.config, fig, f"selection_performance{self.label}")
-        plt.show()
+        return plotting.finish(self.config, fig, f"selection_performance{self.label}")
+
+    def plot_efficiency(self, name: str) -> "Figure":
+        """
+        Plot the efficiency after each `Cut` as a function of the variable of
+        the <project:#EfficiencyHistogram> `name`
+        """
+        import matplotlib.pyplot as plt
+
+        hist = self.histograms[name]
+        if not isinstance(hist, EfficiencyHistogram):
+            raise TypeError(f"histogram {name} is not an EfficiencyHistogram")
+        scale = 100 if self.config.perf_percent else 1
+        centres = (hist.bins[1:] + hist.bins[:-1]) / 2
+        widths = (hist.bins[1:] - hist.bins[:-1]) / 2
+
+        fig, ax = plt.subplots()
+        ax.set_title("Selection Efficiency", loc="right", color="grey", weight="bold")
+        for cut, eff, err in zip(
+            self.cuts, hist.efficiency(), hist.efficiency_errors()
+        ):
+            ax.errorbar(
+                centres,
+                eff * scale,
+                yerr=err * scale,
+                xerr=widths,
+                fmt="o",
+                label=cut.name,
+            )
+        ax.set_xlabel(hist.label or name)
+        ax.set_ylabel(
+            "Efficiency{percent}".format(
+                percent=" [%]" if self.config.perf_percent else ""
+            )
+        )
+        ax.legend()
+        fig.tight_layout()
+        return plotting.finish(self.config, fig, f"efficiency_{name}{self.label}")
+
+    def stack(
+        self, name: str, level: int | str = -1
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """
+        The components of the stacked data/MC plot of the
+        <project:#StackedHistogram> `name` after `level` cuts, or after the
+        named cut, as `(counts, sumw2)` per bin, already scaled to the target
+        POT. The simulated neutrino samples are split by
+        <project:#EventCategory>, while the dirt, EXT and data samples each
+        make a single component.
+        """
+        hist = self.histograms[name]
+        if not isinstance(hist, StackedHistogram):
+            raise TypeError(f"histogram {name} is not a StackedHistogram")
+        if isinstance(level, str):
+            level = [c.name for c in self.cuts].index(level) + 1
+        nb = len(hist.bins) - 1
+        if len(hist.counts) == 0:
+            counts = sumw2 = np.zeros((len(SampleType), len(EventCategory), nb))
+        else:
+            shape = (len(SampleType), len(EventCategory), nb)
+            counts = hist.counts[level].reshape(shape)
+            sumw2 = hist.sumw2[level].reshape(shape)
+
+        neutrino = [SampleType.Background.value, SampleType.Hyperon.value]
+        components = {
+            c.name: (
+                counts[neutrino, c.value].sum(axis=0),
+                sumw2[neutrino, c.value].sum(axis=0),
+            )
+            for c in EventCategory
+        }
+        for t in (SampleType.Dirt, SampleType.Ext, SampleType.Data):
+            components[t.name] = (
+                counts[t.value].sum(axis=0),
+                sumw2[t.value].sum(axis=0),
+            )
+        return components
+
+    def plot_stack(self, name: str, level: int | str = -1) -> "Figure":
+        """
+        Plot the simulated components of the <project:#StackedHistogram>
+        `name` after `level` cuts stacked, with the data on top, as returned
+        by <project:#Selection.stack>
+        """
+        import matplotlib.pyplot as plt
+
+        hist = self.histograms[name]
+        components = self.stack(name, level)
+        data, data_w2 = components.pop(SampleType.Data.name)
+        centres = (hist.bins[1:] + hist.bins[:-1]) / 2
+
+        fig, ax = plt.subplots()
+        ax.set_title(
+            f"{self.samples.target_POT:.2e} POT",
+            loc="right",
+            color="grey",
+            weight="bold",
+        )
+        bottom = np.zeros(len(centres))
+        for label, (counts, _) in components.items():
+            ax.stairs(
+                counts + bottom, hist.bins, baseline=bottom, fill=True, label=label
+            )
+            bottom = bottom + counts
+        mc_err = np.sqrt(sum(w2 for _, w2 in components.values()))
+        ax.stairs(
+            bottom + mc_err,
+            hist.bins,
+            baseline=bottom - mc_err,
+            fill=True,
+            color="none",
+            hatch="///",
+            edgecolor="grey",
+            label="MC stat.",
+        )
+        if np.any(data):
+            ax.errorbar(centres, data, yerr=np.sqrt(data_w2), fmt="ko", label="Data")
+        ax.set_xlabel(hist.label or name)
+        ax.set_ylabel("Events")
+        ax.legend()
+        fig.tight_layout()
+        return plotting.finish(self.config, fig, f"stack_{name}_{level}{self.label}")
+
+    def plot_slice_info(self, type="both", signal=True) -> "Figure":
+        import matplotlib.pyplot as plt
 
-    def plot_slice_info(self, type="both", signal=True) -> None:
         if type not in ["both", "purity", "completeness"]:
             raise TypeError(
                 '''type must be one of "purity", "completeness" or "both"'''
@@ -377,9 +1219,7 @@ class Selection:
             )
 
         fig.tight_layout()
-        if self.config.plot_save:
-            utils._save_plot(self.config, fig, f"slice_info{self.label}")
-        plt.show()
+        return plotting.finish(self.config, fig, f"slice_info{self.label}")
 
     def sample_types(self) -> list[SampleType | None]:
         """List types of all samples associated with this Selection"""
@@ -396,7 +1236,7 @@ class Selection:
     def open_files(self) -> None:
         """load all samples into dataframes synchronously (for now)"""
         for sample in self.samples:
-            sample.load_df()
+            sample.load_df(self.config)
 
     def close_files(self) -> None:
         """
@@ -405,8 +1245,11 @@ class Selection:
         """
         for s in self.samples:
             del s.df  # NOTE: maybe naive; refactor when final DataFrame chosen
+            s.cache = None
 
     def cut_summary(self, header: bool = False, format: str = "text"):
+        from tabulate import tabulate
+
         def print_table(format: str = "simple"):
             headers = (
                 ["Cut name", "Signal", "Background", "Eff.", "Pur."] if header else []
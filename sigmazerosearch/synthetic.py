@@ -0,0 +1,238 @@
+"""
+Generation of synthetic HyperonProduction ntuples.
+
+The files written here mimic the `ana/OutputTree` and `ana/MetaTree` layout of
+the ntuples described in the [spec](project:#ntuples) closely enough to
+exercise the whole framework, so that the tests and benchmarks can be run
+without access to real MicroBooNE samples. The physics content is only
+loosely realistic.
+"""
+
+from dataclasses import dataclass
+
+import awkward as ak
+import numpy as np
+import uproot as up
+
+import sigmazerosearch.alg.fv as fv
+from sigmazerosearch.general import PDG
+
+_PFP_PDGS = np.array(
+    [
+        PDG.Muon.anti,
+        PDG.Muon.value,
+        PDG.Proton.value,
+        PDG.Pi.anti,
+        PDG.Pi.value,
+        PDG.Photon.value,
+        PDG.E.value,
+        0,
+    ]
+)
+_PFP_PDG_PROBS = np.array([0.15, 0.05, 0.25, 0.15, 0.1, 0.15, 0.05, 0.1])
+
+_FLAT_BRANCHES = {
+    "run": np.uint32,
+    "subrun": np.uint32,
+    "event": np.uint32,
+    "mc_nu_pdg": np.int32,
+    "mc_nu_q2": np.float64,
+    "mc_nu_pos_x": np.float64,
+    "mc_nu_pos_y": np.float64,
+    "mc_nu_pos_z": np.float64,
+    "mc_lepton_pdg": np.int32,
+    "mc_lepton_mom": np.float64,
+    "mc_hyperon_pdg": np.int32,
+    "true_nu_slice_ID": np.int32,
+    "true_nu_slice_completeness": np.float64,
+    "true_nu_slice_purity": np.float64,
+    "n_slices": np.int32,
+    "flash_match_nu_slice_ID": np.int32,
+    "pandora_nu_slice_ID": np.int32,
+    "reco_primary_vtx_x": np.float64,
+    "reco_primary_vtx_y": np.float64,
+    "reco_primary_vtx_z": np.float64,
+    "reco_primary_vtx_inFV": np.bool_,
+}
+
+_JAGGED_BRANCHES = {
+    "mc_decay_pdg": "var * int32",
+    "pfp_true_pdg": "var * int32",
+    "pfp_trk_shr_score": "var * float64",
+    "pfp_purity": "var * float64",
+    "pfp_completeness": "var * float64",
+    "trk_llrpid": "var * float64",
+    "trk_length": "var * float64",
+    "trk_start_x": "var * float64",
+    "trk_start_y": "var * float64",
+    "trk_start_z": "var * float64",
+    "trk_three_plane_mean_dedx": "var * float64",
+    "trk_dir_x": "var * float64",
+    "trk_dir_y": "var * float64",
+    "trk_dir_z": "var * float64",
+    "trk_mom_proton": "var * float64",
+    "trk_mom_pion": "var * float64",
+    "shr_dir_x": "var * float64",
+    "shr_dir_y": "var * float64",
+    "shr_dir_z": "var * float64",
+    "shr_energy": "var * float64",
+}
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """
+    Distributions used when generating synthetic events.
+
+    The defaults resemble an enriched hyperon sample; lower `hyperon_fraction`
+    for something closer to an inclusive background sample.
+    """
+
+    hyperon_fraction: float = 0.5
+    """Fraction of events with a hyperon, of which half are Sigma0."""
+    mean_pfps: float = 4.0
+    """Mean of the Poisson-distributed number of PFPs per event."""
+    track_fraction: float = 0.6
+    """Probability of a PFP being track-like."""
+    no_reco_fraction: float = 0.05
+    """Fraction of events without a reconstructed neutrino vertex."""
+    events_per_subrun: int = 50
+    pot_per_subrun: float = 1e18
+
+
+def generate_events(
+    n: int, rng: np.random.Generator, spec: SyntheticSpec = SyntheticSpec(), first=0
+) -> dict[str, np.ndarray | ak.Array]:
+    """Generate `n` events as a dictionary of branch name to array"""
+    event = np.arange(first, first + n)
+    out: dict[str, np.ndarray | ak.Array] = {
+        "run": np.full(n, 15000, dtype=np.uint32),
+        "subrun": (event // spec.events_per_subrun).astype(np.uint32),
+        "event": event.astype(np.uint32),
+    }
+
+    # truth information
+    nu_pdg = rng.choice(
+        [PDG.NuMu.anti, PDG.NuMu.value, PDG.NuE.anti, PDG.NuE.value],
+        size=n,
+        p=[0.7, 0.2, 0.05, 0.05],
+    )
+    cc = rng.random(n) < 0.75
+    lepton = np.where(cc, np.sign(nu_pdg) * (np.abs(nu_pdg) - 1), nu_pdg)
+    hyperon = np.where(
+        rng.random(n) < spec.hyperon_fraction,
+        rng.choice([PDG.Sigma0.value, PDG.Lambda.value], size=n),
+        0,
+    )
+    # Lambda -> p pi- (or n pi0), plus the photon of Sigma0 -> Lambda gamma
+    charged = rng.random(n) < 0.64
+    decays = np.stack(
+        [
+            np.where(charged, PDG.Proton.value, PDG.Neutron.value),
+            np.where(charged, PDG.Pi.anti, PDG.Pi0.value),
+            np.full(n, PDG.Photon.value),
+        ],
+        axis=1,
+    )
+    n_decays = np.where(hyperon == 0, 0, np.where(hyperon == PDG.Sigma0, 3, 2))
+    decays = decays[np.arange(3) < n_decays[:, None]].astype(np.int32)
+    pos = [rng.uniform(lo - 20, hi + 20, n) for lo, hi in (fv.FV_x, fv.FV_y, fv.FV_z)]
+    out |= {
+        "mc_nu_pdg": nu_pdg.astype(np.int32),
+        "mc_nu_q2": rng.exponential(0.5, n),
+        "mc_nu_pos_x": pos[0],
+        "mc_nu_pos_y": pos[1],
+        "mc_nu_pos_z": pos[2],
+        "mc_lepton_pdg": lepton.astype(np.int32),
+        "mc_lepton_mom": rng.exponential(1.0, n),
+        "mc_hyperon_pdg": hyperon.astype(np.int32),
+        "mc_decay_pdg": ak.unflatten(decays, n_decays),
+    }
+
+    # slices
+    has_slice = rng.random(n) > spec.no_reco_fraction
+    n_slices = rng.integers(1, 4, n)
+    out |= {
+        "true_nu_slice_ID": np.where(has_slice, rng.integers(0, n_slices), -1).astype(
+            np.int32
+        ),
+        "true_nu_slice_completeness": np.where(has_slice, rng.random(n), -999.0),
+        "true_nu_slice_purity": np.where(has_slice, rng.random(n), -999.0),
+        "n_slices": n_slices.astype(np.int32),
+        "flash_match_nu_slice_ID": rng.integers(0, n_slices).astype(np.int32),
+        "pandora_nu_slice_ID": rng.integers(0, n_slices).astype(np.int32),
+    }
+
+    # reconstructed vertex, smeared from the truth or missing
+    vtx = [np.where(has_slice, p + rng.normal(0, 2.0, n), -999.0) for p in pos]
+    out |= {
+        "reco_primary_vtx_x": vtx[0],
+        "reco_primary_vtx_y": vtx[1],
+        "reco_primary_vtx_z": vtx[2],
+        "reco_primary_vtx_inFV": np.asarray(fv.in_active_tpc(*vtx), dtype=np.bool_),
+    }
+
+    # PFPs, with a track for each one
+    counts = np.where(has_slice, rng.poisson(spec.mean_pfps, n), 0)
+    total = int(counts.sum())
+    is_track = rng.random(total) < spec.track_fraction
+    score = np.where(is_track, rng.uniform(0.5, 1.0, total), rng.uniform(0, 0.5, total))
+    starts = [np.repeat(v, counts) + rng.normal(0, 3.0, total) for v in vtx]
+
+    def jagged(flat):
+        return ak.unflatten(flat, counts)
+
+    out |= {
+        "pfp_true_pdg": jagged(
+            rng.choice(_PFP_PDGS, size=total, p=_PFP_PDG_PROBS).astype(np.int32)
+        ),
+        "pfp_trk_shr_score": jagged(score),
+        "pfp_purity": jagged(rng.random(total)),
+        "pfp_completeness": jagged(rng.random(total)),
+        "trk_llrpid": jagged(rng.uniform(-1, 1, total)),
+        "trk_length": jagged(rng.exponential(30.0, total)),
+        "trk_start_x": jagged(starts[0]),
+        "trk_start_y": jagged(starts[1]),
+        "trk_start_z": jagged(starts[2]),
+        "trk_three_plane_mean_dedx": jagged(rng.gamma(2.0, 1.5, total)),
+    }
+
+    # reconstructed momenta and directions, drawn after everything else so
+    # that the branches above do not depend on them
+    direction = rng.normal(size=(total, 3))
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    mom = rng.exponential(0.3, total)
+    out |= {f"trk_dir_{c}": jagged(direction[:, i]) for i, c in enumerate("xyz")}
+    out |= {f"shr_dir_{c}": jagged(direction[:, i]) for i, c in enumerate("xyz")}
+    out |= {
+        "trk_mom_proton": jagged(mom),
+        "trk_mom_pion": jagged(0.9 * mom),
+        "shr_energy": jagged(rng.exponential(0.1, total)),
+    }
+
+    return out
+
+
+def write_ntuple(
+    filename: str,
+    n_events: int,
+    spec: SyntheticSpec = SyntheticSpec(),
+    seed: int | None = None,
+    chunk_size: int = 100_000,
+) -> float:
+    """
+    Write a synthetic ntuple of `n_events` events with `ana/OutputTree` and
+    `ana/MetaTree` trees, returning its total POT.
+    """
+    rng = np.random.default_rng(seed)
+    with up.recreate(filename) as fd:
+        fd.mktree("ana/OutputTree", _FLAT_BRANCHES | _JAGGED_BRANCHES)
+        for first in range(0, n_events, chunk_size):
+            n = min(chunk_size, n_events - first)
+            fd["ana/OutputTree"].extend(generate_events(n, rng, spec, first))
+
+        n_subruns = max(-(-n_events // spec.events_per_subrun), 1)
+        fd.mktree("ana/MetaTree", {"POT": np.float64})
+        fd["ana/MetaTree"].extend({"POT": np.full(n_subruns, spec.pot_per_subrun)})
+
+    return n_subruns * spec.pot_per_subrun
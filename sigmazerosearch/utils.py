@@ -3,40 +3,28 @@ Mixed utility functions.
 """
 
 import logging
-import pathlib
 import sys
+from typing import TYPE_CHECKING
 
 import awkward as ak
 import numpy as np
-import vector
-from matplotlib.figure import Figure
-
-from sigmazerosearch.general import Config
-
-
-def _save_plot(config: Config, fig: Figure, title: str):
-    if isinstance(config.plot_format, list):
-        for format in config.plot_format:
-            fig.savefig(
-                pathlib.Path(config.plot_dir / f"{title}.{format}"),
-                dpi=300,
-                bbox_inches="tight",
-            )
-            logging.info(
-                "saved plot to %s", pathlib.Path(config.plot_dir / f"{title}.{format}")
-            )
-    else:
-        fig.savefig(
-            pathlib.Path(config.plot_dir / f"{title}.{config.plot_format}"),
-            dpi=300,
-            bbox_inches="tight",
-        )
-        logging.info(
-            "saved plot to %s",
-            pathlib.Path(config.plot_dir / f"{title}.{config.plot_format}"),
-        )
 
+from sigmazerosearch.derived import derived
+from sigmazerosearch.index import pack_rse
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+_RSE_FIELDS = ("run", "subrun", "event")
+
+
+def _rse_csv_write():
+    import pyarrow.csv as csv
 
+    return csv.WriteOptions(include_header=False, delimiter=" ", quoting_style="none")
+
+
+@derived
 def npfp(arr, opt: str | None = None) -> ak.Array:
     """
     Returns the number of pfps in the given array that are either track-like,
@@ -55,11 +43,14 @@ def npfp(arr, opt: str | None = None) -> ak.Array:
         raise TypeError
 
 
+@derived
 def displacement(arr, x_i, y_i, z_i) -> ak.Array:
     """
     Compute displacement array from given `x,y,z` array indices to
     `reco_primary_vtx` equivalents.
     """
+    import vector
+
     v = vector.zip(
         {
             "x": arr["reco_primary_vtx_x"],
@@ -90,6 +81,7 @@ def separation(
     Compute the separation between two <inv:#ak.Array> subsets using the
     partial field name `index` + `suffixes`.
     """
+    import vector
 
     v = vector.zip(
         {
@@ -112,19 +104,30 @@ def separation(
     return res.mask[ak.num(res) != 0]
 
 
-def filter_by_rse(arr: ak.Array, run: int, subrun: int, event: int) -> ak.Array:
+def filter_by_rse(arr: ak.Array, run, subrun, event) -> ak.Array:
     """
     Takes an array and either three numbers corresponding to run, subrun, event
-    numbers or a list of such numbers
+    numbers or three equal-length lists of such numbers, keeping the matching
+    events.
     """
-    cond = np.logical_and.reduce(
-        (
-            arr["run"] == run,
-            arr["subrun"] == subrun,
-            arr["event"] == event,
+    try:
+        keys = pack_rse(arr["run"], arr["subrun"], arr["event"])
+        wanted = pack_rse(run, subrun, event)
+    except ValueError:
+        # numbers beyond the widths of the packed keys, e.g. negative sentinels
+        keys = _rse_rows(arr["run"], arr["subrun"], arr["event"])
+        wanted = _rse_rows(run, subrun, event)
+    return arr[np.isin(keys, wanted)]  # type: ignore
+
+
+def _rse_rows(run, subrun, event) -> np.ndarray:
+    """Run, subrun and event numbers as one opaque, comparable value per event"""
+    rows = np.ascontiguousarray(
+        np.column_stack(
+            [np.atleast_1d(np.asarray(x, dtype=np.int64)) for x in (run, subrun, event)]
         )
     )
-    return arr[cond]  # type: ignore
+    return rows.view(np.dtype((np.void, rows.itemsize * 3))).ravel()
 
 
 def print_rse(arr: ak.Array, file=sys.stdout):
@@ -133,11 +136,70 @@ def print_rse(arr: ak.Array, file=sys.stdout):
     parameter can be used to pipe this output to a file (useful for filtering
     upstream).
     """
-    for elem in arr:
-        print(f"{elem.run} {elem.subrun} {elem.event}", file=file)  # type: ignore
+    import pyarrow as pa
+    import pyarrow.csv as csv
+
+    buf = pa.BufferOutputStream()
+    csv.write_csv(_rse_table(arr), buf, _rse_csv_write())
+    file.write(buf.getvalue().to_pybytes().decode())
     logging.info(f"output rse numbers for {len(arr)} events to {file.name}")
 
 
+def write_rse(arr: ak.Array, filename: str):
+    """
+    Write the `run`, `subrun` and `event` columns of `arr` in bulk. The format
+    follows the extension of `filename`: `.npy` for an `N x 3` array,
+    `.parquet` for a three-column table, otherwise `run subrun event` lines as
+    printed by <project:#print_rse>.
+    """
+    import pyarrow.csv as csv
+    import pyarrow.parquet as pq
+
+    table = _rse_table(arr)
+    if filename.endswith(".npy"):
+        np.save(filename, np.column_stack([c.to_numpy() for c in table.columns]))
+    elif filename.endswith(".parquet"):
+        pq.write_table(table, filename)
+    else:
+        csv.write_csv(table, filename, _rse_csv_write())
+    logging.info(f"output rse numbers for {len(arr)} events to {filename}")
+
+
+def read_rse(filename: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Read a list of events written by <project:#write_rse> (or by upstream
+    tools in the same formats) into run, subrun and event arrays, ready to be
+    passed to <project:#filter_by_rse> or <project:#RSEIndex.find>.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as csv
+    import pyarrow.parquet as pq
+
+    if filename.endswith(".npy"):
+        rse = np.load(filename)
+        return rse[:, 0], rse[:, 1], rse[:, 2]
+
+    if filename.endswith(".parquet"):
+        table = pq.read_table(filename, columns=list(_RSE_FIELDS))
+    else:
+        table = csv.read_csv(
+            filename,
+            read_options=csv.ReadOptions(column_names=list(_RSE_FIELDS)),
+            parse_options=csv.ParseOptions(delimiter=" "),
+            convert_options=csv.ConvertOptions(
+                column_types={k: pa.int64() for k in _RSE_FIELDS}
+            ),
+        )
+    run, subrun, event = (table[k].to_numpy() for k in _RSE_FIELDS)
+    return run, subrun, event
+
+
+def _rse_table(arr: ak.Array) -> "pa.Table":
+    import pyarrow as pa
+
+    return pa.table({k: np.asarray(arr[k]) for k in _RSE_FIELDS})
+
+
 def file_ok(filename: str, mode: str = "read") -> bool:
     """
     Test file for read/write availability and convert Exceptions to boolean.
@@ -0,0 +1,84 @@
+"""
+Per-event weights and systematic universes.
+
+Besides the POT scaling of each sample, events may carry central-value weights
+(e.g. spline and tune weights) and sets of alternative weights, one per
+systematic universe (e.g. multisim flux or cross-section universes). The cut
+flow accumulates the weighted counts of every universe in the same pass as the
+nominal counts, from which the covariance of the selected numbers follows.
+
+Statistical uncertainties are estimated the same way, with Poisson-bootstrap
+replicas of the samples in place of the universes.
+"""
+
+from dataclasses import dataclass
+
+import awkward as ak
+import numpy as np
+
+from sigmazerosearch.fingerprint import fingerprint
+from sigmazerosearch.overlap import _finalise
+
+BOOTSTRAP = "bootstrap"
+"""Name under which the bootstrap replicas are accumulated by a cut."""
+
+# CDF of a Poisson distribution of mean one, to well beyond double precision
+_POISSON_CDF = np.cumsum(
+    np.exp(-1.0) * np.cumprod([1.0] + [1.0 / k for k in range(1, 24)])
+)
+
+
+@dataclass(frozen=True)
+class Universes:
+    """
+    A branch holding `n` alternative weights for each event, stored either as
+    a jagged or as a fixed-size array. Universes missing from an event get a
+    weight of one, any beyond `n` are ignored.
+    """
+
+    branch: str
+    n: int
+
+    def __call__(self, arr: ak.Array) -> np.ndarray:
+        return universe_matrix(arr[self.branch], self.n)
+
+
+@dataclass(frozen=True)
+class Bootstrap:
+    """
+    `n` Poisson-bootstrap replicas of every sample, where each event enters
+    each replica with a weight drawn from a Poisson distribution of mean one.
+
+    The weights come from a counter-based generator: they are a hash of the
+    `seed`, the sample name, the entry number and the replica number, so they
+    do not depend on how a sample is split into chunks or between workers.
+    """
+
+    n: int = 100
+    seed: int = 0
+
+    def weights(self, sample: str, entry_start: int, entry_stop: int) -> np.ndarray:
+        """The `(events, n)` replica weights of a range of entries of a sample"""
+        key = np.uint64(int(fingerprint(self.seed, sample)[:16], 16))
+        entries = np.arange(entry_start, entry_stop, dtype=np.uint64)
+        counter = entries[:, None] * np.uint64(self.n) + np.arange(
+            self.n, dtype=np.uint64
+        )
+        bits = _finalise(_finalise(counter) ^ key)
+        uniform = (bits >> np.uint64(11)).astype(float) * 2.0**-53
+        return np.searchsorted(_POISSON_CDF, uniform, side="right").astype(float)
+
+
+def universe_matrix(values: ak.Array, n: int) -> np.ndarray:
+    """Regularise per-event universe weights into an `(events, n)` array"""
+    values = ak.fill_none(ak.pad_none(values, n, axis=1, clip=True), 1.0)
+    return ak.to_numpy(values).astype(float)
+
+
+def covariance(universes: np.ndarray, central: np.ndarray) -> np.ndarray:
+    """
+    Covariance of `k` quantities, given their values in each of `n` universes
+    as a `(k, n)` array, about their `k` central values.
+    """
+    d = universes - central[:, None]
+    return d @ d.T / universes.shape[1]
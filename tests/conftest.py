@@ -0,0 +1,85 @@
+import awkward as ak
+import numpy as np
+import pytest
+import uproot as up
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.selection import Sample, SampleSet, SampleType
+from sigmazerosearch.synthetic import write_ntuple
+
+
+@pytest.fixture(scope="session")
+def ntuple_file(tmp_path_factory):
+    """A synthetic hyperon ntuple shared by the whole test session"""
+    filename = str(tmp_path_factory.mktemp("ntuples") / "hyperon.root")
+    write_ntuple(filename, 1000, seed=2024)
+    return filename
+
+
+@pytest.fixture(
+    params=[
+        (0, 100),
+        (100, 125),
+    ]
+)
+def event_sample(request, ntuple_file):
+    entry_low, entry_high = request.param
+    with up.open(ntuple_file) as fd:
+        return fd.get("ana/OutputTree").arrays(
+            entry_start=entry_low, entry_stop=entry_high
+        )
+
+
+def write_sample(filename, events, signal):
+    n = len(events)
+    with up.recreate(filename) as fd:
+        fd.mktree(
+            "ana/OutputTree",
+            {
+                "run": np.uint32,
+                "subrun": np.uint32,
+                "event": np.uint32,
+                "mc_nu_pdg": np.int32,
+                "mc_hyperon_pdg": np.int32,
+                "mc_lepton_pdg": np.int32,
+                "mc_nu_q2": np.float64,
+                "mc_nu_pos_x": np.float64,
+                "mc_nu_pos_y": np.float64,
+                "mc_nu_pos_z": np.float64,
+                "mc_decay_pdg": "var * int32",
+            },
+        )
+        fd["ana/OutputTree"].extend(
+            {
+                "run": np.ones(n, dtype=np.uint32),
+                "subrun": np.ones(n, dtype=np.uint32),
+                "event": np.array(events, dtype=np.uint32),
+                "mc_nu_pdg": np.full(n, -14, dtype=np.int32),
+                "mc_hyperon_pdg": np.where(signal, 3212, 0).astype(np.int32),
+                "mc_lepton_pdg": np.full(n, -13, dtype=np.int32),
+                "mc_nu_q2": np.full(n, 0.25),
+                "mc_nu_pos_x": np.full(n, 100.0),
+                "mc_nu_pos_y": np.zeros(n),
+                "mc_nu_pos_z": np.full(n, 500.0),
+                "mc_decay_pdg": ak.Array([[2212, -211]] * n),
+            }
+        )
+        fd["ana/MetaTree"] = {"POT": np.array([1e20])}
+
+
+@pytest.fixture
+def samples(tmp_path):
+    write_sample(tmp_path / "hyperon.root", [1, 2, 3, 4], [True, True, True, False])
+    write_sample(
+        tmp_path / "bkg.root", [3, 4, 5, 6, 6], [True, False, False, False, False]
+    )
+    return SampleSet(
+        Sample("hyperon", str(tmp_path / "hyperon.root"), SampleType.Hyperon, 1e20),
+        Sample("bkg", str(tmp_path / "bkg.root"), SampleType.Background, 1e20),
+        target_POT=1e20,
+    )
+
+
+@pytest.fixture
+def config():
+    return Config(iterate=True, iterate_step=2)
@@ -0,0 +1,111 @@
+import logging
+
+import numpy as np
+import pytest
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.histogram import Histogram
+from sigmazerosearch.selection import Cut, Selection
+
+
+def test_Histogram():
+    h = Histogram(lambda arr: arr["event"], [0, 2, 4, 6])
+    values = np.array([1.0, 3.0, 3.0, 6.0, 7.0, np.nan])
+    level = np.array([0, 1, 2, 2, 2, 2])
+    h.fill(values, level, 2.0, 3)
+
+    assert h.counts.tolist() == [[2, 4, 2], [0, 4, 2], [0, 2, 2]]
+    assert h.sumw2.tolist() == [[4, 8, 4], [0, 8, 4], [0, 4, 4]]
+
+    other = Histogram(h.func, h.bins)
+    other.merge(h.state())
+    other.merge(h.state())
+    assert np.array_equal(other.counts, 2 * h.counts)
+
+
+class Crash:
+    """A cut failing on its n-th call while armed, with a constant fingerprint"""
+
+    def __init__(self, n):
+        self.n = n
+        self.calls = 0
+
+    def __call__(self, arr):
+        self.calls += 1
+        if self.calls == self.n:
+            raise RuntimeError("crash")
+        return arr["event"] > 2
+
+    def __fingerprint__(self):
+        return "Crash"
+
+
+def run(samples, tmp_path, crash):
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("a", lambda arr: arr["run"] == 1), Cut("b", crash)],
+        histograms={"event": Histogram(lambda arr: arr["event"], np.arange(0, 8))},
+        config=Config(
+            iterate=True,
+            iterate_step=2,
+            checkpoint=tmp_path / "checkpoint.json",
+            checkpoint_interval=0,
+        ),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+    return sel
+
+
+def test_checkpoint(samples, tmp_path):
+    # 5 chunks of 2 entries over the two samples
+    with pytest.raises(RuntimeError):
+        run(samples, tmp_path, Crash(4))
+
+    crash = Crash(0)
+    resumed = run(samples, tmp_path, crash)
+    assert crash.calls == 2
+
+    (tmp_path / "checkpoint.json").unlink()
+    full = run(samples, tmp_path, Crash(0))
+    for a, b in zip(resumed.cuts, full.cuts):
+        assert a.state() == b.state()
+    assert np.array_equal(
+        resumed.histograms["event"].counts, full.histograms["event"].counts
+    )
+    assert full.cuts[1].n_passing[0] == 7
+    assert full.histograms["event"].counts[2].tolist() == [0, 0, 0, 2, 2, 1, 2]
+
+
+def test_checkpoint_other_run(samples, tmp_path):
+    run(samples, tmp_path, Crash(0))
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("a", lambda arr: arr["run"] == 2)],
+        config=Config(checkpoint=tmp_path / "checkpoint.json"),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+    assert sel.cuts[0].n_passing[0] == 0
+
+
+def test_checkpoint_unfingerprintable(samples, tmp_path, caplog):
+    log = logging.getLogger("cut")
+
+    def cutfunc(arr):
+        log.debug("cutting %d events", len(arr))
+        return arr["event"] > 2
+
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("a", cutfunc)],
+        config=Config(checkpoint=tmp_path / "checkpoint.json"),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+    assert sel.cuts[0].n_passing[0] == 7
+    assert not (tmp_path / "checkpoint.json").exists()
+    assert "without the checkpoint" in caplog.text
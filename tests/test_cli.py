@@ -0,0 +1,127 @@
+import json
+
+import numpy as np
+import pytest
+
+from sigmazerosearch.cli import main
+
+MODULE = """
+from sigmazerosearch.general import Config
+from sigmazerosearch.histogram import Histogram
+from sigmazerosearch.selection import Cut, Sample, SampleSet, SampleType, Selection
+
+selection = Selection(
+    cuts=[
+        Cut("pdg", lambda arr: arr["mc_nu_pdg"] == -14),
+        Cut("hyperon", lambda arr: arr["mc_hyperon_pdg"] == 3212),
+    ],
+    samples=SampleSet(
+        Sample("hyperon", {hyperon!r}, SampleType.Hyperon, 1e20),
+        Sample("bkg", {bkg!r}, SampleType.Background, 1e20),
+        target_POT=1e20,
+    ),
+    params=None,
+    histograms={{"event": Histogram(lambda arr: arr["event"], range(8))}},
+    config=Config(iterate=True, iterate_step=2),
+)
+"""
+
+
+@pytest.fixture
+def module(tmp_path, samples):
+    filename = tmp_path / "nominal.py"
+    filename.write_text(
+        MODULE.format(hyperon=samples[0].file_name, bkg=samples[1].file_name)
+    )
+    return str(filename)
+
+
+def test_run(tmp_path, module):
+    output = tmp_path / "output"
+    assert main(["run", module, "-o", str(output), "-j", "2", "-q"]) == 0
+
+    cutflow = np.load(output / "cutflow.npz")
+    assert cutflow["cuts"].tolist() == ["pdg", "hyperon"]
+    assert cutflow["samples"].tolist() == ["hyperon", "bkg"]
+    assert cutflow["n_signal"].tolist() == [[3, 3], [0, 0]]
+    assert cutflow["n_background"].tolist() == [[1, 0], [4, 0]]
+
+    histograms = np.load(output / "histograms.npz")
+    assert histograms["event_counts"][0].tolist() == [0, 1, 1, 2, 2, 1, 2]
+
+    timing = json.loads((output / "timing.json").read_text())
+    assert timing["events"] == 9
+    assert [u["events"] for u in timing["units"]] == [4, 5]
+    assert "Cut name" in (output / "cut_summary.txt").read_text()
+    assert (output / "selection_performance.png").is_file()
+
+
+def test_resume(tmp_path, module):
+    output = tmp_path / "output"
+    main(["run", module, "-o", str(output), "-j", "1", "-q"])
+    units = sorted((output / "units").iterdir())
+    assert len(units) == 2
+
+    # lose one unit, as if the run crashed before it finished
+    units[0].unlink()
+    before = {u.name: u.stat().st_mtime_ns for u in units[1:]}
+    main(["run", module, "-o", str(output), "-j", "1", "-q", "--resume"])
+
+    assert sorted((output / "units").iterdir()) == units
+    assert {u.name: u.stat().st_mtime_ns for u in units[1:]} == before
+    cutflow = np.load(output / "cutflow.npz")
+    assert cutflow["n_signal"].tolist() == [[3, 3], [0, 0]]
+
+
+def test_run_overlap(tmp_path, samples):
+    filename = tmp_path / "overlap.py"
+    filename.write_text(
+        MODULE.format(hyperon=samples[0].file_name, bkg=samples[1].file_name)
+        + """
+from sigmazerosearch.overlap import Overlap
+
+selection.overlap = Overlap()
+"""
+    )
+    output = tmp_path / "output"
+    assert main(["run", str(filename), "-o", str(output), "-j", "2", "-q"]) == 0
+
+    # built once and shared by the workers
+    assert (output / "units" / "overlap.npz").is_file()
+    cutflow = np.load(output / "cutflow.npz")
+    # events 3 and 4 of the background are counted in the hyperon sample
+    assert cutflow["n_background"].tolist() == [[1, 0], [3, 0]]
+
+
+def test_run_unfingerprintable(tmp_path, samples):
+    filename = tmp_path / "logged.py"
+    filename.write_text(
+        MODULE.format(hyperon=samples[0].file_name, bkg=samples[1].file_name)
+        + """
+import logging
+
+log = logging.getLogger("cut")
+
+
+def logged(arr):
+    log.debug("cutting %d events", len(arr))
+    return arr["event"] > 2
+
+
+selection.cuts.append(Cut("logged", logged))
+"""
+    )
+    output = tmp_path / "output"
+    assert main(["run", str(filename), "-o", str(output), "-j", "1", "-q"]) == 0
+
+    cutflow = np.load(output / "cutflow.npz")
+    assert cutflow["n_signal"].tolist() == [[3, 3, 1], [0, 0, 0]]
+    assert not list((output / "units").iterdir())
+
+
+@pytest.mark.parametrize("option", [["-j", "0"], ["-j", "-2"], ["--step", "0"]])
+def test_run_invalid(tmp_path, module, option, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(["run", module, "-o", str(tmp_path / "out"), *option])
+    assert exc.value.code == 2
+    assert "must be at least 1" in capsys.readouterr().err
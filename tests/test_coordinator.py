@@ -0,0 +1,85 @@
+import pytest
+
+from sigmazerosearch.coordinator import Coordinator
+from sigmazerosearch.general import Config
+from sigmazerosearch.selection import Cut, Selection
+
+
+class CountingTree:
+    """Delegates to a TTree, counting the calls reading entries"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.reads = 0
+
+    def arrays(self, *args, **kwargs):
+        self.reads += 1
+        return self.tree.arrays(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.tree, name)
+
+
+TRUTH = [
+    "mc_nu_pdg",
+    "mc_hyperon_pdg",
+    "mc_nu_pos_x",
+    "mc_nu_pos_y",
+    "mc_nu_pos_z",
+    "mc_decay_pdg",
+]
+
+
+def make_selections(samples):
+    def sel(threshold, branches):
+        return Selection(
+            params=None,
+            samples=samples,
+            cuts=[
+                Cut("run", lambda arr: arr["run"] == 1),
+                Cut("event", lambda arr: arr["event"] > threshold),
+            ],
+            config=Config(iterate=True, iterate_step=2, branch_list=branches),
+        )
+
+    return sel(2, ["run", "event", *TRUTH]), sel(4, ["run", "mc_nu_q2", *TRUTH])
+
+
+def test_Coordinator(samples):
+    coord = Coordinator(*make_selections(samples))
+    assert coord.config.branch_list == sorted(["run", "event", "mc_nu_q2", *TRUTH])
+
+    coord.open_files()
+    trees = [CountingTree(s.df) for s in samples]
+    for s, tree in zip(samples, trees):
+        s.df = tree
+    coord.apply_cut()
+
+    # 2 + 3 chunks, each read once for both selections
+    assert [t.reads for t in trees] == [2, 3]
+
+    separate = make_selections(samples)
+    for sel in separate:
+        sel.config.branch_list = coord.config.branch_list
+        sel.apply_cut(sel.cuts)
+    for a, b in zip(coord.selections, separate):
+        assert [c.state() for c in a.cuts] == [c.state() for c in b.cuts]
+    assert coord.selections[0].cuts[1].n_passing[0] == 7
+    assert coord.selections[1].cuts[1].n_passing[0] == 3
+
+
+def test_Coordinator_shared_cuts(samples):
+    a, b = make_selections(samples)
+    b.cuts = a.cuts
+    with pytest.raises(ValueError):
+        Coordinator(a, b)
+
+
+@pytest.mark.parametrize(
+    "option, value", [("iterate_step", 3), ("dtypes", {"event": "int32"})]
+)
+def test_Coordinator_chunking(samples, option, value):
+    a, b = make_selections(samples)
+    setattr(b.config, option, value)
+    with pytest.raises(ValueError, match=option):
+        Coordinator(a, b)
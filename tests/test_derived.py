@@ -0,0 +1,69 @@
+import awkward as ak
+
+from sigmazerosearch.derived import cached, chunk_scope, derived
+from sigmazerosearch.general import Config
+from sigmazerosearch.selection import Cut, Selection
+
+calls: list[int] = []
+
+
+@derived
+def n_events(arr, offset=0):
+    calls.append(len(arr))
+    return ak.num(arr, axis=0) + offset
+
+
+@derived
+def weighted(arr, weights):
+    calls.append(len(arr))
+    return len(arr) * sum(weights)
+
+
+def test_derived():
+    calls.clear()
+    arr = ak.Array([1, 2, 3])
+    assert n_events(arr) == 3
+    assert n_events(arr) == 3
+    assert len(calls) == 2, "only memoised within a scope"
+
+    calls.clear()
+    with chunk_scope():
+        assert n_events(arr) == 3
+        assert n_events(arr) == 3
+        assert n_events(arr, 1) == 4
+        with chunk_scope():
+            assert n_events(arr) == 3
+        assert n_events(ak.Array([1])) == 1
+        assert cached() == 3
+    assert calls == [3, 3, 1]
+    assert cached() == 0
+
+    calls.clear()
+    with chunk_scope():
+        # unhashable arguments are passed through
+        assert weighted(arr, [1, 2]) == 9
+        assert weighted(arr, weights=[1, 2]) == 9
+        assert weighted(arr, (1, 2)) == 9
+        assert weighted(arr, (1, 2)) == 9
+        assert cached() == 1
+    assert calls == [3, 3, 3]
+
+
+def test_Selection_derived(samples):
+    def cut(arr):
+        calls.append(len(arr))
+        return arr["event"] > n_events(arr, -1)
+
+    calls.clear()
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("a", cut), Cut("b", lambda arr: n_events(arr) > 0)],
+        config=Config(iterate=True, iterate_step=2),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+    # 2 + 3 chunks, each computing the derived quantity once per argument
+    assert len(calls) == 3 * 5
+    assert sel.cuts[0].n_passing[0] == 8
+    assert cached() == 0
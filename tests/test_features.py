@@ -0,0 +1,82 @@
+import awkward as ak
+import numpy as np
+import pytest
+
+from sigmazerosearch.features import PFP_FEATURES, export_features
+from sigmazerosearch.general import Config
+from sigmazerosearch.index import pack_rse
+from sigmazerosearch.loader import load_ntuple
+
+
+@pytest.fixture
+def tree(ntuple_file):
+    return load_ntuple(ntuple_file + ":ana/OutputTree")
+
+
+def test_export_features_npy(tree, tmp_path):
+    filename = tmp_path / "pfp.npy"
+    rows = export_features(tree, filename, Config(iterate=True, iterate_step=300))
+
+    arr = tree.arrays()
+    X = np.load(filename, mmap_mode="r")
+    assert X.dtype == np.float32
+    assert (
+        X.shape == (rows, len(PFP_FEATURES)) == (ak.sum(ak.num(arr["trk_llrpid"])), 8)
+    )
+    assert np.array_equal(
+        X[:, 1], ak.to_numpy(ak.flatten(arr["trk_llrpid"])).astype(np.float32)
+    )
+
+    labels = np.load(tmp_path / "pfp.labels.npy")
+    assert labels[:, 0].tolist() == ak.flatten(arr["pfp_true_pdg"]).tolist()
+    event = np.load(tmp_path / "pfp.event.npy")
+    keys = pack_rse(arr["run"], arr["subrun"], arr["event"])
+    assert np.array_equal(event, np.repeat(keys, ak.num(arr["trk_llrpid"])))
+
+
+def test_export_features_pairs(tree, tmp_path):
+    import pyarrow.parquet as pq
+
+    filename = tmp_path / "pairs.parquet"
+    features = {k: PFP_FEATURES[k] for k in ("trk_llrpid", "trk_length")}
+    select = lambda arr: arr["reco_primary_vtx_inFV"]  # noqa: E731
+    config = Config(iterate=True, iterate_step=300)
+    rows = export_features(tree, filename, config, True, features, select)
+
+    arr = tree.arrays()
+    arr = arr[arr["reco_primary_vtx_inFV"]]
+    n = ak.to_numpy(ak.num(arr["trk_llrpid"]))
+    assert rows == np.sum(n * (n - 1))
+
+    pf = pq.ParquetFile(filename)
+    assert pf.metadata.num_row_groups == 4
+    table = pf.read()
+    assert table.column_names == [
+        "trk_llrpid_1",
+        "trk_length_1",
+        "trk_llrpid_2",
+        "trk_length_2",
+        "separation",
+        "pfp_true_pdg_1",
+        "pfp_true_pdg_2",
+        "event",
+    ]
+
+    # the pairs of the first event with at least two PFPs
+    first = int(np.argmax(n >= 2))
+    ev = arr[first]
+    rows = table.filter(
+        table["event"].to_numpy() == pack_rse(ev.run, ev.subrun, ev.event)
+    )
+    want = [
+        (float(np.float32(ev.trk_llrpid[i])), float(np.float32(ev.trk_llrpid[j])))
+        for i in range(n[first])
+        for j in range(n[first])
+        if i != j
+    ]
+    got = list(zip(rows["trk_llrpid_1"].to_pylist(), rows["trk_llrpid_2"].to_pylist()))
+    assert got == want
+    start = np.array([ev[f"trk_start_{c}"] for c in "xyz"]).T
+    assert rows["separation"].to_numpy()[0] == pytest.approx(
+        np.linalg.norm(start[0] - start[1]), rel=1e-6
+    )
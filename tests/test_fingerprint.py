@@ -0,0 +1,169 @@
+import awkward as ak
+import numpy as np
+import pytest
+
+from sigmazerosearch.fingerprint import (
+    ResultCache,
+    Unfingerprintable,
+    cache_name,
+    fingerprint,
+)
+from sigmazerosearch.general import Config
+from sigmazerosearch.selection import Cut, ParameterSet, Selection
+
+PSET = ParameterSet(
+    pid_cut=0.6,
+    min_length=10,
+    max_separation=1,
+    proton_pid_cut=0.2,
+    pion_pid_cut=0.2,
+    separation_cut=3,
+    w_lambda_min=1.1,
+    w_lambda_max=1.20,
+)
+
+
+def make_cut(threshold):
+    return lambda arr: arr["event"] > threshold
+
+
+def test_fingerprint():
+    assert fingerprint(make_cut(2)) == fingerprint(make_cut(2))
+    assert fingerprint(make_cut(2)) != fingerprint(make_cut(3))
+    assert fingerprint(lambda arr: arr["event"] > 2) != fingerprint(
+        lambda arr: arr["event"] >= 2
+    )
+
+    # globals referenced by the function are part of the fingerprint
+    global PSET
+    f = lambda arr: arr["event"] > PSET.pid_cut  # noqa: E731
+    before = fingerprint(f)
+    old, PSET = PSET, ParameterSet.from_dict({**PSET.__dict__, "pid_cut": 0.7})
+    assert fingerprint(f) != before
+    PSET = old
+    assert fingerprint(f) == before
+
+
+def lookup(table):
+    return lambda arr: table[arr["event"]] > 0
+
+
+def test_fingerprint_values():
+    table = np.arange(1000)
+    other = table.copy()
+    other[500] = -1
+    # awkward arrays are digested in full, not through their truncated repr
+    assert fingerprint(lookup(ak.Array(table))) == fingerprint(lookup(ak.Array(table)))
+    assert fingerprint(lookup(ak.Array(table))) != fingerprint(lookup(ak.Array(other)))
+    assert fingerprint({"b", "a"}) == fingerprint({"a", "b"})
+
+    class Opaque:
+        pass
+
+    with pytest.raises(Unfingerprintable):
+        fingerprint(lookup(Opaque()))
+    assert cache_name(lookup(Opaque())) is None
+
+
+def test_ResultCache_eviction():
+    cache = ResultCache(max_bytes=2 * 8 * 10)
+    for i in range(3):
+        cache.put("file", i, i + 10, "w", np.zeros(10))
+    # the least recently used result is evicted
+    assert len(cache) == 2
+    assert cache.get("file", 0, 10, "w") is None
+    cache.get("file", 1, 11, "w")
+    cache.put("file", 3, 13, "w", np.zeros(10))
+    assert cache.get("file", 1, 11, "w") is not None
+    assert cache.get("file", 2, 12, "w") is None
+    # results larger than the bound are not kept in memory
+    cache.put("file", 0, 100, "w", np.zeros(100))
+    assert cache.get("file", 0, 100, "w") is None
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_ResultCache(tmp_path, on_disk):
+    cache = ResultCache(tmp_path if on_disk else None)
+    assert cache.get("file", 0, 3, "cut") is None
+
+    cache.put("file", 0, 3, "cut", np.array([True, False, True]))
+    assert list(cache.get("file", 0, 3, "cut")) == [True, False, True]
+    assert cache.get("file", 3, 6, "cut") is None
+
+    if on_disk:
+        assert list(ResultCache(tmp_path).get("file", 0, 3, "cut")) == [
+            True,
+            False,
+            True,
+        ]
+
+
+class CallCount:
+    """Counts calls without changing the fingerprint of the counted function"""
+
+    def __init__(self):
+        self.n = 0
+
+    def __fingerprint__(self):
+        return "CallCount"
+
+
+def test_Selection_incremental(samples, tmp_path):
+    calls = {"a": CallCount(), "b": CallCount()}
+
+    def counted(name, func):
+        def cutfunc(arr):
+            calls[name].n += 1
+            return func(arr)
+
+        return cutfunc
+
+    def run(threshold):
+        sel = Selection(
+            params=PSET,
+            samples=samples,
+            cuts=[
+                Cut("a", counted("a", lambda arr: arr["run"] == 1)),
+                Cut("b", counted("b", make_cut(threshold))),
+            ],
+            config=Config(
+                iterate=True, iterate_step=2, cache_dir=tmp_path, incremental=True
+            ),
+        )
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+        return [c.n_passing[0] for c in sel.cuts], calls["a"].n, calls["b"].n
+
+    assert run(2) == ([9, 7], 5, 5)
+
+    # unchanged cuts are served from the cache without reading the samples
+    assert run(2) == ([9, 7], 5, 5)
+
+    # only the changed cut is re-evaluated
+    assert run(4) == ([9, 3], 5, 10)
+
+
+def test_Selection_uncacheable(samples, tmp_path):
+    class Threshold:
+        value = 2
+
+    calls = []
+
+    def cutfunc(arr, threshold=Threshold()):
+        calls.append(len(arr))
+        return arr["event"] > threshold.value
+
+    for _ in range(2):
+        sel = Selection(
+            params=PSET,
+            samples=samples,
+            cuts=[Cut("a", cutfunc)],
+            config=Config(
+                iterate=True, iterate_step=2, cache_dir=tmp_path, incremental=True
+            ),
+        )
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+        assert sel.cuts[0].n_passing[0] == 7
+    # evaluated on every chunk of both runs, never served from the cache
+    assert len(calls) == 2 * 5
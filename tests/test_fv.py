@@ -1,6 +1,16 @@
+import awkward as ak
+import numpy as np
 import pytest
 
-from sigmazerosearch.alg.fv import in_active_tpc
+from sigmazerosearch.alg.fv import (
+    ACTIVE_TPC,
+    Box,
+    FV_x,
+    FV_y,
+    Geometry,
+    Volume,
+    in_active_tpc,
+)
 
 
 @pytest.mark.parametrize(
@@ -21,3 +31,52 @@ from sigmazerosearch.alg.fv import in_active_tpc
 )
 def test_in_active_tpc(x, y, z, want):
     assert in_active_tpc(x, y, z) == want
+
+
+def test_Box_shrink():
+    box = Box((0.0, 10.0), (0.0, 10.0), (0.0, 10.0))
+    assert box.shrink(1.0) == Box((1.0, 9.0), (1.0, 9.0), (1.0, 9.0))
+    assert box.shrink(1.0, (2.0, 3.0), 0.0) == Box((1.0, 9.0), (2.0, 7.0), (0.0, 10.0))
+
+
+@pytest.fixture
+def geometry():
+    dead = Box(FV_x, FV_y, (675.0, 775.0))
+    return Geometry(
+        active=ACTIVE_TPC,
+        fv=Volume(ACTIVE_TPC.shrink(10.0), exclude=(dead,)),
+        dead=dead,
+    )
+
+
+@pytest.mark.parametrize(
+    "x, y, z, want",
+    [
+        (126.625, 0.97, 518.5, 0b011),
+        (5.0, 0.0, 518.5, 0b001),
+        (126.625, 0.97, 700.0, 0b101),
+        (-999, -999, -999, 0b000),
+    ],
+)
+def test_Geometry(geometry, x, y, z, want):
+    assert geometry.classify(x, y, z) == want
+    assert geometry.contains(want, "active") == in_active_tpc(x, y, z)
+
+
+def test_Geometry_jagged(geometry):
+    x = ak.Array([[126.625, 5.0], [], [-999.0]])
+    z = ak.Array([[700.0, 518.5], [], [0.0]])
+    mask = geometry.classify(x, x * 0, z)
+    assert mask.tolist() == [[0b101, 0b001], [], [0b000]]
+    assert geometry.contains(mask, "fv").tolist() == [[False, False], [], [False]]
+    flat = geometry.classify(ak.flatten(x), 0.0, ak.to_numpy(ak.flatten(z)))
+    assert flat.tolist() == [0b101, 0b001, 0b000]
+
+
+def test_Geometry_broadcast(geometry):
+    x = ak.Array([[126.625, 5.0], [], [-999.0]])
+    # a scalar y and a per-event z broadcast against the jagged x
+    mask = geometry.classify(x, 0.0, np.array([700.0, 0.0, 518.5]))
+    assert mask.tolist() == [[0b101, 0b101], [], [0b000]]
+    mask = geometry.classify(x, ak.Array([0.0, 0.0, 0.0]), 518.5)
+    assert mask.tolist() == [[0b011, 0b001], [], [0b000]]
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.histogram import (
+    EfficiencyHistogram,
+    Histogram,
+    StackedHistogram,
+)
+from sigmazerosearch.selection import (
+    Cut,
+    EventCategory,
+    Sample,
+    SampleSet,
+    SampleType,
+    Selection,
+)
+from tests.conftest import write_sample
+
+
+def make_selection(samples, config):
+    return Selection(
+        params=None,
+        samples=samples,
+        cuts=[
+            Cut("event > 1", lambda arr: arr["event"] > 1),
+            Cut("event > 2", lambda arr: arr["event"] > 2),
+        ],
+        config=config,
+        histograms={
+            "event": EfficiencyHistogram(lambda arr: arr["event"], [0, 2.5, 5, 7])
+        },
+    )
+
+
+def test_EfficiencyHistogram(samples, config):
+    sel = make_selection(samples, config)
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+    hist = sel.histograms["event"]
+
+    # only the signal events 1, 2 and 3 of the hyperon sample count
+    assert hist.counts.tolist() == [[2, 1, 0], [1, 1, 0], [0, 1, 0]]
+    eff = hist.efficiency()
+    assert eff[:, :2].tolist() == [[0.5, 1.0], [0.0, 1.0]]
+    assert np.all(np.isnan(eff[:, 2]))
+    # binomial for unit weights
+    assert hist.efficiency_errors()[0, :2] == pytest.approx([np.sqrt(0.25 / 2), 0.0])
+    for cut, row in zip(sel.cuts, hist.counts[1:]):
+        assert cut.eff() == row.sum() / hist.counts[0].sum()
+
+    # filled separately per sample and merged
+    merged = EfficiencyHistogram(hist.func, hist.bins)
+    for sample in samples:
+        part = make_selection(samples, config)
+        part.samples = type(samples)(sample, target_POT=samples.target_POT)
+        part.open_files()
+        part.apply_cut(part.cuts)
+        merged.merge(part.histograms["event"].state())
+    assert np.array_equal(merged.counts, hist.counts)
+
+
+def test_StackedHistogram(samples, config, tmp_path):
+    write_sample(tmp_path / "data.root", [2, 3, 7], [False] * 3)
+    samples = SampleSet(
+        *samples,
+        Sample("data", str(tmp_path / "data.root"), SampleType.Data, 2e20),
+        target_POT=1e20,
+    )
+    sel = make_selection(samples, config)
+    sel.histograms = {
+        "event": StackedHistogram(lambda arr: arr["event"], [0, 2.5, 5, 7]),
+        "run": StackedHistogram(lambda arr: arr["run"], [0, 2]),
+    }
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+
+    stack = sel.stack("event", 0)
+    assert list(stack) == [c.name for c in EventCategory] + ["Dirt", "Ext", "Data"]
+    # signal events 1, 2, 3 of the hyperon sample and 3 of the background one
+    assert stack["Signal"][0].tolist() == [2, 2, 0]
+    assert stack["NuMuCC"][0].tolist() == [0, 2, 3]
+    # the data is scaled to the target POT
+    assert stack["Data"][0].tolist() == [0.5, 0.5, 0.5]
+    assert stack["Data"][1].tolist() == [0.25, 0.25, 0.25]
+
+    after = sel.stack("event", "event > 2")
+    assert np.array_equal(after["Signal"][0], [0, 2, 0])
+    assert np.array_equal(sel.stack("event")["NuMuCC"][0], after["NuMuCC"][0])
+    # every event in the single bin of the other variable
+    assert sum(c[0].sum() for c in sel.stack("run", 0).values()) == 9 + 1.5
+
+    with pytest.raises(TypeError):
+        make_selection(samples, config).stack("event")
+
+
+def test_Histogram_skipped_row_groups(samples, tmp_path):
+    def run(histogram):
+        seen = []
+
+        def cutfunc(arr):
+            seen.extend(arr["event"].tolist())
+            return arr["event"] > 5
+
+        sel = Selection(
+            params=None,
+            samples=samples,
+            cuts=[Cut("event > 5", cutfunc, requires=[("event", ">", 5)])],
+            config=Config(iterate=True, iterate_step=2, cache_dir=tmp_path),
+            histograms={"event": histogram},
+        )
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+        return histogram, len(seen)
+
+    # every event is read, so that the first row holds all of them
+    histogram, read = run(Histogram(lambda arr: arr["event"], [0, 2.5, 5, 7]))
+    assert read == 9
+    assert histogram.counts[0].sum() == 9
+    assert histogram.counts[1].sum() == 2
+
+    # without background in the first row, row groups without any event
+    # passing the cut or any signal are skipped
+    histogram, read = run(EfficiencyHistogram(lambda arr: arr["event"], [0, 7]))
+    assert read == 7
+    assert histogram.counts[0].sum() == 3
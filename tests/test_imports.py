@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+IMPORT_BUDGET = 0.25
+"""Seconds allowed for importing the framework on top of numpy and awkward."""
+
+_LAZY = ["matplotlib", "uproot", "pyarrow", "vector", "tabulate"]
+
+_SCRIPT = f"""
+import sys, time
+import awkward, numpy
+before = set(sys.modules)
+t = time.perf_counter()
+import sigmazerosearch.selection, sigmazerosearch.alg.muon, sigmazerosearch.alg.lamb
+print(time.perf_counter() - t)
+print(" ".join(m for m in {_LAZY!r} if m in set(sys.modules) - before))
+"""
+
+
+def _import_framework() -> tuple[float, list[str]]:
+    out = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(out[0]), out[1].split() if len(out) > 1 else []
+
+
+def test_lazy_imports():
+    _, loaded = _import_framework()
+    assert loaded == []
+
+
+def test_import_budget():
+    # best of a few runs, to be robust against a busy machine
+    elapsed = min(_import_framework()[0] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET
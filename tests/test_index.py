@@ -0,0 +1,81 @@
+import awkward as ak
+import numpy as np
+import pytest
+import uproot as up
+
+from sigmazerosearch.index import RSEIndex, entry_ranges, pack_rse, unpack_rse
+from sigmazerosearch.loader import load_ntuple
+
+
+@pytest.fixture
+def rse_tree(tmp_path):
+    rng = np.random.default_rng(1)
+    n = 500
+    with up.recreate(tmp_path / "sample.root") as fd:
+        fd.mktree(
+            "ana/OutputTree",
+            {"run": np.uint32, "subrun": np.uint32, "event": np.uint32},
+        )
+        fd["ana/OutputTree"].extend(
+            {
+                "run": rng.integers(5000, 5010, n).astype(np.uint32),
+                "subrun": rng.integers(0, 300, n).astype(np.uint32),
+                "event": rng.permutation(n).astype(np.uint32) * 7,
+            }
+        )
+    return load_ntuple(str(tmp_path / "sample.root:ana/OutputTree"))
+
+
+def test_pack_rse():
+    run, subrun, event = [1, 20000, 5], [3213, 321, 0], [12310, 33842, 2**28 - 1]
+    keys = pack_rse(run, subrun, event)
+
+    assert keys.dtype == np.uint64
+    assert [list(x) for x in unpack_rse(keys)] == [run, subrun, event]
+    # keys sort in the same order as the (run, subrun, event) tuples
+    assert list(np.argsort(keys)) == [0, 2, 1]
+
+    with pytest.raises(ValueError):
+        pack_rse(1, 1, 2**28)
+    with pytest.raises(ValueError):
+        pack_rse(-1, 1, 1)
+
+
+def test_entry_ranges():
+    assert entry_ranges(np.array([], dtype=np.int64)) == []
+    assert entry_ranges(np.array([1, 2, 3, 7, 9])) == [(1, 4), (7, 8), (9, 10)]
+    assert entry_ranges(np.array([1, 2, 3, 7, 9]), gap=3) == [(1, 10)]
+
+
+def test_RSEIndex(rse_tree, tmp_path):
+    index = RSEIndex.from_tree(rse_tree)
+    arr = rse_tree.arrays()
+
+    assert len(index) == len(arr)
+    assert np.all(np.diff(index.keys.astype(np.int64)) >= 0)
+
+    for entry in [0, 17, 499]:
+        rec = arr[entry]
+        assert index.lookup(rec.run, rec.subrun, rec.event) == entry
+    assert index.lookup(1, 1, 1) is None
+
+    wanted = np.array([3, 10, 11, 12, 250, 498])
+    found = index.find(
+        np.append(arr["run"][wanted], 1),
+        np.append(arr["subrun"][wanted], 1),
+        np.append(arr["event"][wanted], 1),
+    )
+    assert list(found) == list(wanted)
+    assert list(
+        index.contains([arr[3].run, 1], [arr[3].subrun, 1], [arr[3].event, 1])
+    ) == [True, False]
+
+    sub = index.read(
+        rse_tree, arr["run"][wanted], arr["subrun"][wanted], arr["event"][wanted], gap=2
+    )
+    assert ak.to_list(sub) == ak.to_list(arr[wanted])
+
+    index.save(str(tmp_path / "index.npz"))
+    loaded = RSEIndex.load(str(tmp_path / "index.npz"))
+    assert np.array_equal(loaded.keys, index.keys)
+    assert np.array_equal(loaded.entries, index.entries)
@@ -1,24 +1,24 @@
+import awkward as ak
+import numpy as np
 import pytest
-import uproot as up
 
-from sigmazerosearch.alg.lamb import select_p_pi_candidates_box
-from sigmazerosearch.selection import ParameterSet
-
-
-@pytest.fixture(
-    params=[
-        (0, 100),
-        (100, 125),
-    ]
+from sigmazerosearch.alg.kinematics import (
+    LAMBDA_MASS,
+    PION_MASS,
+    PROTON_MASS,
+    four_momentum,
+    invariant_mass,
+    opening_angle,
+    pick,
 )
-def event_sample(request):
-    entry_low, entry_high = request.param
-    with up.open(
-        "/home/niam/phd/data/hyperons/multiSlice/run3b_RHC/analysisOutputRHC_mSlice_cthorpe_make_hyperon_events_numi_rhc_run3b_hyperon_reco2_reco2.root"
-    ) as fd:
-        return fd.get("ana/OutputTree").arrays(
-            entry_start=entry_low, entry_stop=entry_high
-        )
+from sigmazerosearch.alg.lamb import (
+    invariant_mass_cut,
+    reconstruct_lambda,
+    select_p_pi_candidates_box,
+)
+from sigmazerosearch.alg.roles import assign_roles
+from sigmazerosearch.alg.sigma import reconstruct_sigma0
+from sigmazerosearch.selection import ParameterSet
 
 
 @pytest.fixture()
@@ -44,3 +44,51 @@ def test_select_p_pi_candidates_box(event_sample, pset):
 # def test_reconstruct_p_pi(event_sample, pset):
 #     indices = np.random.randint(2, size=(len(event_sample), 2))
 #     reconstruct_p_pi(event_sample, pset, ak.Array(indices))
+
+
+def test_invariant_mass():
+    # Lambda -> p pi- at rest, back to back along x
+    q = 0.10058
+    p = four_momentum([q], [[1.0, 0.0, 0.0]], PROTON_MASS)
+    pi = four_momentum([q], [[-2.0, 0.0, 0.0]], PION_MASS)
+    assert invariant_mass(p, pi) == pytest.approx([LAMBDA_MASS], abs=1e-4)
+    assert opening_angle(p, pi) == pytest.approx([np.pi])
+    assert np.isnan(invariant_mass(p, four_momentum([np.nan], [[1, 0, 0]], 0.0)))
+
+
+def test_pick():
+    values = ak.Array([[1.0, 2.0], [], [3.0]])
+    assert pick(values, [1, -1, 0]).tolist()[::2] == [2.0, 3.0]
+    assert np.isnan(pick(values, [1, -1, 0])[1])
+
+
+def test_reconstruct_sigma0(event_sample, pset):
+    sigma = reconstruct_sigma0(event_sample, pset)
+    roles = assign_roles(event_sample, pset)
+    assert sigma.proton.tolist() == roles.proton.tolist()
+
+    for ev, rec in zip(event_sample, sigma):
+        if rec.proton < 0 or rec.pion < 0:
+            assert np.isnan(rec.mass) and len(rec.candidates) == 0
+            continue
+
+        def p4(i, mom, mass):
+            d = np.array([[ev[f"trk_dir_{c}"][i] for c in "xyz"]])
+            return four_momentum([ev[mom][i]], d, mass)
+
+        lamb = p4(rec.proton, "trk_mom_proton", PROTON_MASS) + p4(
+            rec.pion, "trk_mom_pion", PION_MASS
+        )
+        assert rec.mass == pytest.approx(invariant_mass(lamb)[0])
+        showers = [i for i, s in enumerate(ev["pfp_trk_shr_score"]) if s < 0.5]
+        assert [c.photon for c in rec.candidates] == showers
+        for c in rec.candidates:
+            d = np.array([[ev[f"shr_dir_{x}"][c.photon] for x in "xyz"]])
+            gamma = four_momentum([ev["shr_energy"][c.photon]], d, 0.0)
+            assert c.mass == pytest.approx(invariant_mass(lamb, gamma)[0])
+
+
+def test_invariant_mass_cut(event_sample, pset):
+    mass = reconstruct_lambda(event_sample, pset).mass
+    cut = invariant_mass_cut(event_sample, pset)
+    assert ak.sum(cut) == np.sum((mass >= 1.1) & (mass <= 1.2))
@@ -1,9 +1,139 @@
-from sigmazerosearch.loader import load_ntuple
+import awkward as ak
+import numpy as np
+import pytest
+import uproot as up
 
+from sigmazerosearch.general import Config
+from sigmazerosearch.loader import (
+    COMPACT_DTYPES,
+    _yield_array_from_parquet,
+    compact,
+    load_ntuple,
+    load_parquet,
+    row_group_may_pass,
+    to_parquet_cache,
+)
 
-def test_loader():
-    ntuple = load_ntuple(
-        "/home/niam/phd/data/hyperons/run3b_RHC/analysisOutputRHC_Overlay_GENIE_Hyperon_cthorpe_make_hyperon_events_numi_rhc_run3b_hyperon_reco2_reco2.root:ana/OutputTree"
-    )
+
+def test_loader(ntuple_file):
+    ntuple = load_ntuple(ntuple_file + ":ana/OutputTree")
 
     print(ntuple.keys())
+
+
+@pytest.fixture
+def parquet_cache(tmp_path):
+    with up.recreate(tmp_path / "sample.root") as fd:
+        fd.mktree(
+            "ana/OutputTree",
+            {
+                "run": np.int32,
+                "reco_primary_vtx_inFV": np.bool_,
+                "trk_length": "var * float64",
+            },
+        )
+        fd["ana/OutputTree"].extend(
+            {
+                "run": np.arange(8, dtype=np.int32),
+                "reco_primary_vtx_inFV": np.array([0, 0, 0, 0, 0, 1, 0, 0], dtype=bool),
+                "trk_length": ak.Array([[1.0], [], [2.0, 3.0], [4.0]] * 2),
+            }
+        )
+
+    config = Config(iterate=True, iterate_step=4)
+    filename = str(tmp_path / "sample.parquet")
+    to_parquet_cache(
+        load_ntuple(str(tmp_path / "sample.root:ana/OutputTree")), filename, config
+    )
+    return load_parquet(filename), config
+
+
+def test_parquet_cache(parquet_cache):
+    pf, config = parquet_cache
+
+    assert pf.metadata.num_row_groups == 2
+
+    arr = ak.concatenate(list(_yield_array_from_parquet(pf, config)))
+    assert ak.to_list(arr["run"]) == list(range(8))
+    assert ak.to_list(arr["trk_length"][:4]) == [[1.0], [], [2.0, 3.0], [4.0]]
+
+
+def test_parquet_cache_branches(parquet_cache, tmp_path):
+    _, config = parquet_cache
+    config.dtypes = {"run": "int16"}
+    filename = str(tmp_path / "run.parquet")
+    to_parquet_cache(
+        load_ntuple(str(tmp_path / "sample.root:ana/OutputTree")),
+        filename,
+        config,
+        ["run"],
+    )
+    arr = ak.from_arrow(load_parquet(filename).read())
+    assert arr.fields == ["run"]
+    assert arr["run"].type.content.primitive == "int16"
+
+
+def test_row_group_may_pass(parquet_cache):
+    pf, config = parquet_cache
+    first, second = pf.metadata.row_group(0), pf.metadata.row_group(1)
+
+    assert not row_group_may_pass(first, [("reco_primary_vtx_inFV", "==", 1)])
+    assert row_group_may_pass(second, [("reco_primary_vtx_inFV", "==", 1)])
+    assert row_group_may_pass(first, [("run", "<", 1)])
+    assert not row_group_may_pass(second, [("run", "<", 4)])
+    assert not row_group_may_pass(
+        second, [("run", ">=", 0), ("run", "!=", 4), ("run", ">", 7)]
+    )
+    # predicates on jagged or unknown branches are never used for skipping
+    assert row_group_may_pass(first, [("trk_length", ">", 100), ("foo", "==", 1)])
+
+    skip = lambda rg: not row_group_may_pass(rg, [("reco_primary_vtx_inFV", "==", 1)])  # noqa: E731
+    (arr,) = _yield_array_from_parquet(pf, config, skip)
+    assert ak.to_list(arr["run"]) == [4, 5, 6, 7]
+
+
+def test_compact(event_sample):
+    arr = compact(event_sample, COMPACT_DTYPES)
+    assert arr.fields == event_sample.fields
+    assert ak.type(arr["trk_start_x"]).content.content.primitive == "float32"
+    assert ak.type(arr["mc_decay_pdg"]).content.content.primitive == "int32"
+    assert ak.type(arr["mc_nu_pos_x"]).content.primitive == "float64"
+    assert arr.nbytes < event_sample.nbytes
+    assert compact(event_sample, None) is event_sample
+
+
+def test_check_dtypes(ntuple_file):
+    from sigmazerosearch.alg.muon import select_mu_candidate
+    from sigmazerosearch.selection import (
+        Cut,
+        ParameterSet,
+        Sample,
+        SampleSet,
+        SampleType,
+        Selection,
+    )
+
+    pset = ParameterSet(5.0, 10.0, 0.0, 0.2, -0.5, 3.0, 1.1, 1.2)
+    sel = Selection(
+        params=pset,
+        samples=SampleSet(
+            Sample("hyperon", ntuple_file, SampleType.Hyperon, 1e20), target_POT=1e20
+        ),
+        cuts=[
+            Cut("fv", lambda arr: arr["reco_primary_vtx_inFV"]),
+            Cut("muon", lambda arr: ak.any(select_mu_candidate(arr, pset), axis=1)),
+        ],
+        config=Config(iterate=True, iterate_step=400),
+    )
+    sel.open_files()
+    report = sel.check_dtypes(n_chunks=None)
+    assert report["compact_bytes"] < report["bytes"]
+    assert report["changed"] == {"signal_def": 0, "fv": 0, "muon": 0}
+
+    sel.apply_cut(sel.cuts)
+    nominal = [c.state() for c in sel.cuts]
+    sel.config.dtypes = COMPACT_DTYPES
+    for cut in sel.cuts:
+        cut.reset()
+    sel.apply_cut(sel.cuts)
+    assert [c.state() for c in sel.cuts] == nominal
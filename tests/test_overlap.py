@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from sigmazerosearch.overlap import RSE, TRUTH, Overlap, hash_columns
+from sigmazerosearch.selection import Cut, Selection
+
+
+def test_hash_columns():
+    a = hash_columns([1, 2, 1], [0.5, 0.5, 0.5])
+
+    assert a.dtype == np.uint64
+    assert a[0] == a[2] and a[0] != a[1]
+
+
+def test_Overlap(samples, config):
+    for s in samples:
+        s.load_df()
+    ov = Overlap(RSE)
+    ov.build(samples, config)
+
+    assert ov.overlaps() == {("hyperon", "bkg"): 2}
+    assert ov.n_events["bkg"] - len(ov.keys["bkg"]) == 1
+
+    bkg = samples[1].df.arrays()
+    assert list(ov.weights("bkg", bkg)) == [0, 0, 1, 1, 1]
+    assert list(ov.weights("hyperon", samples[0].df.arrays())) == [1, 1, 1, 1]
+
+    ov = Overlap(RSE, policy="reweight")
+    ov.build(samples, config)
+    assert list(ov.weights("bkg", bkg)) == [0.5, 0.5, 1, 1, 1]
+
+    with pytest.raises(ValueError):
+        Overlap(policy="foo")
+
+
+def test_Overlap_save(samples, config, tmp_path):
+    for s in samples:
+        s.load_df()
+    ov = Overlap(RSE)
+    ov.build(samples, config)
+    ov.save(str(tmp_path / "overlap.npz"))
+
+    loaded = Overlap(RSE)
+    loaded.load(str(tmp_path / "overlap.npz"))
+    assert list(loaded.keys) == ["hyperon", "bkg"]
+    assert all(np.array_equal(loaded.keys[k], ov.keys[k]) for k in ov.keys)
+    assert loaded.n_events == ov.n_events
+    bkg = samples[1].df.arrays()
+    assert list(loaded.weights("bkg", bkg)) == [0, 0, 1, 1, 1]
+
+
+def test_Overlap_truth(samples, config):
+    for s in samples:
+        s.load_df()
+    ov = Overlap(TRUTH)
+    ov.build(samples, config)
+
+    # every event shares the same generated interaction
+    assert ov.overlaps() == {("hyperon", "bkg"): 1}
+
+
+@pytest.mark.parametrize(
+    "policy, want_signal, want_passing", [("exclude", 3, 7), ("reweight", 2.5, 7)]
+)
+def test_Selection_overlap(samples, config, policy, want_signal, want_passing):
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("all", lambda arr: arr["run"] == 1)],
+        config=config,
+        overlap=Overlap(RSE, policy=policy),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+
+    assert sel.cuts[0].n_signal[0] == pytest.approx(want_signal)
+    assert sel.cuts[0].total_signal == pytest.approx(want_signal)
+    assert sel.cuts[0].n_passing[0] == pytest.approx(want_passing)
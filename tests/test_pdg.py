@@ -0,0 +1,56 @@
+import awkward as ak
+import numpy as np
+import pytest
+
+from sigmazerosearch.general import PDG
+from sigmazerosearch.pdg import bit, event_bits, has_all, lookup
+
+
+@pytest.mark.parametrize(
+    "code, particle, charge, anti",
+    [
+        (13, PDG.Muon, -1, -13),
+        (-13, PDG.Muon, 1, 13),
+        (-211, PDG.Pi, -1, 211),
+        (2212, PDG.Proton, 1, -2212),
+        (3122, PDG.Lambda, 0, 3122),
+        (111, PDG.Pi0, 0, 111),
+        (-14, PDG.NuMu, 0, 14),
+    ],
+)
+def test_lookup(code, particle, charge, anti):
+    row = lookup(np.array([code]))[0]
+    assert list(PDG)[row["particle"]] == particle
+    assert row["charge"] == charge
+    assert row["anti"] == anti
+
+
+def test_lookup_unknown():
+    rows = lookup(np.array([3222, -100000]))
+    assert rows["particle"].tolist() == [-1, -1]
+    assert rows["anti"].tolist() == [-3222, 100000]
+    assert rows["bits"].tolist() == [0, 0]
+
+
+def test_lookup_jagged():
+    codes = ak.Array([[2212, -211, 22], [], [13]])
+    rows = lookup(codes)
+    assert rows.charge.tolist() == [[1, -1, 0], [], [-1]]
+    has_proton = ak.any((rows.bits & bit(PDG.Proton.value)) != 0, axis=1)
+    assert has_proton.tolist() == [True, False, False]
+
+
+def test_event_bits():
+    codes = ak.Array([[2212, -211, 22], [], [2212, 211], [-211, 2212, 3222], []])
+    assert event_bits(codes).tolist() == [
+        bit(2212, -211, 22),
+        0,
+        bit(2212, 211),
+        bit(-211, 2212),
+        0,
+    ]
+    want = ak.to_numpy(
+        (ak.sum(codes == PDG.Proton.value, axis=1) >= 1)
+        & (ak.sum(codes == PDG.Pi.anti, axis=1) >= 1)
+    )
+    assert has_all(codes, PDG.Proton.value, PDG.Pi.anti).tolist() == want.tolist()
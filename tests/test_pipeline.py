@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+import sigmazerosearch.selection as selection
+from sigmazerosearch.general import Config
+from sigmazerosearch.histogram import Histogram, StackedHistogram
+from sigmazerosearch.pipeline import Pipeline, from_shared, to_shared
+from sigmazerosearch.selection import Cut, Selection
+
+
+def test_shared_roundtrip(event_sample):
+    shm, desc = to_shared(event_sample)
+    try:
+        attached, arr = from_shared(desc)
+        assert arr.to_list() == event_sample.to_list()
+        # the array views the shared block rather than a copy of it
+        assert np.shares_memory(
+            np.asarray(arr["run"]), np.frombuffer(attached.buf, np.uint8)
+        )
+        del arr
+        attached.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def make_selection(samples, config):
+    return Selection(
+        params=None,
+        samples=samples,
+        cuts=[
+            Cut("run", lambda arr: arr["run"] == 1),
+            Cut("event", lambda arr: arr["event"] > 2),
+        ],
+        config=config,
+        histograms={
+            "event": Histogram(lambda arr: arr["event"], range(8)),
+            "stack": StackedHistogram(lambda arr: arr["event"], [0, 4, 8]),
+        },
+    )
+
+
+@pytest.mark.parametrize("readers, workers, max_chunks", [(1, 1, 1), (2, 3, 2)])
+def test_Pipeline(samples, config, readers, workers, max_chunks):
+    expected = make_selection(samples, config)
+    expected.open_files()
+    expected.apply_cut(expected.cuts)
+
+    sel = make_selection(samples, Config(iterate=True, iterate_step=1))
+    Pipeline(sel, readers, workers, max_chunks).apply_cut()
+    for cut, ref in zip(sel.cuts, expected.cuts):
+        assert cut.n_passing == ref.n_passing
+        assert cut.n_signal == ref.n_signal
+        assert cut.total_signal == ref.total_signal
+    for k, h in sel.histograms.items():
+        assert np.array_equal(h.counts, expected.histograms[k].counts)
+
+
+def test_Pipeline_cache(samples, tmp_path, monkeypatch):
+    writes = tmp_path / "writes"
+    write = selection.to_parquet_cache
+
+    def logged(*args, **kwargs):
+        with open(writes, "a") as fd:
+            fd.write(f"{os.getpid()}\n")
+        write(*args, **kwargs)
+
+    monkeypatch.setattr(selection, "to_parquet_cache", logged)
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    sel = make_selection(samples, Config(iterate=True, iterate_step=1, cache_dir=cache))
+    Pipeline(sel, 3, 2).apply_cut()
+
+    # each cache written once, by the parent, and opened by the readers
+    assert writes.read_text().split() == [str(os.getpid())] * len(samples)
+    assert sel.cuts[0].n_passing[0] == 9
+    assert sorted(p.suffix for p in cache.iterdir()) == [".parquet"] * len(samples)
+
+
+def test_Pipeline_error(samples, config):
+    sel = make_selection(samples, config)
+    sel.cuts[0] = Cut("broken", lambda arr: arr["missing"] > 0)
+    with pytest.raises(RuntimeError, match="missing"):
+        Pipeline(sel, workers=2).apply_cut()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.planner import expected_cost, plan
+from sigmazerosearch.selection import Cut, Selection
+
+# the first cut keeps a quarter of the events, the second keeps all
+PASSED = np.array([[True, True]] + [[False, True]] * 3)
+
+
+def test_expected_cost():
+    full = np.array([1.0, 8.0])
+    subset = np.array([2.0, 12.0])
+    assert expected_cost(PASSED, full, subset, [False, False]) == 9
+    assert expected_cost(PASSED, full, subset, [False, True]) == 4
+
+
+@pytest.mark.parametrize(
+    "subset, short",
+    [
+        ([2.0, 12.0], [False, True]),
+        # selecting the survivors costs more than evaluating the cut on all
+        ([2.0, 40.0], [False, False]),
+    ],
+)
+def test_plan(subset, short):
+    assert plan(PASSED, np.array([1.0, 8.0]), np.array(subset)) == short
+
+
+@pytest.mark.parametrize("forced", [None, [True, True, True], [False, True, False]])
+def test_Selection_plan(samples, monkeypatch, forced):
+    if forced is not None:
+        monkeypatch.setattr("sigmazerosearch.planner.Planner.plan", lambda _: forced)
+
+    def run(plan_chunks):
+        sel = Selection(
+            params=None,
+            samples=samples,
+            cuts=[
+                Cut("event", lambda arr: arr["event"] > 4),
+                Cut("slow", lambda arr: np.sort(np.asarray(arr["mc_nu_q2"])) > 0),
+                Cut("run", lambda arr: arr["run"] == 1),
+            ],
+            config=Config(iterate=True, iterate_step=2, plan_chunks=plan_chunks),
+        )
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+        return sel
+
+    planned, nominal = run(1), run(0)
+    assert planned.short_circuit is not None and len(planned.short_circuit) == 3
+    assert nominal.short_circuit is None
+    for a, b in zip(planned.cuts, nominal.cuts):
+        assert a.state() == b.state()
+    assert planned.cuts[2].n_passing[0] == 3
+    assert all(c.n_evaluated == 9 for c in nominal.cuts)
+    if forced == [True, True, True]:
+        # after the first measured chunk only the survivors are evaluated
+        assert [c.n_evaluated for c in planned.cuts] == [9, 5, 5]
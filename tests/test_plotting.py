@@ -0,0 +1,65 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+import sigmazerosearch.plotting as plotting  # noqa: E402
+from sigmazerosearch.general import Config  # noqa: E402
+from sigmazerosearch.histogram import EfficiencyHistogram  # noqa: E402
+from sigmazerosearch.selection import Cut, Selection  # noqa: E402
+
+
+def test_save_figure(tmp_path):
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    ax.set_xlabel("a rather long label to be kept by the crop")
+    plotting.save_figure(fig, [tmp_path / "a.png", tmp_path / "a.pdf"], dpi=50)
+    fig.savefig(tmp_path / "b.png", dpi=50, bbox_inches="tight")
+    plt.close(fig)
+
+    assert (tmp_path / "a.pdf").stat().st_size > 0
+    # the layout computed once matches the tight one of savefig, to within
+    # the rounding of text extents at different resolutions
+    a, b = plt.imread(tmp_path / "a.png"), plt.imread(tmp_path / "b.png")
+    assert abs(a.shape[0] - b.shape[0]) <= 1 and abs(a.shape[1] - b.shape[1]) <= 1
+
+
+def test_finish(monkeypatch):
+    def show(*args, **kwargs):
+        raise AssertionError("figures are not shown by default")
+
+    monkeypatch.setattr(plt, "show", show)
+    fig, _ = plt.subplots()
+    assert plotting.finish(Config(), fig, "a") is fig
+    assert plt.get_fignums() == []
+
+
+def test_finish_background(samples, tmp_path):
+    config = Config(
+        plot_save=True,
+        plot_dir=tmp_path,
+        plot_format=["png", "svg"],
+        plot_workers=2,
+    )
+    sel = Selection(
+        params=None,
+        samples=samples,
+        cuts=[Cut("event > 1", lambda arr: arr["event"] > 1)],
+        config=config,
+        histograms={"event": EfficiencyHistogram(lambda arr: arr["event"], [0, 4, 7])},
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+
+    fig = sel.plot_efficiency("event")
+    assert isinstance(fig, Figure)
+    assert plt.get_fignums() == [], "figures that are not shown are closed"
+    paths = plotting.wait()
+    assert sorted(p.name for p in paths) == [
+        "efficiency_event.png",
+        "efficiency_event.svg",
+    ]
+    assert all(p.stat().st_size > 0 for p in paths)
+    assert plotting.wait() == []
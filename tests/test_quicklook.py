@@ -0,0 +1,66 @@
+import awkward as ak
+import numpy as np
+import pytest
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.quicklook import estimate, relative_precision
+from sigmazerosearch.selection import Cut, Sample, SampleSet, SampleType, Selection
+from sigmazerosearch.synthetic import SyntheticSpec, write_ntuple
+
+
+def test_estimate():
+    rng = np.random.default_rng(1)
+    # one cut: signal, passing and total signal of each chunk
+    rows = [np.array([[2.0, 3.0, 4.0], [4.0, 7.0, 4.0]]), np.array([[0.0, 5.0, 0.0]])]
+
+    eff, eff_interval, pur, pur_interval = estimate(rows, [2, 1], 0.9, 50, rng)
+    assert eff == pytest.approx([6 / 8])
+    assert pur == pytest.approx([6 / 15])
+    # every chunk was processed, so the estimates are exact
+    assert np.allclose(eff_interval, [[0.75, 0.75]])
+    assert relative_precision(pur, pur_interval) == 0
+
+    # half of the chunks of the first sample, scaled up
+    eff, eff_interval, pur, pur_interval = estimate(rows, [4, 1], 0.9, 200, rng)
+    assert pur == pytest.approx([12 / 25])
+    assert eff_interval[0, 0] < eff[0] < eff_interval[0, 1]
+    assert relative_precision(eff, eff_interval) > 0
+
+
+@pytest.fixture
+def selection(tmp_path):
+    hyperon, bkg = str(tmp_path / "hyperon.root"), str(tmp_path / "bkg.root")
+    write_ntuple(hyperon, 4000, seed=1, chunk_size=200)
+    write_ntuple(
+        bkg, 4000, SyntheticSpec(hyperon_fraction=0.05), seed=2, chunk_size=200
+    )
+    sel = Selection(
+        params=None,
+        samples=SampleSet(
+            Sample("hyperon", hyperon, SampleType.Hyperon, 1e20),
+            Sample("bkg", bkg, SampleType.Background, 1e21),
+            target_POT=1e20,
+        ),
+        cuts=[
+            Cut("fv", lambda arr: arr["reco_primary_vtx_inFV"]),
+            Cut("pfps", lambda arr: ak.num(arr["trk_llrpid"]) >= 3),
+        ],
+        config=Config(iterate=True, iterate_step=1000),
+    )
+    sel.open_files()
+    return sel
+
+
+def test_quick_look(selection):
+    exact = selection.quick_look(selection.cuts, precision=0.0, step=400)
+    assert exact.converged and exact.fraction == 1.0
+    assert all(c.n_passing[0] == 0 for c in selection.cuts)
+
+    selection.apply_cut(selection.cuts)
+    assert exact.eff == pytest.approx([c.eff() for c in selection.cuts])
+    assert exact.pur == pytest.approx([c.pur() for c in selection.cuts])
+
+    quick = selection.quick_look(selection.cuts, precision=0.2, step=400)
+    assert quick.converged and quick.precision <= 0.2
+    assert quick.fraction < 1.0
+    assert np.all(quick.eff_interval[:, 0] <= quick.eff_interval[:, 1])
@@ -0,0 +1,112 @@
+import dataclasses
+
+import awkward as ak
+import numpy as np
+import pytest
+
+from sigmazerosearch.alg.roles import Role, assign_roles, role_of
+from sigmazerosearch.general import ParameterSet
+
+
+@pytest.fixture()
+def pset():
+    return ParameterSet(
+        max_separation=5,
+        min_length=10,
+        pid_cut=0.0,
+        proton_pid_cut=0.2,
+        pion_pid_cut=-0.5,
+        separation_cut=3,
+        w_lambda_min=1.1,
+        w_lambda_max=1.20,
+    )
+
+
+def assign_event(ev, pset):
+    """The roles of one event, trying every combination of tracks"""
+    vtx = np.array([ev[f"reco_primary_vtx_{c}"] for c in "xyz"])
+    starts = np.array([ev[f"trk_start_{c}"] for c in "xyz"]).reshape(3, -1).T
+    score = np.array(ev["pfp_trk_shr_score"])
+    track = score > 0.5
+    pid = np.array(ev["trk_llrpid"])
+    length = np.array(ev["trk_length"])
+    near = np.linalg.norm(starts - vtx, axis=1)
+
+    def options(eligible):
+        return [*np.flatnonzero(eligible).tolist(), -1]
+
+    best, best_rank = (-1, -1, -1), None
+    for m in options(track & (pid < 0.0) & (length >= 10) & (near < 5)):
+        for p in options(track & (pid >= 0.2)):
+            for q in options(track & (pid >= -0.5)):
+                chosen = [i for i in (m, p, q) if i >= 0]
+                if len(set(chosen)) < len(chosen):
+                    continue
+                if p >= 0 and q >= 0 and np.linalg.norm(starts[p] - starts[q]) < 3:
+                    continue
+                rank = (
+                    len(chosen),
+                    length[m] if m >= 0 else -np.inf,
+                    pid[p] if p >= 0 else -np.inf,
+                    pid[q] if q >= 0 else -np.inf,
+                )
+                if best_rank is None or rank > best_rank:
+                    best, best_rank = (m, p, q), rank
+
+    showers = np.flatnonzero(score < 0.5)
+    photon = int(showers[np.argmax(-score[showers])]) if len(showers) else -1
+    muon, proton, pion = best
+    return {"muon": muon, "proton": proton, "pion": pion, "photon": photon}
+
+
+def test_assign_roles(event_sample, pset):
+    roles = assign_roles(event_sample, pset)
+    assert roles.tolist() == [assign_event(ev, pset) for ev in event_sample]
+
+    per_pfp = role_of(event_sample, roles)
+    for role in Role:
+        n = ak.sum(per_pfp == role.value, axis=1)
+        assert ak.all(n == (roles[role.name.lower()] >= 0))
+
+
+def test_assign_roles_pair(pset):
+    # the best proton on its own leaves no pion far enough away
+    arr = ak.Array(
+        [
+            {
+                "pfp_trk_shr_score": [0.9, 0.9, 0.9],
+                "trk_llrpid": [0.9, 0.5, -0.4],
+                "trk_length": [5.0, 5.0, 5.0],
+                "trk_start_x": [0.0, 2.0, -2.0],
+                "trk_start_y": [0.0, 0.0, 0.0],
+                "trk_start_z": [0.0, 0.0, 0.0],
+                "reco_primary_vtx_x": 0.0,
+                "reco_primary_vtx_y": 0.0,
+                "reco_primary_vtx_z": 0.0,
+            }
+        ]
+    )
+    roles = assign_roles(arr, pset)
+    assert roles.tolist() == [{"muon": -1, "proton": 1, "pion": 2, "photon": -1}]
+
+
+def test_assign_roles_muon(pset):
+    # the longest muon candidate is the only pion far enough from the proton
+    arr = ak.Array(
+        [
+            {
+                "pfp_trk_shr_score": [0.9, 0.9, 0.9],
+                "trk_llrpid": [0.3, 0.3, 0.9],
+                "trk_length": [50.0, 20.0, 15.0],
+                "trk_start_x": [0.0, 3.0, 4.0],
+                "trk_start_y": [0.0, 0.0, 0.0],
+                "trk_start_z": [0.0, 0.0, 0.0],
+                "reco_primary_vtx_x": 0.0,
+                "reco_primary_vtx_y": 0.0,
+                "reco_primary_vtx_z": 0.0,
+            }
+        ]
+    )
+    pset = dataclasses.replace(pset, pid_cut=0.6, pion_pid_cut=0.2)
+    roles = assign_roles(arr, pset)
+    assert roles.tolist() == [{"muon": 1, "proton": 2, "pion": 0, "photon": -1}]
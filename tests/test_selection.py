@@ -1,7 +1,6 @@
 import awkward as ak
 import numpy as np
 import pytest
-import uproot as up
 
 from sigmazerosearch.selection import (
     Cut,
@@ -12,22 +11,6 @@ from sigmazerosearch.selection import (
 )
 
 
-@pytest.fixture(
-    params=[
-        (0, 100),
-        (100, 125),
-    ]
-)
-def event_sample(request):
-    entry_low, entry_high = request.param
-    with up.open(
-        "/home/niam/phd/data/hyperons/multiSlice/run3b_RHC/analysisOutputRHC_mSlice_cthorpe_make_hyperon_events_numi_rhc_run3b_hyperon_reco2_reco2.root"
-    ) as fd:
-        return fd.get("ana/OutputTree").arrays(
-            entry_start=entry_low, entry_stop=entry_high
-        )
-
-
 @pytest.fixture
 def rand_bool_arr():
     return np.random.random_integers(0, 1, 100)
@@ -84,3 +67,27 @@ def test_Selection():
     s.cuts[1].n_signal = (30, 10)
     s.cuts[1].n_passing = (15, 5)
     s.cuts[1].n_background = (1e4, 1e2)
+
+
+def test_Sample_cache_file(tmp_path):
+    from sigmazerosearch.general import Config
+    from tests.conftest import write_sample
+
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    config = Config(iterate=True, iterate_step=2, cache_dir=cache)
+    events = {"a": [1, 2, 3], "b": [7, 8]}
+    for name, ev in events.items():
+        (tmp_path / name).mkdir()
+        write_sample(tmp_path / name / "hyperon.root", ev, [False] * len(ev))
+
+    for name, ev in events.items():
+        sample = Sample(
+            name, str(tmp_path / name / "hyperon.root"), SampleType.Hyperon, 1e20
+        )
+        sample.load_df(config)
+        # same file name, different files: never the other sample's cache
+        assert sample.cache.read(columns=["event"])["event"].to_pylist() == ev
+        assert sample.rse_index(config) is not None
+    assert len(list(cache.glob("hyperon-*.parquet"))) == 2
+    assert len(list(cache.glob("hyperon-*.rse.npz"))) == 2
@@ -0,0 +1,23 @@
+import awkward as ak
+
+from sigmazerosearch.loader import get_POT, load_ntuple
+from sigmazerosearch.selection import signal_def
+from sigmazerosearch.synthetic import SyntheticSpec, write_ntuple
+
+
+def test_write_ntuple(tmp_path):
+    filename = str(tmp_path / "bkg.root")
+    spec = SyntheticSpec(hyperon_fraction=0.0, mean_pfps=2.0, events_per_subrun=10)
+    pot = write_ntuple(filename, 95, spec, seed=1, chunk_size=40)
+
+    assert pot == get_POT(filename) == 10 * spec.pot_per_subrun
+
+    arr = load_ntuple(filename + ":ana/OutputTree").arrays()
+    assert len(arr) == 95
+    assert ak.all(ak.num(arr["trk_llrpid"]) == ak.num(arr["pfp_trk_shr_score"]))
+    assert not ak.any(signal_def(arr))
+
+
+def test_event_sample(event_sample):
+    assert ak.any(signal_def(event_sample))
+    assert ak.any(event_sample["reco_primary_vtx_inFV"])
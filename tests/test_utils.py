@@ -1,7 +1,9 @@
+import io
+
 import awkward as ak
 import pytest
 
-from sigmazerosearch.utils import filter_by_rse
+from sigmazerosearch.utils import filter_by_rse, print_rse, read_rse, write_rse
 
 
 @pytest.fixture
@@ -21,3 +23,39 @@ def test_filter_by_rse(example_array):
     assert "run" in out.fields
     assert "subrun" in out.fields
     assert "event" in out.fields
+
+
+def test_filter_by_rse_list(example_array):
+    out = filter_by_rse(example_array, [1, 3, 9], [3213, 4932, 9], [12310, 24352, 9])
+
+    assert ak.to_list(out["run"]) == [1, 3]
+    assert len(filter_by_rse(example_array, 1, 3213, 0)) == 0
+
+
+def test_filter_by_rse_unpackable(example_array):
+    # a negative sentinel and an event number too wide for the packed keys
+    arr = ak.concatenate(
+        [example_array, ak.Array({"run": [-1], "subrun": [0], "event": [2**40]})]
+    )
+    assert ak.to_list(filter_by_rse(arr, -1, 0, 2**40)["run"]) == [-1]
+    assert ak.to_list(filter_by_rse(arr, [2, -1], [321, 5], [33842, 0])["run"]) == [2]
+
+
+def test_print_rse(example_array):
+    out = io.StringIO()
+    out.name = "<buffer>"
+    print_rse(example_array, file=out)
+
+    assert out.getvalue() == "1 3213 12310\n2 321 33842\n3 4932 24352\n"
+
+
+@pytest.mark.parametrize("ext", ["txt", "npy", "parquet"])
+def test_write_read_rse(example_array, tmp_path, ext):
+    filename = str(tmp_path / f"events.{ext}")
+    write_rse(example_array, filename)
+    run, subrun, event = read_rse(filename)
+
+    assert list(run) == [1, 2, 3]
+    assert list(subrun) == [3213, 321, 4932]
+    assert list(event) == [12310, 33842, 24352]
+    assert len(filter_by_rse(example_array, run, subrun, event)) == 3
@@ -0,0 +1,116 @@
+import awkward as ak
+import numpy as np
+import pytest
+import uproot as up
+
+from sigmazerosearch.general import Config
+from sigmazerosearch.selection import Cut, Sample, SampleSet, SampleType, Selection
+from sigmazerosearch.weights import Bootstrap, Universes, covariance, universe_matrix
+
+
+def test_universe_matrix():
+    jagged = ak.Array([[1.0, 2.0, 3.0], [4.0], []])
+    assert universe_matrix(jagged, 2).tolist() == [[1, 2], [4, 1], [1, 1]]
+
+    fixed = ak.Array(np.arange(6.0).reshape(3, 2))
+    assert universe_matrix(fixed, 2).tolist() == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_covariance():
+    universes = np.array([[1.0, 3.0], [2.0, 2.0]])
+    assert covariance(universes, np.array([2.0, 2.0])).tolist() == [[1, 0], [0, 0]]
+
+
+@pytest.fixture
+def weighted_sample(tmp_path):
+    filename = str(tmp_path / "weighted.root")
+    with up.recreate(filename) as fd:
+        fd.mktree(
+            "ana/OutputTree",
+            {
+                "event": np.int32,
+                "signal": np.bool_,
+                "weight": np.float64,
+                "multisim": "var * float64",
+            },
+        )
+        fd["ana/OutputTree"].extend(
+            {
+                "event": np.arange(4, dtype=np.int32),
+                "signal": np.array([True, True, False, False]),
+                "weight": np.array([1.0, 2.0, 1.0, 2.0]),
+                "multisim": ak.Array([[1.0, 1.5], [0.5, 1.0], [2.0, 2.0], [1.0]]),
+            }
+        )
+    return Sample("hyperon", filename, SampleType.Hyperon, 1e20)
+
+
+def test_Selection_universes(weighted_sample, monkeypatch):
+    monkeypatch.setattr(
+        "sigmazerosearch.selection.signal_def", lambda arr: arr["signal"]
+    )
+    sel = Selection(
+        params=None,
+        samples=SampleSet(weighted_sample, target_POT=2e20),
+        cuts=[
+            Cut("all", lambda arr: arr["event"] >= 0),
+            Cut("b", lambda arr: arr["event"] >= 1),
+        ],
+        weights=["weight"],
+        universes={"multisim": Universes("multisim", 2)},
+        config=Config(iterate=True, iterate_step=3),
+    )
+    sel.open_files()
+    sel.apply_cut(sel.cuts)
+
+    # POT scale of 2 times the central weights
+    cut = sel.cuts[1]
+    assert cut.n_passing[0] == 10
+    assert cut.n_signal[0] == 4
+    assert cut.universe_counts("multisim", "n_passing").tolist() == [10, 12]
+    assert cut.universe_counts("multisim", "n_signal").tolist() == [2, 4]
+    assert cut.universe_counts("multisim", "total_signal").tolist() == [4, 7]
+    assert cut.universes["multisim"][1, 1].tolist() == [4, 16]
+
+    cov = sel.covariance("multisim")
+    assert cov.tolist() == [[2.5, 2.0], [2.0, 2.0]]
+
+
+def test_Bootstrap():
+    b = Bootstrap(1000, seed=1)
+    w = b.weights("hyperon", 0, 100)
+    assert w.shape == (100, 1000)
+    assert np.all(w == np.round(w)) and w.min() >= 0
+    assert abs(w.mean() - 1) < 0.02 and abs(w.var() - 1) < 0.05
+
+    # independent of the chunking, but not of the sample or seed
+    assert np.array_equal(w[40:60], b.weights("hyperon", 40, 60))
+    assert not np.array_equal(w, b.weights("bkg", 0, 100))
+    assert not np.array_equal(w, Bootstrap(1000, seed=2).weights("hyperon", 0, 100))
+
+
+def test_Selection_bootstrap(samples):
+    def run(step):
+        sel = Selection(
+            params=None,
+            samples=samples,
+            cuts=[Cut("a", lambda arr: arr["event"] > 1)],
+            bootstrap=Bootstrap(200, seed=3),
+            config=Config(iterate=True, iterate_step=step),
+        )
+        sel.open_files()
+        sel.apply_cut(sel.cuts)
+        return sel.cuts[0]
+
+    cut = run(2)
+    # 2 of 3 signal events pass; 3 + 5 events pass, all weighted by one
+    assert cut.n_passing == [8, np.sqrt(8), np.sqrt(8)]
+    assert cut.n_signal == [2, np.sqrt(2), np.sqrt(2)]
+    assert 0.1 < cut.eff_unc() < 0.5
+    assert 0 < cut.pur_unc() < 0.5
+
+    # the same replicas however the samples are chunked
+    other = run(3)
+    assert other.eff_unc() == cut.eff_unc()
+    assert other.pur_unc() == cut.pur_unc()
+    assert np.isnan(Cut("b", None).eff_unc())